@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for the EventGraph MCTS engine.
+
+Builds synthetic trees of 10^2..10^5 nodes with several branching factors
+and times the search and path-extraction primitives on them, then runs a
+few real MCTS iterations against a zero-latency FakeLLM to measure the
+Python overhead per iteration. Results are printed and saved as JSON;
+--compare prints the ratio against an earlier JSON file.
+
+    python benchmarks/bench_eventgraph.py --out bench.json
+    python benchmarks/bench_eventgraph.py --quick --compare bench.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_util
+from eventgraph import EventGraph
+from fake_llm import FakeLLM
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+QUICK_SIZES = [100, 1000, 10000]
+DEFAULT_BRANCHING = [2, 4, 8]
+
+def build_tree(n_nodes: int, branching: int, seed: int = 0):
+    """
+    Breadth-first tree of 'n_nodes' nodes where every internal node has
+    'branching' children, with random MCTS statistics.
+    Returns (eg, root_id).
+    """
+    rng = random.Random(seed)
+    eg = EventGraph(logging_level=None)
+    root_id = eg.add_event_node(text="Once upon a time, in a quiet village, a letter arrived.")
+    frontier = [root_id]
+    count = 1
+    head = 0
+    while count < n_nodes:
+        parent = frontier[head]
+        head += 1
+        for _ in range(branching):
+            if count >= n_nodes:
+                break
+            child = eg._attach_child(parent, f"Event {count}: the knight rode towards tower {rng.randint(0, 10**6)}.")
+            frontier.append(child)
+            count += 1
+
+    nodes = eg.G.nodes
+    for node_id in eg.G.nodes:
+        visits = rng.randint(1, 50)
+        nodes[node_id]["mcts_visits"] = visits
+        nodes[node_id]["mcts_total_score"] = visits * rng.uniform(1.0, 10.0)
+    return eg, root_id
+
+def time_per_call(fn, min_seconds: float = 0.2, max_calls: int = 100000) -> tuple:
+    """
+    Calls fn() until 'min_seconds' have passed (at least once).
+    Returns (seconds per call, number of calls).
+    """
+    calls = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while calls < max_calls:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds:
+            break
+    return elapsed / calls, calls
+
+def bench_tree(n_nodes: int, branching: int, mcts_iterations: int, min_seconds: float) -> list:
+    results = []
+
+    def record(name, seconds, calls, **extra):
+        row = {
+            "benchmark": name,
+            "nodes": n_nodes,
+            "branching": branching,
+            "us_per_call": seconds * 1e6,
+            "calls": calls
+        }
+        row.update(extra)
+        results.append(row)
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    eg, root_id = build_tree(n_nodes, branching)
+    build_seconds = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    record("build_tree", build_seconds, 1, bytes_per_node=peak / n_nodes)
+
+    depth = len(eg.get_top_path(root_id)[0])
+
+    sec, calls = time_per_call(lambda: eg._select_path(root_id, branching), min_seconds)
+    record("_select_path", sec, calls, path_length=len(eg._select_path(root_id, branching)))
+
+    path = eg._select_path(root_id, branching)
+    sec, calls = time_per_call(lambda: eg._backpropagate(path, 5.0), min_seconds)
+    record("_backpropagate", sec, calls, path_length=len(path))
+
+    sec, calls = time_per_call(lambda: eg.get_all_root_to_leaf_paths(root_id), min_seconds)
+    record("get_all_root_to_leaf_paths", sec, calls, paths=len(eg.get_all_root_to_leaf_paths(root_id)))
+
+    sec, calls = time_per_call(lambda: eg.get_top_path(root_id), min_seconds)
+    record("get_top_path", sec, calls)
+
+    sec, calls = time_per_call(lambda: eg._count_paths_of_length(root_id, depth), min_seconds)
+    record("_count_paths_of_length", sec, calls)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "paths.csv")
+        sec, calls = time_per_call(lambda: eg.export_mcts_paths_as_csv(root_id, csv_path), min_seconds)
+        record("export_mcts_paths_as_csv", sec, calls)
+
+    if mcts_iterations:
+        previous = llm_util.set_llm_backend(FakeLLM(seed=0))
+        try:
+            t0 = time.perf_counter()
+            eg.run_mcts(root_id, max_children=branching, scoring_prompt="", iterations=mcts_iterations, scoring_depth=1)
+            sec = (time.perf_counter() - t0) / mcts_iterations
+        finally:
+            llm_util.set_llm_backend(previous)
+        record("run_mcts_iteration", sec, mcts_iterations)
+
+    return results
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def print_table(results: list, baseline: dict = None):
+    header = f"{'benchmark':<28} {'nodes':>7} {'b':>3} {'us/call':>12} {'extra':<24}"
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header)
+    print("-" * len(header))
+    for row in results:
+        extra = ""
+        if "bytes_per_node" in row:
+            extra = f"{row['bytes_per_node']:.0f} B/node"
+        elif "paths" in row:
+            extra = f"{row['paths']} paths"
+        line = f"{row['benchmark']:<28} {row['nodes']:>7} {row['branching']:>3} {row['us_per_call']:>12.1f} {extra:<24}"
+        if baseline is not None:
+            old = baseline.get((row["benchmark"], row["nodes"], row["branching"]))
+            if old:
+                ratio = row["us_per_call"] / old["us_per_call"]
+                flag = "  <-- slower" if ratio > 1.2 else ""
+                line += f" {ratio:>7.2f}x{flag}"
+        print(line)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="EventGraph microbenchmarks")
+    parser.add_argument("--sizes", type=lambda s: [int(x) for x in s.split(",")], default=None,
+                        help="Comma-separated tree sizes (default 100,1000,10000,100000)")
+    parser.add_argument("--branching", type=lambda s: [int(x) for x in s.split(",")], default=DEFAULT_BRANCHING,
+                        help="Comma-separated branching factors")
+    parser.add_argument("--mcts-iterations", type=int, default=200,
+                        help="MCTS iterations per tree with the fake LLM (0 to skip)")
+    parser.add_argument("--min-seconds", type=float, default=0.2,
+                        help="Minimum time spent per measurement")
+    parser.add_argument("--quick", action="store_true",
+                        help="Skip the 10^5-node trees")
+    parser.add_argument("--out", default=None,
+                        help="Write results to this JSON file")
+    parser.add_argument("--compare", default=None,
+                        help="Earlier JSON results to compare against")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    sizes = args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+
+    results = []
+    for n_nodes in sizes:
+        for branching in args.branching:
+            print(f"[INFO] Benchmarking {n_nodes} nodes, branching {branching}...")
+            results.extend(bench_tree(n_nodes, branching, args.mcts_iterations, args.min_seconds))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        baseline = {(r["benchmark"], r["nodes"], r["branching"]): r for r in old["results"]}
+
+    print()
+    print_table(results, baseline)
+
+    if args.out:
+        report = {
+            "meta": {
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "mcts_iterations": args.mcts_iterations,
+                "min_seconds": args.min_seconds
+            },
+            "results": results
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n[INFO] Saved results to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for the evaluation pipelines.
+
+Runs run_evaluation_parallel and run_lexical_diversity_evaluation against
+a SimulatedAPI (per-model latency, random or concurrency-triggered 429s)
+for every combination of worker count and latency profile, and prints a
+comparison table of stories per minute, LLM calls per second, worker
+utilization and wall-clock time. No network access is needed.
+
+Simulated latencies and retry back-off are multiplied by --time-scale so a
+sweep finishes quickly; the reported rates are projected back to real API
+time (wall time / time scale).
+
+    python benchmarks/bench_pipelines.py --workers 1,4,16 --profiles fast,typical
+    python benchmarks/bench_pipelines.py --pipelines standard --rate-limit 0.05 --out sweep.json
+"""
+
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import llm_util
+from tenacity import wait_random_exponential
+from fake_llm import LATENCY_PROFILES, SimulatedAPI
+
+STUB_TEMPLATES = [
+    "A lighthouse keeper finds a message in a bottle addressed to her.",
+    "Two rival bakers are forced to share a kitchen for a royal wedding.",
+    "A boy discovers that his grandfather's watch can pause time for one minute.",
+    "A ship's cook suspects the captain is steering them off the map.",
+]
+
+def _write_stubs(path: str, n_stubs: int):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n_stubs):
+            f.write(f"{STUB_TEMPLATES[i % len(STUB_TEMPLATES)]} (story {i})\n")
+
+def run_standard(workdir: str, workers: int, args) -> tuple:
+    """
+    Runs run_evaluation_parallel with 'workers' generation and 'workers'
+    judge threads; returns (judged stories, total worker threads).
+    """
+    from run_evaluation import run_evaluation_parallel
+
+    stubs_file = os.path.join(workdir, "stubs.txt")
+    _write_stubs(stubs_file, args.stubs)
+    output_dir = os.path.join(workdir, "results")
+    run_evaluation_parallel(
+        stubs_file=stubs_file,
+        narrative_lengths=[args.length],
+        temperature_generate_next=1.0,
+        multibranch_factors=[1, 3],
+        mcts_configs=[{"iterations": args.mcts_iterations, "max_children": 3, "scoring_depth": 1}],
+        min_num_chains=2,
+        output_dir=output_dir,
+        max_workers=workers,
+        judge_workers=workers,
+        resume=False
+    )
+    with open(os.path.join(output_dir, str(args.length), "all_results.csv"), "r", encoding="utf-8") as f:
+        return sum(1 for _ in csv.reader(f)) - 1, 2 * workers
+
+def run_lexical(workdir: str, workers: int, args) -> tuple:
+    """
+    Runs run_lexical_diversity_evaluation; returns (narratives generated,
+    one MCTS and one baseline narrative per run, total worker threads).
+    """
+    from lexical_diversity_evaluation import run_lexical_diversity_evaluation
+
+    stubs_file = os.path.join(workdir, "stubs.txt")
+    _write_stubs(stubs_file, 1)
+    run_lexical_diversity_evaluation(
+        stub_file=stubs_file,
+        stub_index=0,
+        runs=args.stubs,
+        target_length=args.length,
+        mcts_config={"max_children": 3, "iterations": args.mcts_iterations},
+        baseline_config={"branching_factor": 3},
+        output_dir=os.path.join(workdir, "results"),
+        model="gpt-4o",
+        temperature=1.0,
+        max_workers=workers
+    )
+    return 2 * args.stubs, workers
+
+PIPELINES = {
+    "standard": run_standard,
+    "lexical": run_lexical,
+}
+
+def bench_one(pipeline: str, profile: str, workers: int, args) -> dict:
+    api = SimulatedAPI(
+        latency=LATENCY_PROFILES[profile],
+        rate_limit_prob=args.rate_limit,
+        max_concurrency=args.max_concurrency,
+        time_scale=args.time_scale,
+        seed=args.seed
+    )
+    previous_backend = llm_util.set_llm_backend(api)
+    retrying = llm_util.call_openai_with_usage.retry
+    previous_wait = retrying.wait
+    retrying.wait = wait_random_exponential(multiplier=args.time_scale, min=1 * args.time_scale, max=60 * args.time_scale)
+    log = io.StringIO()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            start = time.monotonic()
+            redirect = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(log)
+            with redirect:
+                stories, threads = PIPELINES[pipeline](workdir, workers, args)
+            wall = time.monotonic() - start
+    finally:
+        llm_util.set_llm_backend(previous_backend)
+        retrying.wait = previous_wait
+
+    stats = api.stats()
+    projected = wall / args.time_scale
+    return {
+        "pipeline": pipeline,
+        "profile": profile,
+        "workers": workers,
+        "wall_seconds": wall,
+        "projected_seconds": projected,
+        "stories": stories,
+        "stories_per_min": stories / projected * 60 if projected > 0 else 0.0,
+        "llm_calls": stats["completed"],
+        "calls_per_s": stats["completed"] / projected if projected > 0 else 0.0,
+        "throttled": stats["throttled"],
+        "peak_in_flight": stats["peak_in_flight"],
+        "utilization": stats["busy_seconds"] / (wall * threads) if wall > 0 else 0.0
+    }
+
+def print_table(rows: list):
+    header = (
+        f"{'pipeline':<9} {'profile':<8} {'workers':>7} {'wall s':>8} {'proj. s':>9} {'stories':>7} "
+        f"{'stories/min':>11} {'calls':>6} {'calls/s':>8} {'429s':>5} {'peak':>5} {'util':>5}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in rows:
+        print(
+            f"{r['pipeline']:<9} {r['profile']:<8} {r['workers']:>7} {r['wall_seconds']:>8.2f} {r['projected_seconds']:>9.1f} "
+            f"{r['stories']:>7} {r['stories_per_min']:>11.2f} {r['llm_calls']:>6} {r['calls_per_s']:>8.2f} "
+            f"{r['throttled']:>5} {r['peak_in_flight']:>5} {r['utilization']:>5.0%}"
+        )
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Evaluation pipeline throughput under simulated LLM latency")
+    parser.add_argument("--pipelines", default="standard,lexical",
+                        help="Comma-separated pipelines: standard, lexical")
+    parser.add_argument("--workers", type=lambda s: [int(x) for x in s.split(",")], default=[1, 4, 16],
+                        help="Comma-separated max_workers values")
+    parser.add_argument("--profiles", default="fast,typical",
+                        help=f"Comma-separated latency profiles: {', '.join(LATENCY_PROFILES)}")
+    parser.add_argument("--stubs", type=int, default=4,
+                        help="Stubs (standard) or runs (lexical) per benchmark")
+    parser.add_argument("--length", type=int, default=5,
+                        help="Narrative length")
+    parser.add_argument("--mcts-iterations", type=int, default=12,
+                        help="MCTS iterations per run")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Probability that a call fails with 429")
+    parser.add_argument("--max-concurrency", type=int, default=None,
+                        help="Simulated server-side concurrency limit (429 above it)")
+    parser.add_argument("--time-scale", type=float, default=0.01,
+                        help="Multiplier applied to simulated latency and retry back-off")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for latency and 429 draws")
+    parser.add_argument("--out", default=None,
+                        help="Write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true",
+                        help="Show the pipelines' own output")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    pipelines = [p.strip() for p in args.pipelines.split(",") if p.strip()]
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+
+    rows = []
+    for pipeline in pipelines:
+        for profile in profiles:
+            for workers in args.workers:
+                print(f"[INFO] {pipeline} / {profile} / {workers} workers...")
+                rows.append(bench_one(pipeline, profile, workers, args))
+
+    print()
+    print_table(rows)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"settings": vars(args), "results": rows}, f, indent=2)
+        print(f"\n[INFO] Saved results to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+import requests
+
+_WORDS = (
+    "the a king queen knight dragon castle forest river sword storm night secret "
+    "letter village merchant thief sister brother betrayal promise map tower "
+    "ran fought whispered fled returned discovered hid burned opened followed"
+).split()
+
+_JUDGE_KEYS = [
+    "overall_quality",
+    "identifying_major_flaws",
+    "character_behavior",
+    "common_sense_adherence",
+    "consistency",
+    "relatedness",
+    "causal_temporal_relationship"
+]
+
+class FakeLLM:
+    """
+    Deterministic stand-in for the OpenAI API, for use with
+    llm_util.set_llm_backend. No network, no sleeping.
+
+    The answer to a prompt depends only on the seed, the prompt and how
+    many times that prompt was asked before, so runs are reproducible even
+    when calls happen in a different order across threads. Scoring prompts
+    get an integer 1..10, judge prompts (with a response format) get judge
+    JSON, everything else gets a short event sentence.
+    """
+
+    def __init__(self, seed: int = 0, event_words: int = 25):
+        self.seed = seed
+        self.event_words = event_words
+        self._lock = threading.Lock()
+        self._seen = {}
+        self.calls = 0
+
+    def _rng(self, prompt: str) -> random.Random:
+        key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest()
+        with self._lock:
+            nth = self._seen.get(key, 0)
+            self._seen[key] = nth + 1
+            self.calls += 1
+        return random.Random(f"{self.seed}:{key.hex()}:{nth}")
+
+    def __call__(self, prompt: str, model: str = "gpt-4o", temperature: float = None, responseFormat: dict = None, max_completion_tokens: int = None) -> tuple:
+        rng = self._rng(prompt)
+        if responseFormat is not None:
+            content = json.dumps({
+                "judgement": {k: rng.randint(1, 10) for k in _JUDGE_KEYS},
+                "narrative_comments": "Fake judgement."
+            })
+        elif "Only output **one integer**" in prompt:
+            content = str(rng.randint(1, 10))
+        else:
+            words = [rng.choice(_WORDS) for _ in range(self.event_words)]
+            content = " ".join(words).capitalize() + "."
+        usage = {
+            "prompt_tokens": len(prompt) // 4,
+            "completion_tokens": max(1, len(content) // 4)
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return content, usage
+
+# Per-model latency as (median seconds, lognormal sigma); "default" covers
+# any other model
+LATENCY_PROFILES = {
+    "none": {"default": (0.0, 0.0)},
+    "fast": {"default": (0.4, 0.3), "o1": (4.0, 0.3)},
+    "typical": {"default": (1.5, 0.5), "o1": (20.0, 0.4)},
+    "slow": {"default": (4.0, 0.7), "o1": (45.0, 0.5)},
+}
+
+class SimulatedAPI:
+    """
+    Wraps a FakeLLM with simulated network behaviour, for throughput
+    benchmarks through llm_util.set_llm_backend:
+
+    - each call sleeps for a lognormal latency drawn from 'latency'
+      ({model: (median_seconds, sigma)}, see LATENCY_PROFILES);
+    - a call fails with HTTP 429 with probability 'rate_limit_prob', or
+      whenever 'max_concurrency' calls are already in flight;
+    - all sleeps are multiplied by 'time_scale', so a run can simulate
+      minutes of API time in seconds.
+
+    stats() reports calls, 429s, peak concurrency and the integral of
+    in-flight calls over time (busy_seconds).
+    """
+
+    def __init__(self, llm: FakeLLM = None, latency: dict = None, rate_limit_prob: float = 0.0, max_concurrency: int = None, time_scale: float = 1.0, seed: int = 0):
+        self.llm = llm if llm is not None else FakeLLM(seed=seed)
+        self.latency = latency if latency is not None else LATENCY_PROFILES["none"]
+        self.rate_limit_prob = rate_limit_prob
+        self.max_concurrency = max_concurrency
+        self.time_scale = time_scale
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._last_change = time.monotonic()
+        self._busy_seconds = 0.0
+        self._peak = 0
+        self._calls = 0
+        self._throttled = 0
+
+    def _change_in_flight(self, delta: int):
+        # Caller holds the lock
+        now = time.monotonic()
+        self._busy_seconds += self._in_flight * (now - self._last_change)
+        self._last_change = now
+        self._in_flight += delta
+        self._peak = max(self._peak, self._in_flight)
+
+    def _draw_latency(self, model: str) -> float:
+        median, sigma = self.latency.get(model, self.latency["default"])
+        if median <= 0:
+            return 0.0
+        with self._lock:
+            return median * math.exp(sigma * self._rng.gauss(0.0, 1.0))
+
+    def __call__(self, prompt: str, model: str = "gpt-4o", **kwargs) -> tuple:
+        with self._lock:
+            self._calls += 1
+            throttled = (
+                self._rng.random() < self.rate_limit_prob
+                or (self.max_concurrency is not None and self._in_flight >= self.max_concurrency)
+            )
+            if throttled:
+                self._throttled += 1
+        if throttled:
+            response = requests.Response()
+            response.status_code = 429
+            raise requests.exceptions.HTTPError("429 Too Many Requests (simulated)", response=response)
+
+        with self._lock:
+            self._change_in_flight(1)
+        try:
+            delay = self._draw_latency(model) * self.time_scale
+            if delay > 0:
+                time.sleep(delay)
+            return self.llm(prompt, model=model, **kwargs)
+        finally:
+            with self._lock:
+                self._change_in_flight(-1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._change_in_flight(0)
+            return {
+                "calls": self._calls,
+                "throttled": self._throttled,
+                "completed": self._calls - self._throttled,
+                "peak_in_flight": self._peak,
+                "busy_seconds": self._busy_seconds
+            }
@@ -1,10 +1,47 @@
 #!/usr/bin/env python3
 
+import argparse
 import nltk
 import sys
 import os
 
-def download_nltk_resources():
+# The lexical diversity evaluation only needs the tokenizer data; without
+# it a built-in regex tokenizer is used.
+REQUIRED_RESOURCES = {
+    'punkt_tab': 'tokenizers/punkt_tab/english/',  # Sentence/word tokenizer (NLTK 3.9)
+}
+
+# Other NLTK data handy for ad-hoc analysis; downloaded only with --all
+OPTIONAL_RESOURCES = {
+    'punkt': 'tokenizers/punkt',                   # Older tokenizer models
+    'stopwords': 'corpora/stopwords',              # Common stopwords
+    'averaged_perceptron_tagger': 'taggers/averaged_perceptron_tagger',  # For POS tagging
+    'wordnet': 'corpora/wordnet',                  # Lexical database
+    'omw-1.4': 'corpora/omw-1.4'                   # Open Multilingual WordNet
+}
+
+def missing_nltk_resources(resources: dict = None) -> list:
+    """
+    Names of 'resources' (REQUIRED_RESOURCES by default) not found
+    locally. No network access.
+    """
+    if resources is None:
+        resources = REQUIRED_RESOURCES
+    missing = []
+    for resource, path in resources.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(resource)
+    return missing
+
+def download_nltk_resources(download_all: bool = False):
+    """
+    Downloads the REQUIRED_RESOURCES that are not installed yet (and the
+    OPTIONAL_RESOURCES with 'download_all') into ~/nltk_data. Returns True
+    if every required resource is available afterwards; optional ones
+    that fail to download are reported but do not count.
+    """
     # Create a directory to store NLTK data if it doesn't exist
     nltk_data_dir = os.path.expanduser('~/nltk_data')
     if not os.path.exists(nltk_data_dir):
@@ -12,78 +49,49 @@ def download_nltk_resources():
         print(f"Created NLTK data directory at {nltk_data_dir}")
     
     # Ensure NLTK uses this directory
-    nltk.data.path.append(nltk_data_dir)
-    
-    # List of required resources
-    required_resources = [
-        'punkt',           # Sentence tokenizer
-        'stopwords',       # Common stopwords
-        'averaged_perceptron_tagger',  # For POS tagging
-        'wordnet',         # Lexical database
-        'omw-1.4'          # Open Multilingual WordNet
-    ]
-    
-    print(f"Downloading NLTK resources to {nltk_data_dir}")
-    for resource in required_resources:
+    if nltk_data_dir not in nltk.data.path:
+        nltk.data.path.append(nltk_data_dir)
+
+    resources = dict(REQUIRED_RESOURCES)
+    if download_all:
+        resources.update(OPTIONAL_RESOURCES)
+
+    missing = missing_nltk_resources(resources)
+    if missing:
+        print(f"Downloading NLTK resources to {nltk_data_dir}")
+    for resource in missing:
         print(f"Downloading {resource}...")
         try:
-            nltk.download(resource, download_dir=nltk_data_dir, quiet=False)
-            print(f"Successfully downloaded {resource}")
+            if nltk.download(resource, download_dir=nltk_data_dir, quiet=True):
+                print(f"Successfully downloaded {resource}")
+            else:
+                print(f"Error downloading {resource}")
         except Exception as e:
             print(f"Error downloading {resource}: {e}")
     
-    # Download all punkt models to ensure punkt_tab availability
-    try:
-        print("Ensuring punkt tokenizer models are available...")
-        tokenizer = nltk.data.load('tokenizers/punkt/english.pickle')
-        print("Successfully loaded punkt models")
-    except Exception as e:
-        print(f"Error loading punkt models: {e}")
-        print("Attempting to download all resources...")
-        try:
-            nltk.download('all', download_dir=nltk_data_dir, quiet=False)
-            print("Downloaded all NLTK resources to ensure availability")
-        except Exception as e2:
-            print(f"Error downloading all resources: {e2}")
-            print("Please manually run the following command in your terminal:")
-            print("python -m nltk.downloader all")
-    
-    # Verify availability of critical resources
+    # Verify availability of the resources
     print("\nVerifying resources:")
-    all_available = True
-    for resource in required_resources:
-        try:
-            if resource == 'punkt':
-                nltk.data.find(f'tokenizers/punkt/english.pickle')
-                print(f"✓ {resource} (english) is available")
-            else:
-                nltk.data.find(resource)
-                print(f"✓ {resource} is available")
-        except LookupError as e:
-            print(f"✗ {resource} is NOT available: {e}")
-            all_available = False
-    
-    # Special check for punkt_tab
-    try:
-        nltk.data.find('tokenizers/punkt_tab/english/')
-        print("✓ punkt_tab (english) is available")
-    except LookupError:
-        try:
-            # This is a workaround to handle punkt_tab
-            from nltk.tokenize.punkt import PunktLanguageVars
-            print("✓ PunktLanguageVars is available (punkt_tab alternative)")
-        except Exception as e:
-            print(f"✗ punkt_tab is NOT available and alternative failed: {e}")
-            all_available = False
+    still_missing = missing_nltk_resources(resources)
+    for resource in resources:
+        optional = " (optional)" if resource not in REQUIRED_RESOURCES else ""
+        if resource in still_missing:
+            print(f"✗ {resource}{optional} is NOT available")
+        else:
+            print(f"✓ {resource}{optional} is available")
     
-    if all_available:
+    required_missing = [r for r in still_missing if r in REQUIRED_RESOURCES]
+    if not required_missing:
         print("\nAll required NLTK resources are available!")
     else:
-        print("\nSome resources could not be verified. Running the lexical diversity evaluation may fail.")
-        print("Consider running 'python -m nltk.downloader all' to download all NLTK resources.")
+        print("\nThe tokenizer data could not be downloaded. The lexical diversity evaluation will still run,")
+        print("using its built-in regex tokenizer.")
     
-    return all_available
+    return not required_missing
 
 if __name__ == "__main__":
-    success = download_nltk_resources()
+    parser = argparse.ArgumentParser(description="Download the NLTK data used by the lexical diversity evaluation")
+    parser.add_argument("--all", action="store_true",
+                        help="Also download the optional resources (stopwords, wordnet, tagger, ...)")
+    args = parser.parse_args()
+    success = download_nltk_resources(download_all=args.all)
     sys.exit(0 if success else 1)
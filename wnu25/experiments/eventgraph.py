@@ -1,10 +1,75 @@
 import logging
 import networkx as nx
-import matplotlib.pyplot as plt
 import math
 import re
+import sys
 import csv
-from llm_util import call_openai
+import gzip
+import heapq
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from llm_util import call_openai_with_usage, UsageMeter
+from local_scorer import prescreen_event
+from text_store import TextStore
+
+class BudgetExhausted(Exception):
+    """
+    Raised inside an MCTS iteration when a wall-clock, token or dollar budget
+    runs out. run_mcts catches it and stops the search.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class _PhaseTimer:
+    """
+    Context manager that appends the elapsed time of its block to a list.
+    """
+    __slots__ = ("_samples", "_start")
+
+    def __init__(self, samples: list):
+        self._samples = samples
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._samples.append(time.perf_counter() - self._start)
+        return False
+
+class _NullPhaseTimer:
+    """
+    No-op stand-in for _PhaseTimer when profiling is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_PHASE_TIMER = _NullPhaseTimer()
+
+class LLMRequest:
+    """
+    A pending LLM call yielded by the MCTS step generators. Whoever drives
+    the generator performs the call (see EventGraph._run_steps and
+    forest.MCTSForest) and sends the response text back in.
+    """
+    __slots__ = ("kind", "phase", "prompt", "model", "temperature", "kwargs")
+
+    def __init__(self, kind: str, phase: str, prompt: str, model: str, temperature: float, **kwargs):
+        self.kind = kind
+        self.phase = phase
+        self.prompt = prompt
+        self.model = model
+        self.temperature = temperature
+        self.kwargs = kwargs
 
 class EventGraph:
 
@@ -19,7 +84,23 @@ class EventGraph:
         temperature_scoring: float = 0.0,
 
         # Optional logging level (e.g. logging.INFO or None to disable)
-        logging_level=logging.INFO
+        logging_level=logging.INFO,
+
+        # Record per-phase timings of the MCTS loop (see get_phase_summary)
+        profile_phases: bool = False,
+
+        # Screen simulations with cheap local checks before LLM scoring
+        prefilter_scoring: bool = False,
+
+        # Shared text storage; pass one TextStore to many graphs to dedupe across trees
+        text_store: TextStore = None,
+
+        # Context policy for next-event prompts (None = send everything):
+        # keep the last 'context_window' events verbatim and replace older ones
+        # with a cached rolling summary; list at most 'max_prev_guesses' guesses
+        context_window: int = None,
+        max_prev_guesses: int = None,
+        model_summary: str = None
     ):
         # Set up logger
         self.logger = logging.getLogger(__name__)
@@ -39,6 +120,8 @@ class EventGraph:
                 self.logger.addHandler(handler)
 
         self.G = nx.DiGraph()
+        # Node texts and prevGuessesForward entries are ids into this store
+        self.text_store = text_store if text_store is not None else TextStore()
         # Internal counter for node IDs
         self._next_key = 1
 
@@ -49,12 +132,154 @@ class EventGraph:
         self.model_scoring = model_scoring
         self.temperature_scoring = temperature_scoring
 
+        # Running totals of LLM calls/tokens/cost made through this graph
+        self.usage = UsageMeter()
+
+        # Active search budget (set by run_mcts while it runs)
+        self._budget = None
+
+        # In-flight bookkeeping for concurrent iterations (see forest.py):
+        # node -> expansions not yet attached, node -> virtual-loss visits
+        self._pending_expansions = {}
+        self._virtual_visits = {}
+
+        # Speculative expansion (see run_mcts 'speculation_width'):
+        # node -> one pre-generated child text (or a Future for it)
+        self._speculative_children = {}
+        self._speculator = None
+        self._speculation_width = 0
+        self.speculation_stats = {"launched": 0, "used": 0}
+
+        # Bounded prompt context (see _context_steps)
+        self.context_window = context_window
+        self.max_prev_guesses = max_prev_guesses
+        self.model_summary = model_summary if model_summary is not None else model_scoring
+        self.context_stats = {
+            "prompts": 0,
+            "full_prompt_chars": 0,
+            "sent_prompt_chars": 0
+        }
+
+        # Per-phase timing samples, in seconds
+        self.profile_phases = profile_phases
+        self._phase_samples = defaultdict(list)
+
+        # Local pre-filter in front of score_event_with_openai (see local_scorer)
+        self.prefilter_scoring = prefilter_scoring
+        self.prefilter_stats = {
+            "checked": 0,
+            "rejected": 0,
+            "llm_calls_saved": 0,
+            "reasons": defaultdict(int)
+        }
+
+    def _phase(self, name: str):
+        """
+        Returns a context manager timing 'name' if profiling is enabled.
+        Phases: selection, expansion_llm, rollout_llm, scoring_llm,
+        backprop, early_stop.
+        """
+        if not self.profile_phases:
+            return _NULL_PHASE_TIMER
+        return _PhaseTimer(self._phase_samples[name])
+
+    def get_phase_summary(self) -> dict:
+        """
+        Summarizes recorded phase timings as
+        {phase: {"calls", "total_seconds", "mean_seconds", "p50_seconds", "p95_seconds"}}.
+        """
+        summary = {}
+        for name, samples in self._phase_samples.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            n = len(ordered)
+            total = sum(ordered)
+            summary[name] = {
+                "calls": n,
+                "total_seconds": total,
+                "mean_seconds": total / n,
+                "p50_seconds": ordered[min(n - 1, int(0.50 * n))],
+                "p95_seconds": ordered[min(n - 1, int(0.95 * n))]
+            }
+        return summary
+
+    def reset_phase_stats(self):
+        self._phase_samples = defaultdict(list)
+
+    def profile_mcts(self, root_id: int, n_iterations: int, use_tracemalloc: bool = True, top: int = 25, **run_mcts_kwargs) -> dict:
+        """
+        Runs 'n_iterations' of run_mcts under cProfile (and optionally
+        tracemalloc) with phase timing enabled. Returns
+        {"run_summary", "phases", "cprofile", "tracemalloc"} where "cprofile"
+        is the pstats report of the 'top' functions by cumulative time and
+        "tracemalloc" holds current/peak bytes and the top allocation sites.
+        """
+        import cProfile
+        import io
+        import pstats
+        import tracemalloc
+
+        was_profiling = self.profile_phases
+        self.profile_phases = True
+        self.reset_phase_stats()
+
+        started_tracemalloc = False
+        if use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracemalloc = True
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            run_summary = self.run_mcts(root_id=root_id, iterations=n_iterations, **run_mcts_kwargs)
+            profiler.disable()
+
+            memory = None
+            if use_tracemalloc and tracemalloc.is_tracing():
+                current, peak = tracemalloc.get_traced_memory()
+                snapshot = tracemalloc.take_snapshot()
+                memory = {
+                    "current_bytes": current,
+                    "peak_bytes": peak,
+                    "top": [str(stat) for stat in snapshot.statistics("lineno")[:top]]
+                }
+        finally:
+            profiler.disable()
+            if started_tracemalloc:
+                tracemalloc.stop()
+            self.profile_phases = was_profiling
+
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(top)
+        return {
+            "run_summary": run_summary,
+            "phases": self.get_phase_summary(),
+            "cprofile": report.getvalue(),
+            "tracemalloc": memory
+        }
+
+    def _call_llm(self, kind: str, prompt: str, model: str, temperature: float, **kwargs) -> str:
+        """
+        Calls the LLM and records the usage under 'kind' ("generate", "score", ...).
+        """
+        text, usage = call_openai_with_usage(
+            prompt,
+            model=model,
+            temperature=temperature,
+            **kwargs
+        )
+        self.usage.record(kind, model, usage)
+        return text
+
     def add_event_node(self,
                        text: str,
                        prevGuessesForward=None,
                        prevGuessesBackward=None):
         """
         Create a new node in the graph with an auto-incremented integer key.
+        The text (and any prevGuessesForward texts) are interned in the
+        text store; nodes keep only ids. Use get_text() to read them back.
         """
         if prevGuessesForward is None:
             prevGuessesForward = []
@@ -66,14 +291,49 @@ class EventGraph:
 
         self.G.add_node(
             node_id,
-            text=text,
-            prevGuessesForward=prevGuessesForward,
+            text_id=self.text_store.intern(text),
+            prevGuessesForward=[self.text_store.intern(t) for t in prevGuessesForward],
             prevGuessesBackward=prevGuessesBackward,
             mcts_visits=0,
             mcts_total_score=0.0
         )
         return node_id
 
+    def get_text(self, node_id) -> str:
+        return self.text_store.get(self.G.nodes[node_id]["text_id"])
+
+    def get_prev_guesses_forward(self, node_id) -> list:
+        return self.text_store.get_many(self.G.nodes[node_id]["prevGuessesForward"])
+
+    def compress_cold_nodes(self, max_visits: int = 0) -> int:
+        """
+        Compresses the stored texts of nodes with at most 'max_visits' MCTS
+        visits (rarely selected, so rarely read). Returns bytes saved.
+        """
+        cold_ids = [
+            data["text_id"]
+            for _, data in self.G.nodes(data=True)
+            if data.get("mcts_visits", 0) <= max_visits
+        ]
+        return self.text_store.compress(cold_ids)
+
+    def memory_stats(self) -> dict:
+        """
+        Approximate memory held by this graph, in bytes. The text store is
+        reported separately since it may be shared with other graphs.
+        """
+        node_bytes = 0
+        for n, data in self.G.nodes(data=True):
+            node_bytes += sys.getsizeof(data) + sys.getsizeof(data["prevGuessesForward"])
+            node_bytes += sys.getsizeof(self.G.succ[n]) + sys.getsizeof(self.G.pred[n])
+        num_nodes = self.G.number_of_nodes()
+        return {
+            "nodes": num_nodes,
+            "node_bytes": node_bytes,
+            "bytes_per_node": node_bytes / num_nodes if num_nodes else 0.0,
+            "text_store": self.text_store.memory_stats()
+        }
+
     def get_children(self, node_id):
         return list(self.G.successors(node_id))
 
@@ -108,16 +368,141 @@ class EventGraph:
         Generates a "next" event from the given node, with the **exact** prompt text 
         that matches the TypeScript version.
         """
+        # Gather all events (chain) so far, subject to the context policy
+        chain_texts, prev_guesses = self._run_steps(self._context_steps(from_node))
+
+        return self._generate_from_texts(
+            chain_texts,
+            prev_guesses,
+            include_entity_graph=include_entity_graph,
+            entities_description=entities_description,
+            user_prompt=user_prompt,
+            event_temperature=event_temperature
+        )
+
+    def next_event_context(self, from_node: int) -> tuple:
+        """
+        The (chain_texts, prev_guesses) a next-event prompt from 'from_node'
+        is built from, subject to the context policy. With
+        generate_from_context, lets callers schedule the calls of
+        generate_next_events themselves.
+        """
+        return self._run_steps(self._context_steps(from_node))
+
+    def generate_from_context(self, context: tuple, user_prompt: str = "", event_temperature: float = None):
+        """
+        generate_next_event for a context from next_event_context.
+        """
+        chain_texts, prev_guesses = context
+        return self._generate_from_texts(
+            chain_texts,
+            prev_guesses,
+            user_prompt=user_prompt,
+            event_temperature=event_temperature
+        )
+
+    def generate_next_events(
+        self,
+        from_node: int,
+        n: int,
+        executor: ThreadPoolExecutor = None,
+        user_prompt: str = "",
+        event_temperature: float = None,
+    ) -> list:
+        """
+        Generates 'n' independent "next" events from the same node with the
+        same prompt, as generate_next_event would one after another. The
+        context is built once; the n calls run concurrently on 'executor' if
+        given (share one bounded pool between callers), otherwise one after
+        another. Returns the n results in call order, so inserting them in
+        list order is deterministic.
+        """
+        context = self.next_event_context(from_node)
+
+        def generate(_):
+            return self.generate_from_context(context, user_prompt=user_prompt, event_temperature=event_temperature)
+
+        if executor is None or n <= 1:
+            return [generate(i) for i in range(n)]
+        return list(executor.map(generate, range(n)))
+
+    def _generate_from_texts(
+        self,
+        chain_texts: list,
+        prev_guesses_forward: list,
+        include_entity_graph: bool = False,
+        entities_description: str = "",
+        user_prompt: str = "",
+        event_temperature: float = None,
+    ):
+        """
+        generate_next_event for an explicit chain of event texts, without
+        needing a node in the graph (used for rollouts).
+        """
+        request = self._next_event_request(
+            chain_texts,
+            prev_guesses_forward,
+            phase="generate",
+            include_entity_graph=include_entity_graph,
+            entities_description=entities_description,
+            user_prompt=user_prompt,
+            event_temperature=event_temperature
+        )
+        response = self._call_llm(
+            request.kind,
+            request.prompt,
+            model=request.model,
+            temperature=request.temperature,
+            **request.kwargs
+        )
+
+        return {
+            "text": response
+        }
+
+    def _next_event_request(
+        self,
+        chain_texts: list,
+        prev_guesses_forward: list,
+        phase: str,
+        include_entity_graph: bool = False,
+        entities_description: str = "",
+        user_prompt: str = "",
+        event_temperature: float = None,
+    ) -> LLMRequest:
+        """
+        Builds the "next event" prompt (identical to the TS code) as an LLMRequest.
+        """
         if event_temperature is None:
             event_temperature = self.temperature_generate_next
 
-        node_data = self.G.nodes[from_node]
-        prev_guesses_forward = node_data["prevGuessesForward"]
+        prompt = self._next_event_prompt(
+            chain_texts,
+            prev_guesses_forward,
+            include_entity_graph=include_entity_graph,
+            entities_description=entities_description,
+            user_prompt=user_prompt
+        )
 
-        # Gather all events (chain) so far
-        chain_ids = self.gather_chain_in_chronological_order(from_node)
-        chain_texts = [self.G.nodes[n]["text"] for n in chain_ids]
+        self.logger.info("Prompt for Next Event:\n%s", prompt.strip())
+
+        return LLMRequest(
+            "generate",
+            phase,
+            prompt,
+            model=self.model_generate_next,
+            temperature=event_temperature,
+            max_completion_tokens=300
+        )
 
+    def _next_event_prompt(
+        self,
+        chain_texts: list,
+        prev_guesses_forward: list,
+        include_entity_graph: bool = False,
+        entities_description: str = "",
+        user_prompt: str = ""
+    ) -> str:
         if chain_texts:
             parents_text = "\n".join(f"- {t}" for t in chain_texts)
         else:
@@ -157,18 +542,120 @@ You are a creative storyteller. Below is the current story context (events so fa
 
         # Final line
         prompt += "\nNow, write the next event:\n"
+        return prompt
 
-        self.logger.info("Prompt for Next Event:\n%s", prompt.strip())
+    def _context_steps(self, node_id: int, record: bool = True):
+        """
+        Step generator returning (chain_texts, prev_guesses) for a next-event
+        prompt from 'node_id' under the context policy. With 'record', the
+        prompt is counted in context_stats as sent.
+
+        With 'context_window' = K, the last K events of the chain are kept
+        verbatim and everything before them is replaced by the rolling
+        summary cached on the newest summarized ancestor. Summaries are
+        computed once per node (yielding "summarize" requests as needed) and
+        reused by all descendants, so prompt size stays bounded with depth.
+        'max_prev_guesses' keeps only the most recent sibling guesses.
+        """
+        chain_ids = self.gather_chain_in_chronological_order(node_id)
+        prev_guesses = self.get_prev_guesses_forward(node_id)
+        if self.context_window is None and self.max_prev_guesses is None:
+            return [self.get_text(n) for n in chain_ids], prev_guesses
+
+        sent_guesses = prev_guesses
+        if self.max_prev_guesses is not None:
+            sent_guesses = prev_guesses[len(prev_guesses) - self.max_prev_guesses:] if self.max_prev_guesses > 0 else []
 
-        response = call_openai(
+        if self.context_window is None or len(chain_ids) <= self.context_window:
+            sent_chain = [self.get_text(n) for n in chain_ids]
+        else:
+            split = len(chain_ids) - self.context_window
+            summary = yield from self._summary_steps(chain_ids[:split])
+            sent_chain = [f"(Summary of earlier events) {summary}"] + [self.get_text(n) for n in chain_ids[split:]]
+
+        if not record:
+            return sent_chain, sent_guesses
+        full_chain = [self.get_text(n) for n in chain_ids]
+        self.context_stats["prompts"] += 1
+        self.context_stats["full_prompt_chars"] += len(self._next_event_prompt(full_chain, prev_guesses))
+        self.context_stats["sent_prompt_chars"] += len(self._next_event_prompt(sent_chain, sent_guesses))
+        return sent_chain, sent_guesses
+
+    def _summary_steps(self, chain_ids: list):
+        """
+        Step generator returning the rolling summary of the events in
+        'chain_ids' (root first). Each node caches the summary of the chain
+        ending at it; only the missing tail is summarized.
+        """
+        start = len(chain_ids)
+        summary = None
+        while start > 0:
+            cached = self.G.nodes[chain_ids[start - 1]].get("chain_summary_id")
+            if cached is not None:
+                summary = self.text_store.get(cached)
+                break
+            start -= 1
+
+        for node_id in chain_ids[start:]:
+            summary = yield self._summary_request(summary, self.get_text(node_id))
+            self.G.nodes[node_id]["chain_summary_id"] = self.text_store.intern(summary)
+        return summary
+
+    def _summary_request(self, previous_summary: str, event_text: str) -> LLMRequest:
+        if previous_summary:
+            story_so_far = f"Summary of the story so far:\n{previous_summary}\n\nNext event:\n{event_text}"
+        else:
+            story_so_far = f"Story opening:\n{event_text}"
+        prompt = f"""
+You maintain a running summary of a story that is being written event by event.
+
+{story_so_far}
+
+Write an updated summary of the whole story so far in at most 4 sentences. Keep every named character, location, and established fact that later events may depend on. Output only the summary.
+"""
+        return LLMRequest(
+            "summarize",
+            "summary_llm",
             prompt,
-            model=self.model_generate_next,
-            temperature=event_temperature,
-            max_completion_tokens=300
+            model=self.model_summary,
+            temperature=0.0,
+            max_completion_tokens=200
         )
 
+    def _cached_context(self, node_id: int):
+        """
+        (chain_texts, prev_guesses) for 'node_id' if no summary call is
+        needed to build them, else None. Not counted in context_stats; a
+        speculative prompt is counted once its child is attached.
+        """
+        steps = self._context_steps(node_id, record=False)
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+        steps.close()
+        return None
+
+    def get_context_savings(self) -> dict:
+        """
+        Estimated prompt tokens sent for next-event prompts versus the
+        full-context prompts they replaced (chars / 4), and what the
+        summaries cost.
+        """
+        stats = self.context_stats
+        full_tokens = stats["full_prompt_chars"] // 4
+        sent_tokens = stats["sent_prompt_chars"] // 4
+        summary_usage = self.usage.snapshot()["by_kind"].get("summarize", {})
+        summary_tokens = summary_usage.get("prompt_tokens", 0) + summary_usage.get("completion_tokens", 0)
         return {
-            "text": response
+            "prompts": stats["prompts"],
+            "full_prompt_tokens_est": full_tokens,
+            "sent_prompt_tokens_est": sent_tokens,
+            "saved_prompt_tokens_est": full_tokens - sent_tokens,
+            "saved_ratio": (full_tokens - sent_tokens) / full_tokens if full_tokens else 0.0,
+            "summary_calls": summary_usage.get("calls", 0),
+            "summary_tokens": summary_tokens,
+            "net_saved_tokens_est": full_tokens - sent_tokens - summary_tokens
         }
 
     def score_event_with_openai(self, event_text: str, user_prompt: str = "") -> float:
@@ -177,6 +664,18 @@ You are a creative storyteller. Below is the current story context (events so fa
         that appears in the TypeScript version.
         Defaults to 5 if invalid or out of range.
         """
+        request = self._scoring_request(event_text, user_prompt)
+
+        # Call the LLM
+        llm_text = self._call_llm(
+            request.kind,
+            request.prompt,
+            model=request.model,
+            temperature=request.temperature
+        )
+        return self._parse_score(llm_text, event_text)
+
+    def _scoring_request(self, event_text: str, user_prompt: str = "", phase: str = "score") -> LLMRequest:
         if user_prompt.strip():
             domain_constraints_line = f"Below are domain-specific or user-specified constraints:\n- {user_prompt}\n"
         else:
@@ -219,14 +718,15 @@ Only output **one integer** from 1 to 10.
 NARRATIVE EVENT:
 {event_text}
 """
-
-        # Call the LLM
-        llm_text = call_openai(
-            prompt=rating_prompt,
+        return LLMRequest(
+            "score",
+            phase,
+            rating_prompt,
             model=self.model_scoring,
             temperature=self.temperature_scoring
         )
 
+    def _parse_score(self, llm_text: str, event_text: str) -> float:
         # Parse integer 1..10 from the LLM response
         try:
             score = int(re.findall(r'\d+', llm_text)[0])
@@ -245,6 +745,10 @@ NARRATIVE EVENT:
 
     EXPLORATION_CONSTANT = 0.7
 
+    # At most this many buffered speculative children per speculation
+    # worker; the oldest is dropped beyond that
+    SPECULATIVE_BUFFER_PER_WORKER = 4
+
     def run_mcts(self, 
                  root_id: int, 
                  max_children: int, 
@@ -253,7 +757,12 @@ NARRATIVE EVENT:
                  scoring_depth: int = 1,
                  rollout_depth: int = 2,
                  desired_chain_length: int = None,
-                 min_num_chains: int = None):
+                 min_num_chains: int = None,
+                 max_seconds: float = None,
+                 max_tokens: int = None,
+                 max_cost_usd: float = None,
+                 speculation_width: int = 0,
+                 on_iteration=None):
         """
         Orchestrates MCTS steps (selection, expansion, simulation, backprop).
         - We treat a node as “expandable” until it has 'max_children' children.
@@ -266,63 +775,305 @@ NARRATIVE EVENT:
         the MCTS loop will stop early once at least 'min_num_chains'
         distinct root->leaf paths reach exactly 'desired_chain_length' nodes,
         unless 'iterations' is reached first.
+
+        'max_seconds', 'max_tokens' and 'max_cost_usd' bound the search by
+        wall-clock time, total LLM tokens and estimated dollars spent during
+        this call. They are checked between iterations and before every LLM
+        call, so an iteration may be abandoned halfway; use get_best_path()
+        to read the best story found so far.
+
+        'speculation_width' > 0 turns on speculative expansion: while an
+        iteration waits on its rollouts and scoring, the next child of up to
+        that many nodes likely to be selected next is generated in the
+        background and buffered on the node. A later expansion of that node
+        uses the buffered child instead of calling the LLM, taking expansion
+        latency off the critical path. Buffered children that are not used
+        stay on their node for later iterations, until the node gets a child
+        some other way (the buffered text did not know that sibling) or is
+        fully expanded; at most SPECULATIVE_BUFFER_PER_WORKER per worker are
+        kept, oldest dropped first.
+
+        If 'on_iteration' is given, it is called with each iteration event
+        (see iter_mcts).
+
+        Returns a summary of what the search consumed:
+        iterations_completed, stop_reason, elapsed_seconds, llm_calls,
+        prompt_tokens, completion_tokens, total_tokens, cost_usd and
+        llm_calls_saved (by the local pre-filter, if enabled).
         """
-        for i in range(iterations):
-            self.logger.info("=== MCTS Iteration %d/%d ===", i+1, iterations)
-            
-            # 1) Selection
-            path = self._select_path(root_id, max_children)
-            leaf = path[-1]
-            path_texts = [self.G.nodes[n]["text"] for n in path]
+        events = self.iter_mcts(
+            root_id=root_id,
+            max_children=max_children,
+            scoring_prompt=scoring_prompt,
+            iterations=iterations,
+            scoring_depth=scoring_depth,
+            rollout_depth=rollout_depth,
+            desired_chain_length=desired_chain_length,
+            min_num_chains=min_num_chains,
+            max_seconds=max_seconds,
+            max_tokens=max_tokens,
+            max_cost_usd=max_cost_usd,
+            speculation_width=speculation_width
+        )
+        while True:
+            try:
+                event = next(events)
+            except StopIteration as stop:
+                return stop.value
+            if on_iteration is not None:
+                on_iteration(event)
+
+    def iter_mcts(self,
+                  root_id: int,
+                  max_children: int,
+                  scoring_prompt: str,
+                  iterations: int = 10,
+                  scoring_depth: int = 1,
+                  rollout_depth: int = 2,
+                  desired_chain_length: int = None,
+                  min_num_chains: int = None,
+                  max_seconds: float = None,
+                  max_tokens: int = None,
+                  max_cost_usd: float = None,
+                  speculation_width: int = 0):
+        """
+        Generator version of run_mcts (same arguments). Yields one compact
+        dict per completed iteration:
+          - iteration: 1-based iteration number
+          - path: node ids selected (root -> leaf)
+          - node_id / node_text: the node that was expanded and simulated
+          - expanded: False if the leaf was already fully expanded
+          - score: simulation score
+          - backprop: [(node_id, visits, mean_score), ...] after the update;
+            each node on 'path' gained one visit and 'score' total score
+          - elapsed_seconds: time spent in this iteration
+          - total_elapsed_seconds: time since the search started
+
+        The run summary (see run_mcts) is the generator's return value.
+        Closing the generator early stops the search.
+        """
+        run_state = self._start_run(max_seconds, max_tokens, max_cost_usd)
+        stop_reason = "iterations"
+        completed = 0
+        if speculation_width > 0:
+            self._speculator = ThreadPoolExecutor(max_workers=speculation_width)
+            self._speculation_width = speculation_width
+        try:
+            for i in range(iterations):
+                self._check_budget()
+                self.logger.info("=== MCTS Iteration %d/%d ===", i+1, iterations)
+                iteration_start = time.monotonic()
+
+                # Selection, expansion, simulation and backprop
+                path, expanded_node, score = self._run_steps(
+                    self._iteration_steps(root_id, max_children, scoring_prompt, scoring_depth, rollout_depth)
+                )
+                completed += 1
+
+                yield self._iteration_event(i + 1, path, expanded_node, score, iteration_start, run_state)
+
+                # (Optional) Early stopping if enough chains of desired length
+                if self._early_stop_reached(root_id, desired_chain_length, min_num_chains):
+                    stop_reason = "early_stop"
+                    break
+        except BudgetExhausted as e:
+            stop_reason = e.reason
+            self.logger.info("Budget exhausted (%s) after %d iteration(s).", e.reason, completed)
+        finally:
+            self._budget = None
+            if self._speculator is not None:
+                self._stop_speculation()
+
+        return self._finish_run(run_state, completed, stop_reason)
+
+    def _start_run(self, max_seconds: float, max_tokens: int, max_cost_usd: float) -> dict:
+        """
+        Activates the search budget and snapshots the counters that the run
+        summary is computed against.
+        """
+        start_usage = self.usage.snapshot()
+        self._budget = {
+            "deadline": time.monotonic() + max_seconds if max_seconds is not None else None,
+            "max_tokens": max_tokens,
+            "max_cost_usd": max_cost_usd,
+            "start_tokens": start_usage["prompt_tokens"] + start_usage["completion_tokens"],
+            "start_cost_usd": start_usage["cost_usd"]
+        }
+        return {
+            "start_usage": start_usage,
+            "start_time": time.monotonic(),
+            "start_saved": self.prefilter_stats["llm_calls_saved"]
+        }
+
+    def _finish_run(self, run_state: dict, completed: int, stop_reason: str) -> dict:
+        summary = self._budget_summary(run_state["start_usage"], run_state["start_time"], completed, stop_reason)
+        summary["llm_calls_saved"] = self.prefilter_stats["llm_calls_saved"] - run_state["start_saved"]
+        return summary
+
+    def _iteration_event(self, iteration: int, path: list, expanded_node: int, score: float, iteration_start: float, run_state: dict) -> dict:
+        now = time.monotonic()
+        return {
+            "iteration": iteration,
+            "path": path,
+            "node_id": expanded_node,
+            "node_text": self.get_text(expanded_node),
+            "expanded": expanded_node != path[-1],
+            "score": score,
+            "backprop": [
+                (
+                    n,
+                    self.G.nodes[n]["mcts_visits"],
+                    self.G.nodes[n]["mcts_total_score"] / self.G.nodes[n]["mcts_visits"]
+                )
+                for n in path
+            ],
+            "elapsed_seconds": now - iteration_start,
+            "total_elapsed_seconds": now - run_state["start_time"]
+        }
+
+    def _early_stop_reached(self, root_id: int, desired_chain_length: int, min_num_chains: int) -> bool:
+        if desired_chain_length is None or min_num_chains is None:
+            return False
+        # Count how many root->leaf paths match the desired length
+        with self._phase("early_stop"):
+            matching_chains_count = self._count_paths_of_length(root_id, desired_chain_length)
+        if matching_chains_count >= min_num_chains:
             self.logger.info(
-                "Selected path (root -> leaf): %s",
-                " -> ".join(path_texts)
+                "Early stopping: found %d path(s) of length %d, meets/exceeds min_num_chains=%d.",
+                matching_chains_count,
+                desired_chain_length,
+                min_num_chains
             )
+            return True
+        return False
 
+    def _run_steps(self, steps):
+        """
+        Drives an MCTS step generator synchronously: performs each LLMRequest
+        it yields (checking the budget first) and returns its final value.
+        """
+        try:
+            request = next(steps)
+            while True:
+                self._check_budget()
+                with self._phase(request.phase):
+                    text = self._call_llm(
+                        request.kind,
+                        request.prompt,
+                        model=request.model,
+                        temperature=request.temperature,
+                        **request.kwargs
+                    )
+                request = steps.send(text)
+        except StopIteration as stop:
+            return stop.value
+        except BaseException:
+            # Let the generator undo its in-flight bookkeeping
+            steps.close()
+            raise
+
+    def _iteration_steps(self, root_id: int, max_children: int, scoring_prompt: str, scoring_depth: int, rollout_depth: int):
+        """
+        One MCTS iteration (selection, expansion, simulation, backprop) as a
+        generator that yields LLMRequests and receives their response texts.
+        Returns (path, expanded_node, score).
+
+        While the iteration is in flight its path carries a virtual loss, so
+        concurrent iterations on the same tree (see forest.py) spread out.
+        """
+        # 1) Selection
+        with self._phase("selection"):
+            path = self._select_path(root_id, max_children)
+        path_texts = [self.get_text(n) for n in path]
+        self.logger.info(
+            "Selected path (root -> leaf): %s",
+            " -> ".join(path_texts)
+        )
+
+        self._add_virtual_visits(path, 1)
+        try:
             # 2) Expansion
-            expanded_node = self._maybe_expand(leaf, max_children)
+            expanded_node = yield from self._expand_steps(path[-1], max_children)
+
+            # Overlap the next likely expansion with this iteration's simulation
+            if self._speculator is not None:
+                self._speculate(path, max_children)
 
             # 3) Simulation (with rollouts)
-            score = self._simulate(expanded_node, scoring_prompt, scoring_depth, rollout_depth)
+            score = yield from self._simulate_steps(expanded_node, scoring_prompt, scoring_depth, rollout_depth)
             self.logger.info("Simulation score for node %d: %s", expanded_node, score)
+        finally:
+            self._add_virtual_visits(path, -1)
 
-            # 4) Backpropagation
+        # 4) Backpropagation
+        with self._phase("backprop"):
             self._backpropagate(path, score)
+        return path, expanded_node, score
 
-            # 5) (Optional) Early stopping if enough chains of desired length
-            if desired_chain_length is not None and min_num_chains is not None:
-                # Count how many root->leaf paths match the desired length
-                matching_chains_count = self._count_paths_of_length(root_id, desired_chain_length)
-                if matching_chains_count >= min_num_chains:
-                    self.logger.info(
-                        "Early stopping: found %d path(s) of length %d, meets/exceeds min_num_chains=%d.",
-                        matching_chains_count,
-                        desired_chain_length,
-                        min_num_chains
-                    )
-                    break
+    def _add_virtual_visits(self, path: list, delta: int):
+        for n in path:
+            count = self._virtual_visits.get(n, 0) + delta
+            if count:
+                self._virtual_visits[n] = count
+            else:
+                del self._virtual_visits[n]
+
+    def _check_budget(self):
+        """
+        Raises BudgetExhausted if the active run_mcts budget has run out.
+        """
+        budget = self._budget
+        if budget is None:
+            return
+        if budget["deadline"] is not None and time.monotonic() >= budget["deadline"]:
+            raise BudgetExhausted("time")
+        if budget["max_tokens"] is not None:
+            if self.usage.total_tokens() - budget["start_tokens"] >= budget["max_tokens"]:
+                raise BudgetExhausted("tokens")
+        if budget["max_cost_usd"] is not None:
+            if self.usage.total_cost() - budget["start_cost_usd"] >= budget["max_cost_usd"]:
+                raise BudgetExhausted("cost")
+
+    def _budget_summary(self, start_usage: dict, start_time: float, completed: int, stop_reason: str) -> dict:
+        end_usage = self.usage.snapshot()
+        prompt_tokens = end_usage["prompt_tokens"] - start_usage["prompt_tokens"]
+        completion_tokens = end_usage["completion_tokens"] - start_usage["completion_tokens"]
+        return {
+            "iterations_completed": completed,
+            "stop_reason": stop_reason,
+            "elapsed_seconds": time.monotonic() - start_time,
+            "llm_calls": end_usage["calls"] - start_usage["calls"],
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cost_usd": end_usage["cost_usd"] - start_usage["cost_usd"]
+        }
 
     def _select_path(self, start_id: int, max_children: int):
         """
         Repeatedly descend using UCB1 while the node is fully expanded.
         If we encounter a node whose children < max_children, stop selection there.
+        Expansions still in flight count as children, and in-flight visits
+        count as visits scoring 0 (virtual loss).
         """
+        pending = self._pending_expansions
+        virtual = self._virtual_visits
         path = [start_id]
         current_id = start_id
         while True:
             children = self.get_children(current_id)
             # If not fully expanded, treat it as leaf and stop
-            if len(children) < max_children:
+            if len(children) + pending.get(current_id, 0) < max_children:
                 break
 
             best_child = None
             best_value = -float('inf')
-            parent_visits = self.G.nodes[current_id].get("mcts_visits", 1)
+            parent_visits = self.G.nodes[current_id].get("mcts_visits", 1) + virtual.get(current_id, 0)
             if parent_visits < 1:
                 parent_visits = 1
 
             for c in children:
-                c_visits = self.G.nodes[c].get("mcts_visits", 0)
+                c_visits = self.G.nodes[c].get("mcts_visits", 0) + virtual.get(c, 0)
                 c_total = self.G.nodes[c].get("mcts_total_score", 0.0)
                 avg = (c_total / c_visits) if c_visits > 0 else 0.0
 
@@ -346,43 +1097,181 @@ NARRATIVE EVENT:
         If leaf has fewer than max_children, add exactly ONE new child.
         Otherwise return the leaf as-is.
         """
+        return self._run_steps(self._expand_steps(leaf_id, max_children))
+
+    def _expand_steps(self, leaf_id: int, max_children: int):
+        """
+        Step-generator form of _maybe_expand. Returns the new child's id, or
+        the leaf if it is already fully expanded (counting in-flight expansions).
+        """
         children = self.get_children(leaf_id)
-        if len(children) >= max_children:
+        if len(children) + self._pending_expansions.get(leaf_id, 0) >= max_children:
+            self._discard_speculative_child(leaf_id)
             return leaf_id  # already fully expanded
 
-        leaf_data = self.G.nodes[leaf_id]
-        new_event = self.generate_next_event(
-            from_node=leaf_id,
-            include_entity_graph=False,
-            entities_description="",
-            user_prompt="",  # or any custom prompt
-            event_temperature=None
-        )
-        # Update prevGuessesForward to avoid repeats
-        leaf_data["prevGuessesForward"].append(new_event["text"])
+        new_event_text = self._take_speculative_child(leaf_id)
+        if new_event_text is not None:
+            # Count the speculative prompt now that its child is used. Any
+            # other new child of the node drops the buffer, so the context
+            # is the one it was generated from (and needs no summary call)
+            yield from self._context_steps(leaf_id)
+            return self._attach_child(leaf_id, new_event_text)
+
+        self._pending_expansions[leaf_id] = self._pending_expansions.get(leaf_id, 0) + 1
+        try:
+            chain_texts, prev_guesses = yield from self._context_steps(leaf_id)
+            new_event_text = yield self._next_event_request(
+                chain_texts,
+                prev_guesses,
+                phase="expansion_llm",
+                include_entity_graph=False,
+                entities_description="",
+                user_prompt="",  # or any custom prompt
+                event_temperature=None
+            )
+        finally:
+            self._pending_expansions[leaf_id] -= 1
+            if not self._pending_expansions[leaf_id]:
+                del self._pending_expansions[leaf_id]
+
+        return self._attach_child(leaf_id, new_event_text)
+
+    def _attach_child(self, leaf_id: int, new_event_text: str) -> int:
+        # A child buffered for this node was generated without knowing the
+        # new sibling, so it may repeat it
+        self._discard_speculative_child(leaf_id)
 
         # Create the new child node + edge
         child_id = self.add_event_node(
-            text=new_event["text"]
+            text=new_event_text
         )
+
+        # Update prevGuessesForward to avoid repeats (shares the child's text id)
+        self.G.nodes[leaf_id]["prevGuessesForward"].append(self.G.nodes[child_id]["text_id"])
         self.G.add_edge(leaf_id, child_id, label="leads to")
         return child_id
 
+    def _speculate(self, path: list, max_children: int):
+        """
+        Predicts which leaves the next selection is likely to stop at (under
+        an optimistic and a pessimistic outcome of the pending simulation on
+        'path') and starts generating a child for each in the background.
+        """
+        saved_totals = [(n, self.G.nodes[n]["mcts_total_score"]) for n in path]
+        candidates = []
+        # The in-flight virtual visit on 'path' stands in for the real one
+        for guessed_score in (10.0, 1.0):
+            for n, total in saved_totals:
+                self.G.nodes[n]["mcts_total_score"] = total + guessed_score
+            leaf_id = self._select_path(path[0], max_children)[-1]
+            for n, total in saved_totals:
+                self.G.nodes[n]["mcts_total_score"] = total
+            if leaf_id not in candidates:
+                candidates.append(leaf_id)
+
+        for leaf_id in candidates[:self._speculation_width]:
+            if leaf_id in self._speculative_children:
+                continue
+            if len(self.get_children(leaf_id)) + self._pending_expansions.get(leaf_id, 0) >= max_children:
+                continue
+            while len(self._speculative_children) >= self.SPECULATIVE_BUFFER_PER_WORKER * self._speculation_width:
+                self._discard_speculative_child(next(iter(self._speculative_children)))
+            try:
+                self._check_budget()
+            except BudgetExhausted:
+                return
+            # Only speculate when no summary call is needed first
+            context = self._cached_context(leaf_id)
+            if context is None:
+                continue
+            request = self._next_event_request(
+                context[0],
+                context[1],
+                phase="speculative_expansion"
+            )
+            self._speculative_children[leaf_id] = self._speculator.submit(
+                self._call_llm,
+                request.kind,
+                request.prompt,
+                model=request.model,
+                temperature=request.temperature,
+                **request.kwargs
+            )
+            self.speculation_stats["launched"] += 1
+
+    def _take_speculative_child(self, leaf_id: int):
+        """
+        Pops the buffered child text for 'leaf_id', waiting for it if it is
+        still being generated. Returns None if there is none (or it failed).
+        """
+        buffered = self._speculative_children.pop(leaf_id, None)
+        if buffered is None:
+            return None
+        if not isinstance(buffered, str):
+            try:
+                buffered = buffered.result()
+            except Exception as e:
+                self.logger.warning("Speculative expansion of node %d failed: %r", leaf_id, e)
+                return None
+        self.speculation_stats["used"] += 1
+        return buffered
+
+    def _discard_speculative_child(self, node_id: int):
+        """
+        Drops the buffered child of 'node_id', if any, cancelling its call
+        if it has not started yet.
+        """
+        buffered = self._speculative_children.pop(node_id, None)
+        if buffered is not None and not isinstance(buffered, str):
+            buffered.cancel()
+
+    def _stop_speculation(self):
+        """
+        Waits for outstanding speculative calls and keeps their texts
+        buffered for later runs.
+        """
+        self._speculator.shutdown(wait=True)
+        self._speculator = None
+        self._speculation_width = 0
+        for node_id, buffered in list(self._speculative_children.items()):
+            if isinstance(buffered, str):
+                continue
+            try:
+                self._speculative_children[node_id] = buffered.result()
+            except Exception:
+                # Includes calls cancelled by _discard_speculative_child
+                del self._speculative_children[node_id]
+
     def _simulate(self, node_id: int, scoring_prompt: str, scoring_depth: int, rollout_depth: int):
         """
         1) Gather up to 'scoring_depth' events from this node's chain (backwards) 
            as initial context.
         2) Perform 'rollout_depth' ephemeral expansions using the same 
-           'generate_next_event' logic but on a temporary node—so we don't 
+           'generate_next_event' prompt, but from plain texts—so we don't 
            modify the real graph.
         3) Combine for final scoring.
+
+        With 'prefilter_scoring' enabled, the new event and each rollout are
+        screened locally first; obviously bad candidates get a low score
+        without further rollouts or the LLM scoring call.
+        """
+        return self._run_steps(self._simulate_steps(node_id, scoring_prompt, scoring_depth, rollout_depth))
+
+    def _simulate_steps(self, node_id: int, scoring_prompt: str, scoring_depth: int, rollout_depth: int):
         """
+        Step-generator form of _simulate. Returns the simulation score.
+        """
+        if self.prefilter_scoring:
+            prescreen_score = self._prescreen_node(node_id, saved_calls=rollout_depth + 1)
+            if prescreen_score is not None:
+                return prescreen_score
+
         # Gather chainSoFar up to 'scoring_depth'
         chain_so_far = []
         current = node_id
         depth_count = 0
         while depth_count < scoring_depth and current is not None:
-            chain_so_far.append(self.G.nodes[current]["text"])
+            chain_so_far.append(self.get_text(current))
             parents = self.get_parents(current)
             if not parents:
                 break
@@ -393,40 +1282,80 @@ NARRATIVE EVENT:
         # We'll store ephemeral expansions in 'virtual_chain'
         virtual_chain = chain_so_far[:]
 
-        # For each rollout step, create a temporary node so we can call generate_next_event
-        for _ in range(rollout_depth):
+        # Each rollout step continues from the last event alone, with no
+        # previous guesses, and is never added to the graph
+        for rollout_step in range(1, rollout_depth + 1):
             if not virtual_chain:
                 break
             last_text = virtual_chain[-1]
-            # Create a temporary node with minimal data
-            temp_node_id = self.add_event_node(
-                text=last_text,
-                prevGuessesForward=[]
-            )
 
             # Generate next event
-            new_ev = self.generate_next_event(
-                from_node=temp_node_id,
+            new_text = yield self._next_event_request(
+                [last_text],
+                [],
+                phase="rollout_llm",
                 include_entity_graph=False,
                 entities_description="",
                 user_prompt="",  # no special user prompt for ephemeral
                 event_temperature=None
             )
 
-            # Remove the temporary node from the graph
-            self.G.remove_node(temp_node_id)
-
             # If we got a valid new text, append
-            if new_ev["text"].strip():
-                virtual_chain.append(new_ev["text"].strip())
+            if new_text.strip():
+                if self.prefilter_scoring:
+                    # Remaining rollouts plus the scoring call
+                    saved_calls = rollout_depth - rollout_step + 1
+                    prescreen_score = self._prescreen_text(new_text, virtual_chain[-3:], saved_calls)
+                    if prescreen_score is not None:
+                        return prescreen_score
+                virtual_chain.append(new_text.strip())
             else:
                 break
 
         # Combine into a single string for scoring
         combined_text = "\n".join(f"- {txt}" for txt in virtual_chain)
-        score = self.score_event_with_openai(combined_text, scoring_prompt)
+        llm_text = yield self._scoring_request(combined_text, scoring_prompt, phase="scoring_llm")
+        return self._parse_score(llm_text, combined_text)
+
+    def _prescreen_text(self, text: str, references: list, saved_calls: int):
+        """
+        Runs the local pre-filter on 'text'. Returns the low score to use
+        instead of the LLM critic, or None if the text should be scored.
+        """
+        self.prefilter_stats["checked"] += 1
+        score, reason = prescreen_event(text, references)
+        if score is None:
+            return None
+        self.prefilter_stats["rejected"] += 1
+        self.prefilter_stats["llm_calls_saved"] += saved_calls
+        self.prefilter_stats["reasons"][reason] += 1
+        self.logger.info("Pre-filter rejected event (%s), score %s:\n%s", reason, score, text)
         return score
 
+    def _prescreen_node(self, node_id: int, saved_calls: int):
+        """
+        Screens a tree node against its nearest ancestors and the siblings
+        generated before it (the parent's prevGuessesForward).
+        """
+        parents = self.get_parents(node_id)
+        sibling_ids = list(self.G.nodes[parents[0]]["prevGuessesForward"]) if parents else []
+        # The node's own text is one of its parent's guesses
+        own_text_id = self.G.nodes[node_id]["text_id"]
+        if own_text_id in sibling_ids:
+            sibling_ids.remove(own_text_id)
+
+        references = []
+        current = node_id
+        for _ in range(3):
+            parents = self.get_parents(current)
+            if not parents:
+                break
+            current = parents[0]
+            references.append(self.get_text(current))
+
+        references += self.text_store.get_many(sibling_ids)
+        return self._prescreen_text(self.get_text(node_id), references, saved_calls)
+
     def _backpropagate(self, path: list, score: float):
         """
         Add the final simulation score to all nodes in the path.
@@ -441,9 +1370,8 @@ NARRATIVE EVENT:
         """
         Counts how many unique root->leaf paths have exactly 'desired_length' nodes.
         """
-        all_paths = self.get_all_root_to_leaf_paths(root_id)
         count = 0
-        for path in all_paths:
+        for path, _ in self.iter_scored_paths(root_id):
             if len(path) == desired_length:
                 count += 1
         return count
@@ -451,7 +1379,10 @@ NARRATIVE EVENT:
     def plot_graph(self, title="Event Graph"):
         """
         Draws the directed graph using Graphviz's left-to-right layout.
+        Only practical for small trees; use export_tree for large trees or
+        headless machines.
         """
+        import matplotlib.pyplot as plt
         try:
             from networkx.drawing.nx_agraph import graphviz_layout
         except ImportError:
@@ -477,7 +1408,7 @@ NARRATIVE EVENT:
             arrows=True
         )
 
-        node_labels = {n: self.G.nodes[n]["text"] for n in self.G.nodes()}
+        node_labels = {n: self.get_text(n) for n in self.G.nodes()}
         nx.draw_networkx_labels(self.G, pos, labels=node_labels, font_size=8)
 
         edge_labels = nx.get_edge_attributes(self.G, "label")
@@ -487,15 +1418,31 @@ NARRATIVE EVENT:
         plt.axis("off")
         plt.show()
 
+    def export_tree(self, root_id: int, path: str, fmt: str = None, max_label_chars: int = 60, max_depth: int = None, top_k: int = None) -> int:
+        """
+        Streams the tree to a DOT, GraphML or JSON Lines file (optionally .gz).
+        See tree_export.export_tree.
+        """
+        from tree_export import export_tree
+        return export_tree(
+            self,
+            root_id,
+            path,
+            fmt=fmt,
+            max_label_chars=max_label_chars,
+            max_depth=max_depth,
+            top_k=top_k
+        )
+
     def get_leaf_nodes(self):
         return [n for n in self.G.nodes if len(list(self.G.successors(n))) == 0]
 
     def get_all_root_to_leaf_paths(self, root_id):
-        leaf_nodes = self.get_leaf_nodes()
-        all_paths = []
-        for leaf in leaf_nodes:
-            for path in nx.all_simple_paths(self.G, source=root_id, target=leaf):
-                all_paths.append(path)
+        """
+        All root->leaf paths as lists of node ids, ordered by leaf id.
+        """
+        all_paths = [list(path) for path, _ in self.iter_scored_paths(root_id)]
+        all_paths.sort(key=lambda path: path[-1])
         return all_paths
 
     def compute_path_score(self, path):
@@ -509,33 +1456,76 @@ NARRATIVE EVENT:
                 scores.append(0.0)
         return sum(scores) / len(scores) if scores else 0.0
 
-    def export_mcts_paths_as_csv(self, root_id, csv_filename="mcts_paths.csv"):
-        all_paths = self.get_all_root_to_leaf_paths(root_id)
-        paths_with_scores = []
+    def _node_mean_score(self, node_id) -> float:
+        visits = self.G.nodes[node_id].get("mcts_visits", 0)
+        if visits > 0:
+            return self.G.nodes[node_id].get("mcts_total_score", 0.0) / visits
+        return 0.0
 
-        for path in all_paths:
-            path_score = self.compute_path_score(path)
-            path_text = " -> ".join(self.G.nodes[n]["text"] for n in path)
-            paths_with_scores.append((path, path_score, path_text))
+    def iter_scored_paths(self, root_id):
+        """
+        Depth-first generator over root->leaf paths yielding (path, path_score),
+        where path is a tuple of node ids and path_score equals
+        compute_path_score(path). Scores are accumulated along the way, so
+        nothing is held in memory beyond the current branch.
+
+        As nx.all_simple_paths (which this replaces), a root without
+        children yields no paths.
+        """
+        if not self.get_children(root_id):
+            return
+        stack = [(root_id, (root_id,), self._node_mean_score(root_id))]
+        while stack:
+            node_id, path, score_sum = stack.pop()
+            children = self.get_children(node_id)
+            if not children:
+                yield path, score_sum / len(path)
+                continue
+            for c in reversed(children):
+                stack.append((c, path + (c,), score_sum + self._node_mean_score(c)))
+
+    def export_mcts_paths_as_csv(self, root_id, csv_filename="mcts_paths.csv", top_n: int = None, compress: bool = None):
+        """
+        Writes root->leaf paths ranked by path score to a CSV file.
+
+        'top_n' keeps only the best N paths, selected with a bounded heap so
+        memory scales with N rather than with the number of paths. Event text
+        is only assembled for rows that are written. Ties keep the order of
+        get_all_root_to_leaf_paths (by leaf id).
 
-        paths_with_scores.sort(key=lambda x: x[1], reverse=True)
+        'compress' gzip-compresses the output; by default it is enabled when
+        'csv_filename' ends with ".gz".
+        """
+        # Rank by score (descending), then by leaf id to keep a stable order
+        ranked = ((-score, path[-1], path) for path, score in self.iter_scored_paths(root_id))
+        if top_n is not None:
+            ranked_paths = heapq.nsmallest(top_n, ranked)
+        else:
+            ranked_paths = sorted(ranked)
+
+        if compress is None:
+            compress = csv_filename.endswith(".gz")
+        if compress:
+            f = gzip.open(csv_filename, mode="wt", newline="", encoding="utf-8")
+        else:
+            f = open(csv_filename, mode="w", newline="", encoding="utf-8")
 
-        with open(csv_filename, mode="w", newline="", encoding="utf-8") as f:
+        with f:
             writer = csv.writer(f)
             writer.writerow(["Rank", "Path Score", "Path (Node IDs)", "Path (Event Text)"])
             rank = 1
-            for path, score, text in paths_with_scores:
+            for neg_score, _, path in ranked_paths:
                 writer.writerow([
                     rank,
-                    f"{score:.3f}",
+                    f"{-neg_score:.3f}",
                     " -> ".join(str(pid) for pid in path),
-                    text
+                    " -> ".join(self.get_text(n) for n in path)
                 ])
                 rank += 1
 
         self.logger.info(
             "Wrote %d paths to %s",
-            len(paths_with_scores),
+            len(ranked_paths),
             csv_filename
         )
     
@@ -543,7 +1533,7 @@ NARRATIVE EVENT:
         all_paths = self.get_all_root_to_leaf_paths(root_id)
         if not all_paths:
             # No children => top path is just the root
-            return [root_id], f"- {self.G.nodes[root_id]['text']}"
+            return [root_id], f"- {self.get_text(root_id)}"
 
         scored_paths = []
         for path in all_paths:
@@ -553,5 +1543,43 @@ NARRATIVE EVENT:
         scored_paths.sort(key=lambda x: x[1], reverse=True)
         top_path, top_score = scored_paths[0]
 
-        bullet_str = "\n".join(f"- {self.G.nodes[n]['text']}" for n in top_path)
+        bullet_str = "\n".join(f"- {self.get_text(n)}" for n in top_path)
         return top_path, bullet_str
+
+    def get_best_path(self, root_id: int):
+        """
+        Anytime accessor: greedily follows the visited child with the best
+        average score from 'root_id'. Cheap (no path enumeration), so it can
+        be called between iterations, from a callback or after a budget stop.
+        Returns (path, bullet_str) like get_top_path.
+
+        Backpropagation does not count the newly expanded node, so the
+        frontier has no visits yet. Where no child has been visited, the
+        path continues with the best-scoring path below the node, ranked as
+        in get_top_path.
+        """
+        path = [root_id]
+        current = root_id
+        while True:
+            best_child = None
+            best_key = None
+            for c in self.get_children(current):
+                c_visits = self.G.nodes[c].get("mcts_visits", 0)
+                if c_visits == 0:
+                    continue
+                key = (self.G.nodes[c].get("mcts_total_score", 0.0) / c_visits, c_visits)
+                if best_key is None or key > best_key:
+                    best_key = key
+                    best_child = c
+            if best_child is None:
+                # Ties go to the lowest leaf id, as in get_top_path
+                ranked = ((-score, tail[-1], tail) for tail, score in self.iter_scored_paths(current))
+                best = min(ranked, default=None)
+                if best is not None:
+                    path.extend(best[2][1:])
+                break
+            path.append(best_child)
+            current = best_child
+
+        bullet_str = "\n".join(f"- {self.get_text(n)}" for n in path)
+        return path, bullet_str
@@ -0,0 +1,311 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from eventgraph import EventGraph, BudgetExhausted
+from text_store import TextStore
+
+class _TreeRun:
+    """
+    Scheduler-side state of one tree in the forest.
+    """
+
+    def __init__(self, index: int, eg: EventGraph, root_id: int, settings: dict):
+        self.index = index
+        self.eg = eg
+        self.root_id = root_id
+        self.settings = settings
+        self.run_state = None
+        self.started = 0
+        self.completed = 0
+        self.in_flight = 0
+        self.stopped = False
+        self.stop_reason = "iterations"
+        self.errors = []
+
+class _TimedSteps:
+    """
+    Wraps a step generator and remembers when the iteration started.
+    """
+    __slots__ = ("_steps", "started_at")
+
+    def __init__(self, steps):
+        self._steps = steps
+        self.started_at = time.monotonic()
+
+    def __next__(self):
+        return next(self._steps)
+
+    def send(self, value):
+        return self._steps.send(value)
+
+    def close(self):
+        self._steps.close()
+
+class MCTSForest:
+    """
+    Advances MCTS on many trees inside one scheduler.
+
+    Each MCTS iteration is a step generator (EventGraph._iteration_steps)
+    that yields the LLM requests it needs. The scheduler keeps up to
+    'max_in_flight_per_tree' iterations running per tree (spread apart by
+    virtual loss) and sends every ready request, from any tree, to one pooled
+    dispatcher of 'max_concurrent_requests' workers. While one tree waits on
+    the network the others keep going, so the request pool stays full even
+    with only a handful of trees.
+
+    All graph mutations happen on the thread calling run(); worker threads
+    only perform LLM calls. Use one EventGraph per tree.
+    """
+
+    def __init__(self, max_concurrent_requests: int = 16, max_in_flight_per_tree: int = 4, on_iteration=None, executor=None):
+        """
+        'on_iteration' is called as on_iteration(tree_index, event) after each
+        completed iteration (event as in EventGraph.iter_mcts).
+        'executor' may be an existing executor to dispatch requests on.
+        """
+        self.max_concurrent_requests = max_concurrent_requests
+        self.max_in_flight_per_tree = max_in_flight_per_tree
+        self.on_iteration = on_iteration
+        self.executor = executor
+        self.trees = []
+        self.stats = {}
+
+    def add_tree(
+        self,
+        eg: EventGraph,
+        root_id: int,
+        max_children: int,
+        scoring_prompt: str = "",
+        iterations: int = 10,
+        scoring_depth: int = 1,
+        rollout_depth: int = 2,
+        desired_chain_length: int = None,
+        min_num_chains: int = None,
+        max_seconds: float = None,
+        max_tokens: int = None,
+        max_cost_usd: float = None
+    ) -> int:
+        """
+        Registers a tree with the same settings run_mcts takes. Returns its index.
+        """
+        index = len(self.trees)
+        self.trees.append(_TreeRun(index, eg, root_id, {
+            "max_children": max_children,
+            "scoring_prompt": scoring_prompt,
+            "iterations": iterations,
+            "scoring_depth": scoring_depth,
+            "rollout_depth": rollout_depth,
+            "desired_chain_length": desired_chain_length,
+            "min_num_chains": min_num_chains,
+            "max_seconds": max_seconds,
+            "max_tokens": max_tokens,
+            "max_cost_usd": max_cost_usd
+        }))
+        return index
+
+    def _can_start(self, tree: _TreeRun) -> bool:
+        return (
+            not tree.stopped
+            and tree.started < tree.settings["iterations"]
+            and tree.in_flight < self.max_in_flight_per_tree
+        )
+
+    def _stop(self, tree: _TreeRun, reason: str):
+        if not tree.stopped:
+            tree.stopped = True
+            tree.stop_reason = reason
+
+    def _advance(self, tree: _TreeRun, steps, value, in_flight: dict):
+        """
+        Resumes an iteration with 'value' (None to start it) and either
+        submits its next request or finishes the iteration.
+        """
+        eg = tree.eg
+        try:
+            request = next(steps) if value is None else steps.send(value)
+        except StopIteration as stop:
+            tree.in_flight -= 1
+            tree.completed += 1
+            path, expanded_node, score = stop.value
+            if self.on_iteration is not None:
+                self.on_iteration(
+                    tree.index,
+                    eg._iteration_event(tree.completed, path, expanded_node, score, steps.started_at, tree.run_state)
+                )
+            s = tree.settings
+            if eg._early_stop_reached(tree.root_id, s["desired_chain_length"], s["min_num_chains"]):
+                self._stop(tree, "early_stop")
+            return
+        except Exception as e:
+            tree.in_flight -= 1
+            tree.errors.append(repr(e))
+            return
+
+        try:
+            eg._check_budget()
+        except BudgetExhausted as e:
+            self._stop(tree, e.reason)
+            steps.close()
+            tree.in_flight -= 1
+            return
+
+        future = self.executor.submit(
+            eg._call_llm,
+            request.kind,
+            request.prompt,
+            model=request.model,
+            temperature=request.temperature,
+            **request.kwargs
+        )
+        in_flight[future] = (tree, steps)
+
+    def _start_iteration(self, tree: _TreeRun, in_flight: dict):
+        s = tree.settings
+        try:
+            tree.eg._check_budget()
+        except BudgetExhausted as e:
+            self._stop(tree, e.reason)
+            return
+        steps = _TimedSteps(tree.eg._iteration_steps(
+            tree.root_id,
+            s["max_children"],
+            s["scoring_prompt"],
+            s["scoring_depth"],
+            s["rollout_depth"]
+        ))
+        tree.started += 1
+        tree.in_flight += 1
+        self._advance(tree, steps, None, in_flight)
+
+    def run(self) -> list:
+        """
+        Runs all registered trees to completion. Returns one run summary per
+        tree (as returned by run_mcts, plus "errors"). Scheduler statistics
+        are left in self.stats.
+        """
+        own_executor = self.executor is None
+        if own_executor:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrent_requests)
+
+        start = time.monotonic()
+        in_flight = {}
+        requests = 0
+        peak_in_flight = 0
+        in_flight_samples = 0
+        in_flight_total = 0
+        for tree in self.trees:
+            s = tree.settings
+            tree.run_state = tree.eg._start_run(s["max_seconds"], s["max_tokens"], s["max_cost_usd"])
+
+        # Tree to offer the next free slot to
+        cursor = 0
+        try:
+            while True:
+                # Fill the request pool round-robin across trees, continuing
+                # after the tree that started last so no tree is starved
+                progressed = True
+                while progressed and len(in_flight) < self.max_concurrent_requests:
+                    progressed = False
+                    for offset in range(len(self.trees)):
+                        if len(in_flight) >= self.max_concurrent_requests:
+                            break
+                        tree = self.trees[(cursor + offset) % len(self.trees)]
+                        if self._can_start(tree):
+                            before = len(in_flight)
+                            self._start_iteration(tree, in_flight)
+                            requests += len(in_flight) - before
+                            progressed = True
+                            cursor = tree.index + 1
+
+                if not in_flight:
+                    break
+
+                peak_in_flight = max(peak_in_flight, len(in_flight))
+                in_flight_samples += 1
+                in_flight_total += len(in_flight)
+
+                done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+                for future in done:
+                    tree, steps = in_flight.pop(future)
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        tree.errors.append(repr(e))
+                        steps.close()
+                        tree.in_flight -= 1
+                        continue
+                    before = len(in_flight)
+                    self._advance(tree, steps, text, in_flight)
+                    requests += len(in_flight) - before
+        finally:
+            for _, steps in in_flight.values():
+                steps.close()
+            if own_executor:
+                self.executor.shutdown(wait=True)
+                self.executor = None
+
+        summaries = []
+        for tree in self.trees:
+            tree.eg._budget = None
+            summary = tree.eg._finish_run(tree.run_state, tree.completed, tree.stop_reason)
+            summary["errors"] = tree.errors
+            summaries.append(summary)
+
+        self.stats = {
+            "trees": len(self.trees),
+            "wall_seconds": time.monotonic() - start,
+            "requests": requests,
+            "peak_in_flight": peak_in_flight,
+            "mean_in_flight": in_flight_total / in_flight_samples if in_flight_samples else 0.0
+        }
+        return summaries
+
+def run_stub_forest(
+    stubs: list,
+    max_children: int,
+    iterations: int,
+    scoring_depth: int = 1,
+    desired_chain_length: int = None,
+    min_num_chains: int = None,
+    model: str = "gpt-4o",
+    temperature_generate_next: float = 1.0,
+    max_concurrent_requests: int = 16,
+    max_in_flight_per_tree: int = 4
+) -> list:
+    """
+    Convenience wrapper: one MCTS tree per stub, all sharing a TextStore and
+    one request pool. Returns [(eg, root_id, summary), ...] in stub order.
+    """
+    text_store = TextStore()
+    forest = MCTSForest(
+        max_concurrent_requests=max_concurrent_requests,
+        max_in_flight_per_tree=max_in_flight_per_tree
+    )
+    graphs = []
+    for stub_text in stubs:
+        eg = EventGraph(
+            model_generate_next=model,
+            temperature_generate_next=temperature_generate_next,
+            model_scoring=model,
+            temperature_scoring=0.3,
+            logging_level=None,
+            text_store=text_store
+        )
+        root_id = eg.add_event_node(text=stub_text)
+        forest.add_tree(
+            eg,
+            root_id,
+            max_children=max_children,
+            scoring_prompt="",
+            iterations=iterations,
+            scoring_depth=scoring_depth,
+            desired_chain_length=desired_chain_length,
+            min_num_chains=min_num_chains
+        )
+        graphs.append((eg, root_id))
+
+    summaries = forest.run()
+    print(
+        f"[INFO] Forest of {len(graphs)} trees done in {forest.stats['wall_seconds']:.2f}s, "
+        f"{forest.stats['requests']} requests, mean in flight {forest.stats['mean_in_flight']:.1f}"
+    )
+    return [(eg, root_id, summary) for (eg, root_id), summary in zip(graphs, summaries)]
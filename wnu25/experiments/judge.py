@@ -1,6 +1,17 @@
+import hashlib
 import json
+import math
 import re
-from llm_util import call_openai
+import threading
+import unicodedata
+from concurrent.futures import Future
+from llm_util import call_openai_with_usage, UsageMeter
+from result_store import ResultStore
+from stats_util import t95
+
+# Bump whenever the judge prompt or schema changes, so cached judgements
+# made with the old prompt are not reused (see JudgeCache)
+JUDGE_PROMPT_VERSION = "1"
 
 LLM_JUDGE_SCHEMA = {
     "name": "NarrativeJudge",
@@ -68,15 +79,30 @@ def judge_narrative(
     narrative_text: str,
     model: str = "gpt-4o",
     temperature: float = None,
-    responseFormat: dict = None
+    responseFormat: dict = None,
+    meter: UsageMeter = None
 ) -> dict:
     """
     Calls an LLM to rate the narrative on 7 categories (each 1..10),
     then provides a short paragraph of comments.
 
     If temperature is None, it is omitted from the request payload.
+    If a 'meter' is given, the call's token usage is recorded on it as "judge".
     On failure or parse errors, returns a fallback result.
     """
+    result, _ = _judge_narrative(narrative_text, model, temperature, responseFormat, meter)
+    return result
+
+def _judge_narrative(
+    narrative_text: str,
+    model: str,
+    temperature: float,
+    responseFormat: dict,
+    meter: UsageMeter
+) -> tuple:
+    """
+    judge_narrative returning (result, ok); ok is False for the fallback.
+    """
     if responseFormat is None:
         responseFormat = {
             "type": "json_schema",
@@ -146,15 +172,248 @@ No triple backticks, no additional text. Just raw JSON.
         call_params["temperature"] = temperature
 
     try:
-        llm_text = call_openai(**call_params)
+        llm_text, usage = call_openai_with_usage(**call_params)
+        if meter is not None:
+            meter.record("judge", model, usage)
     except Exception as e:
         print("Error calling OpenAI:", e)
         fallback_result["narrative_comments"] = "Error calling OpenAI"
-        return fallback_result
+        return fallback_result, False
     
     try:
         llm_json = json.loads(llm_text)
-        return llm_json
+        return llm_json, True
     except json.JSONDecodeError:
         fallback_result["narrative_comments"] = f"Could not parse JSON. Raw response:\n{llm_text}"
-        return fallback_result
+        return fallback_result, False
+
+class JudgeEnsemble:
+    """
+    Sequential multi-judge ensemble with early stopping.
+
+    'judges' is a list of judge_narrative settings ({"model": ...,
+    "temperature": ...}); they are asked one at a time, in order, up to
+    'max_judges' (cycling through the list). After at least 'min_judges'
+    valid judgements, the ensemble stops as soon as the 95% confidence
+    interval of the mean 7-category score (avg_score) has a half-width of
+    at most 'tolerance'. Narratives the judges agree on cost 'min_judges'
+    calls; only disputed ones get more.
+
+    The interval needs at least two judgements and is wide for few of them
+    (t = 12.7 with one degree of freedom), so 'min_judges' defaults to 3:
+    with two judges and tolerance 0.5 the scores would have to agree
+    within about 0.08 to stop, which almost never happens. With three, a
+    standard deviation up to about 0.2 is enough.
+
+    The result has the judge_narrative shape, with each category averaged
+    over the judges, plus an "ensemble" entry: number of judgements,
+    models asked, final half-width and whether it converged.
+    """
+
+    def __init__(
+        self,
+        judges: list = None,
+        min_judges: int = 3,
+        max_judges: int = None,
+        tolerance: float = 0.5
+    ):
+        if judges is None:
+            judges = [{"model": "o1"}, {"model": "gpt-4o", "temperature": 1.0}]
+        if not judges:
+            raise ValueError("JudgeEnsemble needs at least one judge")
+        if max_judges is None:
+            max_judges = max(3 * len(judges), min_judges)
+        if not 1 <= min_judges <= max_judges:
+            raise ValueError(f"JudgeEnsemble needs 1 <= min_judges <= max_judges, got {min_judges} and {max_judges}")
+        self.judges = judges
+        self.min_judges = min_judges
+        self.max_judges = max_judges
+        self.tolerance = tolerance
+
+    @property
+    def label(self) -> str:
+        """
+        Identifies the ensemble settings, e.g. in JudgeCache keys.
+        """
+        models = ",".join(
+            j["model"] + (f"@{j['temperature']}" if j.get("temperature") is not None else "")
+            for j in self.judges
+        )
+        return f"ensemble({models};min={self.min_judges};max={self.max_judges};tol={self.tolerance})"
+
+    def judge(self, narrative_text: str, meter: UsageMeter = None) -> tuple:
+        """
+        Runs the ensemble on one narrative. Returns (result, ok); ok is
+        False if no judge produced a valid judgement.
+        """
+        judgements = []
+        comments = []
+        models = []
+        half_width = float("inf")
+        for i in range(self.max_judges):
+            settings = self.judges[i % len(self.judges)]
+            models.append(settings["model"])
+            result, ok = _judge_narrative(
+                narrative_text,
+                settings["model"],
+                settings.get("temperature"),
+                None,
+                meter
+            )
+            if not ok:
+                continue
+            judgements.append(result["judgement"])
+            comments.append(result["narrative_comments"])
+
+            k = len(judgements)
+            if k < max(self.min_judges, 2):
+                continue
+            scores = [sum(j.values()) / len(j) for j in judgements]
+            mean = sum(scores) / k
+            std = math.sqrt(sum((x - mean) ** 2 for x in scores) / (k - 1))
+            half_width = t95(k - 1) * std / math.sqrt(k)
+            if half_width <= self.tolerance:
+                break
+
+        if not judgements:
+            return result, False
+        categories = judgements[0].keys()
+        return {
+            "judgement": {c: sum(j[c] for j in judgements) / len(judgements) for c in categories},
+            "narrative_comments": comments[0],
+            "ensemble": {
+                "judgements": len(judgements),
+                "calls": len(models),
+                "models": models,
+                "half_width": half_width if math.isfinite(half_width) else None,
+                "converged": half_width <= self.tolerance
+            }
+        }, True
+
+def judge_narrative_ensemble(narrative_text: str, ensemble: JudgeEnsemble = None, meter: UsageMeter = None) -> dict:
+    """
+    judge_narrative with a JudgeEnsemble (default settings if None).
+    On failure of every judge, returns a fallback result.
+    """
+    if ensemble is None:
+        ensemble = JudgeEnsemble()
+    result, _ = ensemble.judge(narrative_text, meter)
+    return result
+
+def normalize_narrative(narrative_text: str) -> str:
+    """
+    Canonical form of a narrative for cache keys: Unicode NFC, whitespace
+    runs collapsed to one space, blank lines dropped.
+    """
+    text = unicodedata.normalize("NFC", narrative_text)
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+def narrative_hash(narrative_text: str) -> str:
+    return hashlib.sha256(normalize_narrative(narrative_text).encode("utf-8")).hexdigest()
+
+class JudgeCache:
+    """
+    Memoizes judge_narrative by (model, normalized narrative hash,
+    JUDGE_PROMPT_VERSION).
+
+    With a 'path' the judgements are kept in a ResultStore (JSON Lines), so
+    they survive crashes and are reused by later runs; without one the
+    cache lives for this process only. Identical narratives requested
+    concurrently are judged once: submit() hands later callers the Future
+    of the call already in flight instead of blocking them (TaskScheduler
+    tasks can return it as is). Fallback results (API or parse errors) are
+    not cached.
+
+    stats counts "hits" (already judged), "deduplicated" (joined an
+    identical call in flight), "judged" (narratives sent to the judge) and
+    "llm_calls" (judge calls made for them; an ensemble makes several per
+    narrative).
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._store = ResultStore(path) if path is not None else None
+        self._memory = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "deduplicated": 0, "judged": 0, "llm_calls": 0}
+
+    def key(self, narrative_text: str, model: str) -> tuple:
+        return (model, narrative_hash(narrative_text), JUDGE_PROMPT_VERSION)
+
+    def _lookup(self, key: tuple):
+        # Caller holds the lock
+        if key in self._memory:
+            return self._memory[key]
+        if self._store is not None:
+            return self._store.get(key)
+        return None
+
+    def submit(self, narrative_text: str, model: str = "gpt-4o", meter: UsageMeter = None, ensemble: JudgeEnsemble = None) -> Future:
+        """
+        judge_narrative(narrative_text, model, meter=meter) through the
+        cache, or the 'ensemble' (keyed by its label instead of 'model').
+        Returns a Future of the result: already resolved for a hit or when
+        this call judged the narrative (in this thread), pending if an
+        identical narrative is being judged elsewhere. 'meter' only sees
+        calls made by this call.
+        """
+        key = self.key(narrative_text, ensemble.label if ensemble is not None else model)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self.stats["hits"] += 1
+                future = Future()
+                future.set_result(cached)
+                return future
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.stats["deduplicated"] += 1
+                return future
+            future = Future()
+            self._in_flight[key] = future
+            self.stats["judged"] += 1
+
+        calls = UsageMeter()
+        try:
+            if ensemble is not None:
+                result, ok = ensemble.judge(narrative_text, calls)
+            else:
+                result, ok = _judge_narrative(narrative_text, model, None, None, calls)
+        except BaseException as e:
+            with self._lock:
+                self.stats["llm_calls"] += calls.snapshot()["calls"]
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+        finally:
+            if meter is not None:
+                meter.merge(calls)
+        with self._lock:
+            self.stats["llm_calls"] += calls.snapshot()["calls"]
+            if ok:
+                self._memory[key] = result
+                if self._store is not None:
+                    self._store.append(key, result)
+            del self._in_flight[key]
+        future.set_result(result)
+        return future
+
+    def judge(self, narrative_text: str, model: str = "gpt-4o", meter: UsageMeter = None, ensemble: JudgeEnsemble = None) -> dict:
+        """
+        Blocking form of submit(): returns the result, waiting for an
+        identical call in flight if there is one.
+        """
+        return self.submit(narrative_text, model, meter, ensemble).result()
+
+    def summary(self) -> str:
+        total = self.stats["hits"] + self.stats["deduplicated"] + self.stats["judged"]
+        return (
+            f"{self.stats['hits']} hits, {self.stats['deduplicated']} deduplicated, "
+            f"{self.stats['judged']} judged with {self.stats['llm_calls']} LLM calls ({total} requests)"
+        )
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
@@ -1,75 +1,21 @@
 import os
 import csv
 import time
+import functools
 import numpy as np
-import nltk
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from eventgraph import EventGraph
-
-def ensure_nltk_resources():
-    required_resources = [
-        'punkt',           # Basic tokenizer
-        'punkt_tab',       # Tokenizer sub-resources
-        'averaged_perceptron_tagger',  # For POS tagging if needed
-        'stopwords'        # Common stopwords if needed for filtering
-    ]
-    
-    missing_resources = []
-    for resource in required_resources:
-        try:
-            # Check if the resource is already available
-            if resource == 'punkt_tab':
-                try:
-                    nltk.data.find(f'tokenizers/punkt_tab/english/')
-                except LookupError:
-                    missing_resources.append(resource)
-            else:
-                nltk.data.find(f'tokenizers/{resource}' if resource == 'punkt' else resource)
-        except LookupError:
-            missing_resources.append(resource)
-    
-    if not missing_resources:
-        print("[INFO] All required NLTK resources are already available.")
-        return
-    
-    # Download missing resources
-    print(f"[INFO] Downloading missing NLTK resources: {', '.join(missing_resources)}")
-    for resource in missing_resources:
-        print(f"[INFO] Downloading {resource}...")
-        if resource == 'punkt_tab':
-            # Special case for punkt_tab - we need to download punkt
-            nltk.download('punkt', quiet=False)
-        else:
-            nltk.download(resource, quiet=False)
-    
-    # After downloading, try to manually download punkt models to avoid punkt_tab issues
-    try:
-        # Force loading to ensure all sub-resources are available
-        tokenizer = nltk.data.load('tokenizers/punkt/english.pickle')
-        print("[INFO] Successfully loaded punkt models.")
-    except Exception as e:
-        print(f"[WARNING] Error loading punkt models: {e}")
-        print("[INFO] Attempting alternative download method...")
-        try:
-            # Alternative approach to ensure punkt_tab availability
-            nltk.download('all', quiet=False)
-            print("[INFO] Downloaded all NLTK resources to ensure availability.")
-        except Exception as e2:
-            print(f"[ERROR] Failed to download all resources: {e2}")
-            print("[INFO] Please manually run: python -m nltk.downloader all")
-            
-    print("[INFO] NLTK resources setup completed.")
-
-# Call this function at module initialization time
-ensure_nltk_resources()
+from task_scheduler import TaskScheduler
+from tokenization import ensure_nltk_resources, extract_raw_text, regex_word_tokenize, tokenize
+from ngram_engine import distinct_n_with_combined
+from narrative_similarity import cross_narrative_similarity
 
 def compute_ngram_diversity(text, n):
     # Ensure text is ASCII only
     text = ''.join(char for char in text if ord(char) < 128)
     
     # Tokenize the text
-    tokens = nltk.word_tokenize(text.lower())
+    tokens = tokenize(text.lower())
     
     # Filter out any tokens that might still contain non-ASCII characters
     tokens = [token for token in tokens if all(ord(char) < 128 for char in token)]
@@ -79,7 +25,7 @@ def compute_ngram_diversity(text, n):
         return 0.0
     
     # Generate n-grams
-    ngrams = list(nltk.ngrams(tokens, n))
+    ngrams = list(zip(*(tokens[i:] for i in range(n))))
     
     # Count unique n-grams
     unique_ngrams = set(ngrams)
@@ -89,20 +35,6 @@ def compute_ngram_diversity(text, n):
     
     return diversity
 
-def extract_raw_text(narrative):
-    # Split by lines and remove the bullet points/dashes
-    lines = narrative.split('\n')
-    cleaned_lines = [line[2:].strip() if line.startswith('- ') else line.strip() 
-                    for line in lines if line.strip()]
-    
-    # Join back into a single text
-    raw_text = ' '.join(cleaned_lines)
-    
-    # Filter out non-ASCII characters
-    ascii_text = ''.join(char for char in raw_text if ord(char) < 128)
-    
-    return ascii_text
-
 def generate_mcts_path(eg, stub_text, target_length, max_children, iterations, min_num_chains=1):
     root_id = eg.add_event_node(text=stub_text)
     
@@ -121,7 +53,15 @@ def generate_mcts_path(eg, stub_text, target_length, max_children, iterations, m
     _, top_path_text = eg.get_top_path(root_id)
     return top_path_text
 
-def generate_baseline_path(eg, stub_text, target_length, branching_factor=1):
+def generate_baseline_path(eg, stub_text, target_length, branching_factor=1, executor=None):
+    """
+    Baseline narrative: each step generates 'branching_factor' children of
+    the current node and continues from the first one. With an 'executor'
+    (one bounded pool shared by all runs) the children are generated
+    concurrently; they are attached in call order either way.
+    run_lexical_diversity_evaluation schedules the same steps as tasks
+    (see run_evaluation.add_multibranch_tasks).
+    """
     root_id = eg.add_event_node(text=stub_text)
     
     # Start at root node
@@ -135,8 +75,7 @@ def generate_baseline_path(eg, stub_text, target_length, branching_factor=1):
             
         # Generate multiple children (branching_factor determines how many)
         new_children_ids = []
-        for _ in range(branching_factor):
-            ev = eg.generate_next_event(from_node=current_node)
+        for ev in eg.generate_next_events(current_node, branching_factor, executor=executor):
             child_id = eg.add_event_node(ev["text"])
             eg.G.add_edge(current_node, child_id)
             new_children_ids.append(child_id)
@@ -146,58 +85,37 @@ def generate_baseline_path(eg, stub_text, target_length, branching_factor=1):
     
     # Get the final chain
     chain_ids = eg.gather_chain_in_chronological_order(current_node)
-    narrative_text = "\n".join("- " + eg.G.nodes[nid]["text"] for nid in chain_ids)
+    narrative_text = "\n".join("- " + eg.get_text(nid) for nid in chain_ids)
     
     return narrative_text
 
-def process_single_run(
-    run_idx,
-    stub_text,
-    target_length,
-    mcts_config,
-    baseline_config,
-    model,
-    temperature
-):
-    print(f"\n[INFO] Run {run_idx+1}")
-    
-    # Create event graphs for this run
-    eg_mcts = EventGraph(
+def _strategy_graph(model, temperature):
+    return EventGraph(
         model_generate_next=model,
         temperature_generate_next=temperature,
         model_scoring=model,
         temperature_scoring=0.3,
         logging_level=None
     )
-    
-    eg_baseline = EventGraph(
-        model_generate_next=model,
-        temperature_generate_next=temperature,
-        model_scoring=model,
-        temperature_scoring=0.3,
-        logging_level=None
-    )
-    
-    # Run MCTS strategy
-    print(f"[INFO] (Thread {run_idx+1}) Running MCTS strategy...")
-    mcts_narrative = generate_mcts_path(
-        eg=eg_mcts,
+
+def _run_mcts(run_idx, stub_text, target_length, mcts_config, model, temperature):
+    print(f"[INFO] (Run {run_idx+1}) Running MCTS strategy...")
+    return generate_mcts_path(
+        eg=_strategy_graph(model, temperature),
         stub_text=stub_text,
         target_length=target_length,
         max_children=mcts_config["max_children"],
         iterations=mcts_config["iterations"],
         min_num_chains=3
     )
-    
-    # Run baseline strategy
-    print(f"[INFO] (Thread {run_idx+1}) Running baseline strategy...")
-    baseline_narrative = generate_baseline_path(
-        eg=eg_baseline,
-        stub_text=stub_text,
-        target_length=target_length,
-        branching_factor=baseline_config["branching_factor"]
-    )
-    
+
+def _baseline_text(state):
+    eg = state["eg"]
+    chain_ids = eg.gather_chain_in_chronological_order(state["node"])
+    return "\n".join("- " + eg.get_text(nid) for nid in chain_ids)
+
+def _finish_run(run_idx, runs, mcts_narrative, baseline_narrative):
+    print(f"[INFO] Completed run {run_idx+1}/{runs}")
     return {
         "mcts_narrative": mcts_narrative,
         "baseline_narrative": baseline_narrative,
@@ -214,12 +132,14 @@ def run_lexical_diversity_evaluation(
     output_dir="results_lexical_diversity",
     model="gpt-4o",
     temperature=1.0,
-    max_workers=4
+    max_workers=4,
+    similarity_processes=None
 ):
     print(f"[INFO] Starting lexical diversity evaluation")
     print(f"[INFO] Stub index: {stub_index}, Runs: {runs}, Target length: {target_length}")
     print(f"[INFO] MCTS config: {mcts_config}")
     print(f"[INFO] Baseline config: {baseline_config}")
+    print(f"[INFO] Tokenizer: {'nltk.word_tokenize' if ensure_nltk_resources() else 'built-in regex'}")
     
     start_time = time.time()
     
@@ -239,52 +159,46 @@ def run_lexical_diversity_evaluation(
     stub_text = stubs[stub_index]
     print(f"[INFO] Selected stub: {stub_text[:60]}...")
     
-    # Store narratives for each strategy
+    # Every run is an MCTS task plus the baseline's steps as tasks (one per
+    # LLM call), all on one shared pool: 'max_workers' bounds the number of
+    # concurrent LLM calls
+    from run_evaluation import add_multibranch_tasks
+    print(f"[INFO] Running {runs} iterations in parallel with {max_workers} workers...")
+    scheduler = TaskScheduler(max_workers=max_workers)
+    branching_factor = baseline_config["branching_factor"]
+    for run_idx in range(runs):
+        mcts_key = scheduler.add_task(
+            ("run", run_idx, "mcts"),
+            functools.partial(_run_mcts, run_idx, stub_text, target_length, mcts_config, model, temperature),
+            cost=mcts_config["iterations"] * 2.0
+        )
+        last_key = add_multibranch_tasks(
+            scheduler,
+            ("run", run_idx, "baseline"),
+            functools.partial(_strategy_graph, model, temperature),
+            stub_text,
+            target_length,
+            branching_factor,
+            choose=lambda child_ids: child_ids[0]  # Always pick the first one for baseline
+        )
+        baseline_key = scheduler.add_task(("run", run_idx, "baseline", "text"), _baseline_text, deps=[last_key], cost=0.0)
+        scheduler.add_task(
+            ("run", run_idx, "done"),
+            functools.partial(_finish_run, run_idx, runs),
+            deps=[mcts_key, baseline_key],
+            cost=0.0
+        )
+    results = scheduler.run()
+
+    # Runs in order; a run with a failed task is left out
     mcts_narratives = []
     baseline_narratives = []
-    
-    # Run strategies N times in parallel
-    print(f"[INFO] Running {runs} iterations in parallel with {max_workers} workers...")
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all runs to the executor
-        futures = []
-        for run_idx in range(runs):
-            future = executor.submit(
-                process_single_run,
-                run_idx,
-                stub_text,
-                target_length,
-                mcts_config,
-                baseline_config,
-                model,
-                temperature
-            )
-            futures.append(future)
-        
-        # Collect results as they complete
-        for future in as_completed(futures):
-            try:
-                result = future.result()
-                run_idx = result["run_idx"]
-                mcts_narrative = result["mcts_narrative"]
-                baseline_narrative = result["baseline_narrative"]
-                
-                # Store results in order by run_idx
-                while len(mcts_narratives) <= run_idx:
-                    mcts_narratives.append(None)
-                    baseline_narratives.append(None)
-                
-                mcts_narratives[run_idx] = mcts_narrative
-                baseline_narratives[run_idx] = baseline_narrative
-                
-                print(f"[INFO] Completed run {run_idx+1}/{runs}")
-            except Exception as e:
-                print(f"[ERROR] A thread crashed: {repr(e)}")
-    
-    # Remove any None entries (in case a thread failed)
-    mcts_narratives = [n for n in mcts_narratives if n is not None]
-    baseline_narratives = [n for n in baseline_narratives if n is not None]
+    for run_idx in range(runs):
+        result = results.get(("run", run_idx, "done"))
+        if result is None:
+            continue
+        mcts_narratives.append(result["mcts_narrative"])
+        baseline_narratives.append(result["baseline_narrative"])
     
     if not mcts_narratives or not baseline_narratives:
         print("[ERROR] All threads failed. No results to analyze.")
@@ -297,10 +211,6 @@ def run_lexical_diversity_evaluation(
     mcts_raw_texts = [extract_raw_text(narrative) for narrative in mcts_narratives]
     baseline_raw_texts = [extract_raw_text(narrative) for narrative in baseline_narratives]
     
-    # All narratives combined for each strategy (for overall diversity)
-    mcts_combined = " ".join(mcts_raw_texts)
-    baseline_combined = " ".join(baseline_raw_texts)
-    
     # Calculate diversity metrics for each n-gram size (1-4)
     diversity_results = []
     
@@ -313,18 +223,19 @@ def run_lexical_diversity_evaluation(
     if actual_runs < runs:
         print(f"[WARNING] Only {actual_runs} out of {runs} runs completed successfully.")
     
+    # Same values as compute_ngram_diversity, but each text is tokenized once
+    # for all n (see ngram_engine)
+    mcts_by_run, mcts_combined_by_n = distinct_n_with_combined(mcts_raw_texts, max_n=4)
+    baseline_by_run, baseline_combined_by_n = distinct_n_with_combined(baseline_raw_texts, max_n=4)
+    
     for n in range(1, 5):  # Unigrams, bigrams, trigrams, 4-grams
-        # Calculate for each individual run (only those that succeeded)
-        for i in range(actual_runs):
-            mcts_diversity = compute_ngram_diversity(mcts_raw_texts[i], n)
-            baseline_diversity = compute_ngram_diversity(baseline_raw_texts[i], n)
-            
-            mcts_diversity_by_run[n].append(mcts_diversity)
-            baseline_diversity_by_run[n].append(baseline_diversity)
+        # Diversity of each individual run (only those that succeeded)
+        mcts_diversity_by_run[n] = [float(d) for d in mcts_by_run[:actual_runs, n - 1]]
+        baseline_diversity_by_run[n] = [float(d) for d in baseline_by_run[:actual_runs, n - 1]]
         
-        # Calculate for all runs combined
-        mcts_combined_diversity = compute_ngram_diversity(mcts_combined, n)
-        baseline_combined_diversity = compute_ngram_diversity(baseline_combined, n)
+        # Diversity of all runs combined
+        mcts_combined_diversity = float(mcts_combined_by_n[n - 1])
+        baseline_combined_diversity = float(baseline_combined_by_n[n - 1])
         
         # Calculate average diversity across runs
         mcts_avg_diversity = np.mean(mcts_diversity_by_run[n])
@@ -373,7 +284,45 @@ def run_lexical_diversity_evaluation(
                 f"{result['difference_avg']:.4f}",
                 f"{result['difference_combined']:.4f}"
             ])
-    
+
+    # How alike the runs of each strategy are to each other
+    print("[INFO] Calculating cross-narrative similarity (Self-BLEU, pairwise overlap)...")
+    similarity = cross_narrative_similarity(
+        {"mcts": mcts_raw_texts[:actual_runs], "baseline": baseline_raw_texts[:actual_runs]},
+        max_n=4,
+        processes=similarity_processes
+    )
+    mcts_similarity = similarity["mcts"]
+    baseline_similarity = similarity["baseline"]
+    for n, result in enumerate(diversity_results, start=1):
+        result["mcts_self_bleu"] = float(mcts_similarity["self_bleu"][n - 1])
+        result["baseline_self_bleu"] = float(baseline_similarity["self_bleu"][n - 1])
+        result["mcts_pairwise_overlap"] = float(mcts_similarity["pairwise_overlap"][n - 1])
+        result["baseline_pairwise_overlap"] = float(baseline_similarity["pairwise_overlap"][n - 1])
+
+    similarity_file = os.path.join(output_dir, "cross_narrative_similarity.csv")
+    with open(similarity_file, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "n",
+            "MCTS Self-BLEU",
+            "Baseline Self-BLEU",
+            "MCTS Pairwise Overlap",
+            "Baseline Pairwise Overlap",
+            "Difference (Self-BLEU)",
+            "Difference (Overlap)"
+        ])
+        for result in diversity_results:
+            writer.writerow([
+                result["n"],
+                f"{result['mcts_self_bleu']:.4f}",
+                f"{result['baseline_self_bleu']:.4f}",
+                f"{result['mcts_pairwise_overlap']:.4f}",
+                f"{result['baseline_pairwise_overlap']:.4f}",
+                f"{result['mcts_self_bleu'] - result['baseline_self_bleu']:.4f}",
+                f"{result['mcts_pairwise_overlap'] - result['baseline_pairwise_overlap']:.4f}"
+            ])
+
     # Also save the raw narratives
     mcts_file = os.path.join(output_dir, "mcts_narratives.txt")
     with open(mcts_file, "w", encoding="utf-8") as f:
@@ -396,7 +345,8 @@ def run_lexical_diversity_evaluation(
         print(f"    MCTS avg: {result['mcts_avg_diversity']:.4f} (±{result['mcts_std_diversity']:.4f})")
         print(f"    Baseline avg: {result['baseline_avg_diversity']:.4f} (±{result['baseline_std_diversity']:.4f})")
         print(f"    Difference: {result['difference_avg']:.4f}")
-    
+        print(f"    Self-BLEU (MCTS / Baseline): {result['mcts_self_bleu']:.4f} / {result['baseline_self_bleu']:.4f}")
+
     elapsed = time.time() - start_time
     print(f"\n[INFO] Evaluation complete. Total time elapsed: {elapsed:.2f} seconds.")
     print(f"[INFO] Results saved to {output_dir}")
@@ -1,4 +1,5 @@
 import os
+import threading
 import requests
 from tenacity import (
     retry,
@@ -9,11 +10,29 @@ from tenacity import (
 
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
+# Replacement for the HTTP call, see set_llm_backend
+_llm_backend = None
+
+def set_llm_backend(backend):
+    """
+    Routes every LLM call through 'backend' instead of the OpenAI API, e.g.
+    a fake LLM for benchmarks. It is called as backend(prompt, model=...,
+    temperature=..., responseFormat=..., max_completion_tokens=...) and must
+    return (content, usage) like call_openai_with_usage; retriable errors it
+    raises are retried as usual. Pass None to restore the API.
+    Returns the previous backend.
+    """
+    global _llm_backend
+    previous = _llm_backend
+    _llm_backend = backend
+    return previous
+
 def is_retriable_error(exception):
     # Check if it's an HTTPError
     if isinstance(exception, requests.exceptions.HTTPError):
         # If it's 429 (rate limit) or a 5xx error, we retry
-        status = exception.response.status_code if exception.response else None
+        # (a Response is falsy for 4xx/5xx, so compare with None explicitly)
+        status = exception.response.status_code if exception.response is not None else None
         # If status is None, it means we didn't get a valid response
         if status is not None:
             if status == 429 or (status >= 500 and status < 600):
@@ -25,23 +44,114 @@ def is_retriable_error(exception):
         return True
     return False
 
+# USD per 1M tokens as (prompt, completion). Used only for cost estimates.
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4": (30.00, 60.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "o1": (15.00, 60.00),
+    "o1-mini": (3.00, 12.00),
+}
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Estimated dollar cost of a call, using MODEL_PRICES.
+    Unknown models are priced at 0.
+    """
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+class UsageMeter:
+    """
+    Thread-safe running totals of LLM calls, tokens and estimated cost,
+    broken down by a free-form 'kind' (e.g. "generate", "score", "judge").
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_kind = {}
+
+    def record(self, kind: str, model: str, usage: dict):
+        prompt_tokens = usage.get("prompt_tokens", 0) or 0
+        completion_tokens = usage.get("completion_tokens", 0) or 0
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            totals = self._by_kind.setdefault(kind, {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cost_usd": 0.0
+            })
+            totals["calls"] += 1
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost_usd"] += cost
+
+    def merge(self, other: "UsageMeter"):
+        """
+        Adds the totals of 'other' to this meter.
+        """
+        with other._lock:
+            other_by_kind = {k: dict(v) for k, v in other._by_kind.items()}
+        with self._lock:
+            for kind, other_totals in other_by_kind.items():
+                totals = self._by_kind.setdefault(kind, {
+                    "calls": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost_usd": 0.0
+                })
+                for key, value in other_totals.items():
+                    totals[key] += value
+
+    def total_tokens(self) -> int:
+        with self._lock:
+            return sum(t["prompt_tokens"] + t["completion_tokens"] for t in self._by_kind.values())
+
+    def total_cost(self) -> float:
+        with self._lock:
+            return sum(t["cost_usd"] for t in self._by_kind.values())
+
+    def snapshot(self) -> dict:
+        """
+        Returns {"calls", "prompt_tokens", "completion_tokens", "cost_usd", "by_kind": {...}}.
+        """
+        with self._lock:
+            by_kind = {k: dict(v) for k, v in self._by_kind.items()}
+        summary = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+        for totals in by_kind.values():
+            for key in summary:
+                summary[key] += totals[key]
+        summary["by_kind"] = by_kind
+        return summary
+
 @retry(
     retry=retry_if_exception(is_retriable_error),
     wait=wait_random_exponential(min=1, max=60),
     stop=stop_after_attempt(30),
     reraise=True
 )
-def call_openai(
+def call_openai_with_usage(
     prompt: str,
     model: str = "gpt-4o",
     temperature: float = None,
     responseFormat: dict = None,
     max_completion_tokens: int = None
-) -> str:
+) -> tuple:
     """
-    Calls the OpenAI ChatCompletion endpoint and returns the content of the first message choice.
-    Retries on 429 (rate limit) or connection errors (DNS fail, etc.) up to 6 attempts.
+    Same as call_openai, but returns (content, usage) where usage is the
+    response's "usage" dict (prompt_tokens, completion_tokens, total_tokens).
     """
+    if _llm_backend is not None:
+        return _llm_backend(
+            prompt,
+            model=model,
+            temperature=temperature,
+            responseFormat=responseFormat,
+            max_completion_tokens=max_completion_tokens
+        )
+
     url = "https://api.openai.com/v1/chat/completions"
     headers = {
         "Content-Type": "application/json",
@@ -62,4 +172,25 @@ def call_openai(
     # Increase timeout to handle slow responses
     response = requests.post(url, headers=headers, json=data, timeout=300)
     response.raise_for_status()
-    return response.json()["choices"][0]["message"]["content"].strip()
+    body = response.json()
+    return body["choices"][0]["message"]["content"].strip(), body.get("usage", {})
+
+def call_openai(
+    prompt: str,
+    model: str = "gpt-4o",
+    temperature: float = None,
+    responseFormat: dict = None,
+    max_completion_tokens: int = None
+) -> str:
+    """
+    Calls the OpenAI ChatCompletion endpoint and returns the content of the first message choice.
+    Retries on 429 (rate limit) or connection errors (DNS fail, etc.) up to 6 attempts.
+    """
+    content, _ = call_openai_with_usage(
+        prompt,
+        model=model,
+        temperature=temperature,
+        responseFormat=responseFormat,
+        max_completion_tokens=max_completion_tokens
+    )
+    return content
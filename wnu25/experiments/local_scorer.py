@@ -0,0 +1,87 @@
+import re
+
+# Scores assigned without calling the LLM critic, on its 1..10 scale
+REJECT_SCORES = {
+    "empty": 1.0,
+    "too_short": 1.0,
+    "gibberish": 1.0,
+    "repetitive": 2.0,
+    "near_copy": 2.0,
+}
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+# Characters normally found in prose; anything else counts towards gibberish
+_PROSE_CHAR_RE = re.compile(r"[A-Za-z0-9\s.,;:!?'\"()\-–—’‘“”…]")
+
+def tokenize(text: str) -> list:
+    return _WORD_RE.findall(text.lower())
+
+def _ngrams(tokens: list, n: int) -> set:
+    return {tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)}
+
+def gibberish_ratio(text: str) -> float:
+    """
+    Fraction of non-whitespace characters that are not ordinary prose
+    characters (letters, digits, common punctuation).
+    """
+    stripped = "".join(text.split())
+    if not stripped:
+        return 0.0
+    prose = len(_PROSE_CHAR_RE.findall(stripped))
+    return 1.0 - prose / len(stripped)
+
+def repetition_ratio(tokens: list, n: int = 3) -> float:
+    """
+    Share of word n-grams that repeat an earlier n-gram in the same text
+    (0 = no repetition).
+    """
+    total = len(tokens) - n + 1
+    if total <= 0:
+        return 0.0
+    return 1.0 - len(_ngrams(tokens, n)) / total
+
+def lexical_overlap(tokens: list, other_tokens: list, n: int = 3) -> float:
+    """
+    Containment of this text's word n-grams in the other text's n-grams
+    (1.0 = every n-gram appears in the other text).
+    """
+    grams = _ngrams(tokens, n)
+    if not grams:
+        return 1.0 if tokens and tokens == other_tokens else 0.0
+    return len(grams & _ngrams(other_tokens, n)) / len(grams)
+
+def prescreen_event(
+    text: str,
+    references: list = (),
+    min_words: int = 4,
+    max_gibberish_ratio: float = 0.2,
+    max_repetition_ratio: float = 0.5,
+    max_overlap: float = 0.8
+):
+    """
+    Cheap first-stage check of a candidate event before it is sent to the
+    LLM critic. 'references' are texts the event must not copy (parent
+    events, previously generated siblings).
+
+    Returns (score, reason). score is None when the candidate looks
+    plausible and should be scored by the LLM; otherwise it is the low
+    score from REJECT_SCORES for 'reason'.
+    """
+    if not text or not text.strip():
+        return REJECT_SCORES["empty"], "empty"
+
+    tokens = tokenize(text)
+    if len(tokens) < min_words:
+        return REJECT_SCORES["too_short"], "too_short"
+
+    if gibberish_ratio(text) > max_gibberish_ratio:
+        return REJECT_SCORES["gibberish"], "gibberish"
+
+    if repetition_ratio(tokens) > max_repetition_ratio:
+        return REJECT_SCORES["repetitive"], "repetitive"
+
+    for ref in references:
+        if ref and lexical_overlap(tokens, tokenize(ref)) >= max_overlap:
+            return REJECT_SCORES["near_copy"], "near_copy"
+
+    return None, None
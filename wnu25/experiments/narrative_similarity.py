@@ -0,0 +1,232 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from ngram_engine import _ngram_codes, encode_texts
+
+# N-grams found in more than this many narratives go through a dense
+# matrix product when counting pairwise overlaps; rarer ones are paired up
+# directly
+_DENSE_MIN_TEXTS = 32
+
+# Rows of the pairwise shared n-gram counts held in memory at a time
+_JACCARD_BLOCK_ROWS = 256
+
+# Smoothing of zero precisions, as nltk's SmoothingFunction().method1
+_BLEU_EPSILON = 0.1
+
+def _ngram_counts(ids: np.ndarray, offsets: np.ndarray, vocab_size: int, n: int) -> tuple:
+    """
+    Count index of the n-grams of every text: parallel arrays (text, gram,
+    count) with one entry per distinct (text, n-gram), sorted by gram and
+    then text, plus the number of n-grams (with repeats) of every text.
+    """
+    num_texts = len(offsets) - 1
+    if len(ids) < n:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, empty, np.zeros(num_texts, dtype=np.int64)
+    text_of = np.repeat(np.arange(num_texts), np.diff(offsets))
+    codes = None
+    for k in range(1, n + 1):
+        codes, _ = _ngram_codes(ids, k, vocab_size, codes)
+    starts = np.arange(len(codes))
+    valid = starts + n <= offsets[1:][text_of[starts]]
+    texts = text_of[starts[valid]]
+    grams = codes[valid]
+    totals = np.bincount(texts, minlength=num_texts)
+
+    order = np.lexsort((texts, grams))
+    texts = texts[order]
+    grams = grams[order]
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (grams[1:] != grams[:-1]) | (texts[1:] != texts[:-1])
+    counts = np.diff(np.append(np.flatnonzero(first), len(order)))
+    return texts[first], grams[first], counts, totals
+
+def _clipped_counts(texts: np.ndarray, grams: np.ndarray, counts: np.ndarray, num_texts: int) -> np.ndarray:
+    """
+    BLEU clipped n-gram matches of every text against all other texts:
+    sum over its n-grams of min(count, max count in any other text).
+    The max over the others is the gram's largest count, or its second
+    largest for the text holding the largest, so one sort suffices.
+    """
+    if len(grams) == 0:
+        return np.zeros(num_texts, dtype=np.int64)
+    order = np.lexsort((-counts, grams))
+    texts = texts[order]
+    grams = grams[order]
+    counts = counts[order]
+    group_start = np.ones(len(grams), dtype=bool)
+    group_start[1:] = grams[1:] != grams[:-1]
+    group_id = np.cumsum(group_start) - 1
+    starts = np.flatnonzero(group_start)
+    sizes = np.diff(np.append(starts, len(grams)))
+    best = counts[starts]
+    second = np.where(sizes > 1, counts[np.minimum(starts + 1, len(counts) - 1)], 0)
+    reference = np.where(group_start, second[group_id], best[group_id])
+    return np.bincount(texts, weights=np.minimum(counts, reference), minlength=num_texts).astype(np.int64)
+
+def _pairwise_jaccard_sum(texts: np.ndarray, grams: np.ndarray, num_texts: int) -> float:
+    """
+    Sum over all pairs of texts of the Jaccard similarity of their n-gram
+    sets. 'texts'/'grams' hold one entry per distinct (text, n-gram),
+    sorted by gram and then text. The shared-gram counts are built
+    _JACCARD_BLOCK_ROWS rows at a time, so memory stays O(block x N)
+    rather than O(N^2).
+    """
+    if len(grams) == 0:
+        return 0.0
+    distinct = np.bincount(texts, minlength=num_texts)
+    group_start = np.ones(len(grams), dtype=bool)
+    group_start[1:] = grams[1:] != grams[:-1]
+    group_id = np.cumsum(group_start) - 1
+    sizes = np.bincount(group_id)
+    entry_size = sizes[group_id]
+
+    # Frequent n-grams: rows of a texts x grams indicator matrix times its
+    # transpose
+    frequent = entry_size > _DENSE_MIN_TEXTS
+    indicator = None
+    if frequent.any():
+        columns = np.unique(group_id[frequent], return_inverse=True)[1].reshape(-1)
+        indicator = np.zeros((num_texts, columns.max() + 1), dtype=np.float32)
+        indicator[texts[frequent], columns] = 1.0
+
+    # Rare n-grams: every pair of entries of the same gram, at most
+    # _DENSE_MIN_TEXTS - 1 apart in the sorted arrays. Within a gram the
+    # texts are ascending, so each pair is (lower text, higher text)
+    rare_texts = texts[~frequent]
+    rare_groups = group_id[~frequent]
+    pair_rows = []
+    pair_columns = []
+    for d in range(1, _DENSE_MIN_TEXTS):
+        if d >= len(rare_groups):
+            break
+        same = rare_groups[d:] == rare_groups[:-d]
+        if not same.any():
+            break
+        pair_rows.append(rare_texts[:-d][same])
+        pair_columns.append(rare_texts[d:][same])
+    pair_rows = np.concatenate(pair_rows) if pair_rows else np.zeros(0, dtype=np.int64)
+    pair_columns = np.concatenate(pair_columns) if pair_columns else np.zeros(0, dtype=np.int64)
+    order = np.argsort(pair_rows, kind="stable")
+    pair_rows = pair_rows[order]
+    pair_columns = pair_columns[order]
+
+    total = 0.0
+    columns = np.arange(num_texts)
+    for r0 in range(0, num_texts - 1, _JACCARD_BLOCK_ROWS):
+        r1 = min(r0 + _JACCARD_BLOCK_ROWS, num_texts)
+        if indicator is not None:
+            shared = np.rint(indicator[r0:r1] @ indicator.T).astype(np.int64)
+        else:
+            shared = np.zeros((r1 - r0, num_texts), dtype=np.int64)
+        lo, hi = np.searchsorted(pair_rows, [r0, r1])
+        cells = (pair_rows[lo:hi] - r0) * num_texts + pair_columns[lo:hi]
+        shared += np.bincount(cells, minlength=shared.size).reshape(shared.shape)
+
+        # Only the pairs above the diagonal, each counted once
+        rows = np.arange(r0, r1)[:, None]
+        upper = columns[None, :] > rows
+        intersection = shared[upper]
+        union = (distinct[rows] + distinct[None, :])[upper] - intersection
+        total += float(np.divide(intersection, union, out=np.zeros(len(union)), where=union > 0).sum())
+    return total
+
+def _similarity_job(ids: np.ndarray, offsets: np.ndarray, vocab_size: int, n: int) -> dict:
+    """
+    Everything the n-gram order 'n' contributes to Self-BLEU and pairwise
+    overlap for one group of texts. Runs in a worker process.
+    """
+    num_texts = len(offsets) - 1
+    texts, grams, counts, totals = _ngram_counts(ids, offsets, vocab_size, n)
+    clipped = _clipped_counts(texts, grams, counts, num_texts)
+    pairs = num_texts * (num_texts - 1) // 2
+    return {
+        "n": n,
+        "clipped": clipped,
+        "totals": totals,
+        "overlap": _pairwise_jaccard_sum(texts, grams, num_texts) / pairs if pairs else 0.0
+    }
+
+def _closest_reference_lengths(lengths: np.ndarray) -> np.ndarray:
+    """
+    For every text, the length of the closest other text (the shorter one
+    on ties), as nltk's closest_ref_length.
+    """
+    order = np.argsort(lengths, kind="stable")
+    sorted_lengths = lengths[order]
+    position = np.empty(len(lengths), dtype=np.int64)
+    position[order] = np.arange(len(lengths))
+    below = np.where(position > 0, sorted_lengths[np.maximum(position - 1, 0)], -1)
+    above = np.where(position < len(lengths) - 1, sorted_lengths[np.minimum(position + 1, len(lengths) - 1)], -1)
+    use_below = (below >= 0) & ((above < 0) | (lengths - below <= above - lengths))
+    return np.where(use_below, below, above)
+
+def _self_bleu(jobs: list, lengths: np.ndarray, max_n: int) -> np.ndarray:
+    """
+    Self-BLEU-k for k = 1..max_n: each text's sentence BLEU (uniform
+    weights over 1..k, method1 smoothing) against all other texts,
+    averaged over texts.
+    """
+    reference_lengths = _closest_reference_lengths(lengths)
+    safe_lengths = np.maximum(lengths, 1)
+    brevity = np.where(lengths >= reference_lengths, 1.0, np.exp(1.0 - reference_lengths / safe_lengths))
+    brevity = np.where(lengths > 0, brevity, 0.0)
+
+    log_precisions = []
+    for job in jobs:
+        clipped = job["clipped"].astype(np.float64)
+        denominator = np.maximum(job["totals"], 1).astype(np.float64)
+        numerator = np.where(clipped > 0, clipped, _BLEU_EPSILON)
+        log_precisions.append(np.log(numerator / denominator))
+    no_unigram_match = jobs[0]["clipped"] == 0
+
+    scores = []
+    for k in range(1, max_n + 1):
+        bleu = brevity * np.exp(np.mean(log_precisions[:k], axis=0))
+        scores.append(float(np.where(no_unigram_match, 0.0, bleu).mean()))
+    return np.array(scores)
+
+def cross_narrative_similarity(text_groups: dict, max_n: int = 4, processes: int = None, tokenizer: str = "auto") -> dict:
+    """
+    How similar the narratives within each group are to each other.
+
+    'text_groups' maps a name (e.g. a strategy) to a list of texts. For
+    every group returns {"narratives", "self_bleu", "pairwise_overlap"},
+    where self_bleu[k-1] is Self-BLEU-k (mean BLEU of each text against
+    all others; higher = more alike) and pairwise_overlap[n-1] is the mean
+    Jaccard similarity of the n-gram sets of all pairs of texts.
+
+    Each group is tokenized once (as compute_ngram_diversity) into a shared
+    n-gram count index; the n-gram orders of all groups are computed in
+    parallel on a pool of 'processes' worker processes (default: CPU count;
+    0 computes in this process).
+    """
+    encoded = {}
+    for name, texts in text_groups.items():
+        ids, offsets, vocab = encode_texts(texts, tokenizer)
+        encoded[name] = (ids, offsets, len(vocab))
+
+    tasks = [(name, n) for name in encoded for n in range(1, max_n + 1)]
+    if processes == 0:
+        outputs = [_similarity_job(*encoded[name], n) for name, n in tasks]
+    else:
+        workers = min(processes or os.cpu_count() or 1, len(tasks)) or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_similarity_job, *encoded[name], n) for name, n in tasks]
+            outputs = [f.result() for f in futures]
+
+    results = {}
+    for name, (ids, offsets, _) in encoded.items():
+        jobs = sorted((out for (group, _), out in zip(tasks, outputs) if group == name), key=lambda job: job["n"])
+        num_texts = len(offsets) - 1
+        if num_texts < 2:
+            self_bleu = np.zeros(max_n)
+        else:
+            self_bleu = _self_bleu(jobs, np.diff(offsets), max_n)
+        results[name] = {
+            "narratives": num_texts,
+            "self_bleu": self_bleu,
+            "pairwise_overlap": np.array([job["overlap"] for job in jobs])
+        }
+    return results
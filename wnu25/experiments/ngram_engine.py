@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import time
+import numpy as np
+from tokenization import ensure_nltk_resources, extract_raw_text, regex_word_tokenize, tokenize
+
+def _prepare(text: str) -> str:
+    # Same normalization as compute_ngram_diversity: ASCII only, lower case
+    return text.encode("ascii", "ignore").decode("ascii").lower()
+
+def _tokenizer(name: str):
+    """
+    "auto" tokenizes like compute_ngram_diversity (nltk.word_tokenize if
+    its data is installed, else the regex tokenizer); "regex" always uses
+    regex_word_tokenize.
+    """
+    if name == "regex":
+        return regex_word_tokenize
+    if name == "auto":
+        return tokenize
+    raise ValueError(f"Unknown tokenizer {name!r} (expected 'auto' or 'regex')")
+
+def encode_texts(texts: list, tokenizer: str = "auto", vocab: dict = None) -> tuple:
+    """
+    Tokenizes every text once and maps tokens to integer ids.
+    Returns (ids, offsets, vocab): 'ids' is one int64 array of all texts'
+    token ids back to back, text i being ids[offsets[i]:offsets[i + 1]].
+    Pass a 'vocab' dict to share ids across calls.
+    """
+    tokenize_fn = _tokenizer(tokenizer)
+    if vocab is None:
+        vocab = {}
+    all_ids = []
+    offsets = [0]
+    for text in texts:
+        # setdefault evaluates len(vocab) first, so a new token gets the next id
+        all_ids.extend([vocab.setdefault(token, len(vocab)) for token in tokenize_fn(_prepare(text))])
+        offsets.append(len(all_ids))
+    return np.asarray(all_ids, dtype=np.int64), np.asarray(offsets, dtype=np.int64), vocab
+
+def _ngram_codes(ids: np.ndarray, n: int, vocab_size: int, codes: np.ndarray = None) -> tuple:
+    """
+    One int64 code per n-gram start (len(ids) - n + 1 of them), equal iff
+    the n-grams are equal. While vocab_size ** n fits in 63 bits the code
+    is the base-'vocab_size' number of the n ids, rolled forward from the
+    (n-1)-gram 'codes'; beyond that the windows are ranked with np.unique.
+    Returns (codes, number of possible codes).
+    """
+    if vocab_size ** n < 2 ** 63:
+        if n == 1:
+            return ids, vocab_size
+        if codes is None:
+            codes, _ = _ngram_codes(ids, n - 1, vocab_size)
+        return codes[:-1] * vocab_size + ids[n - 1:], vocab_size ** n
+    windows = np.lib.stride_tricks.sliding_window_view(ids, n)
+    uniques, inverse = np.unique(windows, axis=0, return_inverse=True)
+    return inverse.reshape(-1).astype(np.int64), len(uniques)
+
+def distinct_n_from_ids(ids: np.ndarray, offsets: np.ndarray, vocab_size: int, max_n: int = 4) -> np.ndarray:
+    """
+    distinct-n (unique n-grams / n-grams) of every text for n = 1..max_n,
+    as an array of shape (number of texts, max_n). N-grams never cross
+    text boundaries; texts with fewer than n tokens score 0.0.
+    """
+    num_texts = len(offsets) - 1
+    result = np.zeros((num_texts, max_n), dtype=np.float64)
+    if len(ids) == 0:
+        return result
+    lengths = np.diff(offsets)
+    text_of = np.repeat(np.arange(num_texts), lengths)
+    text_end = offsets[1:][text_of]
+    vocab_size = max(vocab_size, int(ids.max()) + 1, 2)
+
+    codes = None
+    for n in range(1, max_n + 1):
+        if n > len(ids):
+            break
+        codes, num_codes = _ngram_codes(ids, n, vocab_size, codes)
+        starts = np.arange(len(codes))
+        valid = starts + n <= text_end[starts]
+        texts = text_of[starts[valid]]
+        grams = codes[valid]
+
+        totals = np.bincount(texts, minlength=num_texts)
+        if num_texts * num_codes < 2 ** 63:
+            # One sort of a combined (text, n-gram) key is much faster than lexsort
+            keys = np.sort(texts * num_codes + grams)
+            first = np.ones(len(keys), dtype=bool)
+            first[1:] = keys[1:] != keys[:-1]
+            distinct = np.bincount(keys[first] // num_codes, minlength=num_texts)
+        else:
+            order = np.lexsort((grams, texts))
+            texts_sorted = texts[order]
+            grams_sorted = grams[order]
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = (texts_sorted[1:] != texts_sorted[:-1]) | (grams_sorted[1:] != grams_sorted[:-1])
+            distinct = np.bincount(texts_sorted[first], minlength=num_texts)
+
+        has_grams = totals > 0
+        result[has_grams, n - 1] = distinct[has_grams] / totals[has_grams]
+    return result
+
+def distinct_n(texts: list, max_n: int = 4, tokenizer: str = "auto") -> np.ndarray:
+    """
+    compute_ngram_diversity(text, n) for every text and n = 1..max_n in
+    one pass: each text is tokenized once and all n are computed together
+    on integer ids. Returns an array of shape (len(texts), max_n).
+    """
+    ids, offsets, vocab = encode_texts(texts, tokenizer)
+    return distinct_n_from_ids(ids, offsets, len(vocab), max_n)
+
+def distinct_n_with_combined(texts: list, max_n: int = 4, tokenizer: str = "auto") -> tuple:
+    """
+    distinct_n(texts) plus the distinct-n of all texts joined with spaces,
+    i.e. compute_ngram_diversity(" ".join(texts), n).
+    Returns (per_text array of shape (len(texts), max_n), combined array of
+    shape (max_n,)).
+    """
+    ids, offsets, vocab = encode_texts(texts, tokenizer)
+    per_text = distinct_n_from_ids(ids, offsets, len(vocab), max_n)
+    if tokenizer == "regex" or not ensure_nltk_resources():
+        # The regex tokenizer never joins tokens across whitespace, so the
+        # joined text's tokens are the texts' tokens back to back
+        combined_ids = ids
+    else:
+        # nltk.word_tokenize splits sentences first, which can tokenize a
+        # text's last word differently once another text follows it
+        combined_ids, _, _ = encode_texts([" ".join(texts)], tokenizer, vocab)
+    combined = distinct_n_from_ids(combined_ids, np.array([0, len(combined_ids)], dtype=np.int64), len(vocab), max_n)
+    return per_text, combined[0]
+
+#########################
+# Streaming distinct-n
+#########################
+
+_TOKEN_HASH_CACHE_SIZE = 1 << 20
+_ROLL = np.uint64(0x9E3779B97F4A7C15)
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer: spreads rolling-hash bits for HyperLogLog
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def _bit_length(x: np.ndarray) -> np.ndarray:
+    length = np.zeros(x.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = x >= (np.uint64(1) << np.uint64(shift))
+        length[high] += shift
+        x = np.where(high, x >> np.uint64(shift), x)
+    return length + x.astype(np.int64)
+
+class StreamingDistinctN:
+    """
+    distinct-n of a corpus fed one text at a time, equal to distinct-n of
+    all texts joined with spaces (as the "combined diversity" of the
+    lexical diversity evaluation) without ever holding the corpus.
+
+    Tokens are hashed to 64 bits and n-grams are rolling hashes of their
+    tokens; the last n-1 tokens of each text are carried into the next, so
+    n-grams spanning two texts are counted as in the joined text.
+
+    mode="exact" keeps the set of distinct n-gram hashes per n as sorted
+    uint64 arrays (8 bytes per distinct n-gram; exact up to 64-bit hash
+    collisions). mode="hll" keeps one HyperLogLog sketch of 2**precision
+    one-byte registers per n, so memory is fixed regardless of corpus
+    size; the relative error is about 1.04 / sqrt(2**precision) (0.8% at
+    the default 14). Token hashes are cached for up to 2**20 distinct
+    tokens.
+
+    The default regex tokenizer makes the result match
+    distinct_n_with_combined(texts, tokenizer="regex"); "auto" uses NLTK
+    when its data is installed.
+    """
+
+    def __init__(self, max_n: int = 4, mode: str = "exact", precision: int = 14, tokenizer: str = "regex", batch_tokens: int = 1 << 16, compact_every: int = 1 << 20):
+        if mode not in ("exact", "hll"):
+            raise ValueError(f"Unknown mode {mode!r} (expected 'exact' or 'hll')")
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.max_n = max_n
+        self.mode = mode
+        self.precision = precision
+        self.batch_tokens = batch_tokens
+        self.compact_every = compact_every
+        self._tokenize = _tokenizer(tokenizer)
+        self._token_hashes = {}
+        self._carry = np.zeros(0, dtype=np.uint64)
+        # Token hashes not yet counted; processed 'batch_tokens' at a time
+        self._batch = []
+        self.texts = 0
+        self.tokens = 0
+        self.ngrams = [0] * max_n
+        if mode == "exact":
+            self._distinct = [np.zeros(0, dtype=np.uint64) for _ in range(max_n)]
+            self._pending = [[] for _ in range(max_n)]
+            self._pending_size = [0] * max_n
+        else:
+            self._registers = np.zeros((max_n, 1 << precision), dtype=np.uint8)
+
+    def _hash_tokens(self, tokens: list) -> list:
+        cache = self._token_hashes
+        if len(cache) > _TOKEN_HASH_CACHE_SIZE:
+            cache.clear()
+        hashes = []
+        for token in tokens:
+            h = cache.get(token)
+            if h is None:
+                h = cache[token] = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+            hashes.append(h)
+        return hashes
+
+    def add(self, text: str):
+        """
+        Adds one text (ASCII-filtered and lower-cased like
+        compute_ngram_diversity).
+        """
+        token_hashes = self._hash_tokens(self._tokenize(_prepare(text)))
+        self.texts += 1
+        self.tokens += len(token_hashes)
+        # The texts form one continuous token stream, so they can be batched freely
+        self._batch.extend(token_hashes)
+        if len(self._batch) >= self.batch_tokens:
+            self._flush()
+
+    def _flush(self):
+        if not self._batch:
+            return
+        buffer = np.concatenate([self._carry, np.array(self._batch, dtype=np.uint64)])
+        self._batch = []
+        carried = len(self._carry)
+
+        codes = buffer
+        for n in range(1, self.max_n + 1):
+            if n > 1:
+                codes = codes[:-1] * _ROLL + buffer[n - 1:]
+            # Only n-grams that end in this batch; earlier ones were counted
+            start = max(carried - (n - 1), 0)
+            grams = codes[start:]
+            if len(grams) == 0:
+                continue
+            self.ngrams[n - 1] += len(grams)
+            self._record(n - 1, _mix64(grams))
+
+        self._carry = buffer[-(self.max_n - 1):] if self.max_n > 1 else buffer[:0]
+
+    def add_many(self, texts):
+        for text in texts:
+            self.add(text)
+
+    def _record(self, i: int, hashes: np.ndarray):
+        if self.mode == "exact":
+            self._pending[i].append(hashes)
+            self._pending_size[i] += len(hashes)
+            # Merging once the pending hashes outnumber the set keeps the
+            # total merge work proportional to the number of n-grams
+            if self._pending_size[i] >= max(self.compact_every, len(self._distinct[i])):
+                self._compact(i)
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        rest = hashes & ((np.uint64(1) << (np.uint64(64) - p)) - np.uint64(1))
+        rank = (64 - self.precision) - _bit_length(rest) + 1
+        np.maximum.at(self._registers[i], index, rank.astype(np.uint8))
+
+    def _compact(self, i: int):
+        if self._pending[i]:
+            merged = np.concatenate([self._distinct[i]] + self._pending[i])
+            merged.sort()
+            keep = np.ones(len(merged), dtype=bool)
+            keep[1:] = merged[1:] != merged[:-1]
+            self._distinct[i] = merged[keep]
+            self._pending[i] = []
+            self._pending_size[i] = 0
+
+    def distinct_counts(self) -> list:
+        """
+        Number of distinct n-grams for n = 1..max_n (estimated in "hll" mode).
+        """
+        self._flush()
+        if self.mode == "exact":
+            for i in range(self.max_n):
+                self._compact(i)
+            return [len(d) for d in self._distinct]
+        m = float(1 << self.precision)
+        alpha = 0.7213 / (1.0 + 1.079 / m)
+        counts = []
+        for registers in self._registers:
+            estimate = alpha * m * m / np.sum(np.power(2.0, -registers.astype(np.float64)))
+            zeros = int(np.count_nonzero(registers == 0))
+            if estimate <= 2.5 * m and zeros:
+                # Small-range correction (linear counting)
+                estimate = m * np.log(m / zeros)
+            counts.append(float(estimate))
+        return counts
+
+    def distinct_n(self) -> np.ndarray:
+        """
+        distinct-n for n = 1..max_n; 0.0 while there are no n-grams.
+        """
+        counts = self.distinct_counts()  # flushes, so self.ngrams is complete
+        return np.array([min(c / t, 1.0) if t else 0.0 for c, t in zip(counts, self.ngrams)], dtype=np.float64)
+
+    def memory_bytes(self) -> int:
+        if self.mode == "exact":
+            return sum(d.nbytes for d in self._distinct) + sum(8 * s for s in self._pending_size)
+        return self._registers.nbytes
+
+def iter_narratives(path: str):
+    """
+    Streams narratives from a file without loading it, as raw text (see
+    extract_raw_text). ".gz" files are decompressed on the fly.
+    - ".jsonl": result store records ({"key", "row": {"narrative"}}) or
+      objects with a "narrative" or "text" field, or plain strings
+    - ".csv": the "narrative" column, or "Path (Event Text)" of
+      EventGraph.export_mcts_paths_as_csv
+    - anything else: one narrative per line
+    Note that a result store may hold several records for a re-run key;
+    all of them are streamed.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    name = path[:-3] if path.endswith(".gz") else path
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if name.endswith(".csv"):
+            for row in csv.DictReader(f):
+                if "narrative" in row:
+                    yield extract_raw_text(row["narrative"])
+                elif "Path (Event Text)" in row:
+                    yield extract_raw_text(row["Path (Event Text)"].replace(" -> ", "\n"))
+            return
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if name.endswith(".jsonl"):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # e.g. a torn last line
+                if isinstance(record, dict):
+                    if isinstance(record.get("row"), dict):
+                        record = record["row"]
+                    record = record.get("narrative") or record.get("text") or ""
+                line = str(record)
+            yield extract_raw_text(line)
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Streaming distinct-n over large narrative corpora")
+    parser.add_argument("files", nargs="+",
+                        help="Narrative files (.txt, .jsonl result stores, .csv path exports; optionally .gz)")
+    parser.add_argument("--mode", choices=["exact", "hll"], default="exact",
+                        help="exact: 64-bit hash sets; hll: fixed-memory HyperLogLog estimate")
+    parser.add_argument("--max-n", type=int, default=4,
+                        help="Largest n-gram size")
+    parser.add_argument("--precision", type=int, default=14,
+                        help="HyperLogLog precision (2**precision registers per n)")
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+    counter = StreamingDistinctN(max_n=args.max_n, mode=args.mode, precision=args.precision)
+    start = time.time()
+    for path in args.files:
+        print(f"[INFO] Reading {path}")
+        counter.add_many(iter_narratives(path))
+    elapsed = time.time() - start
+    print(f"[INFO] {counter.texts} narratives, {counter.tokens} tokens in {elapsed:.1f}s; sketch memory {counter.memory_bytes() / 1e6:.1f} MB")
+    for n, (ngrams, distinct, ratio) in enumerate(zip(counter.ngrams, counter.distinct_counts(), counter.distinct_n()), start=1):
+        print(f"n={n}: {ngrams} n-grams, {distinct:.0f} distinct, distinct-{n} = {ratio:.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+# Columns of the evaluation results (all_results.csv, aggregate_scores.csv
+# and result store rows), shared by run_evaluation and results_warehouse
+
+SCORE_KEYS = [
+    "overall_quality",
+    "identifying_major_flaws",
+    "character_behavior",
+    "common_sense_adherence",
+    "consistency",
+    "relatedness",
+    "causal_temporal_relationship"
+]
+
+# What each strategy run spent: LLM calls by stage, tokens, estimated
+# dollars (llm_util.MODEL_PRICES) and time spent generating / judging
+COST_KEYS = [
+    "generate_calls",
+    "score_calls",
+    "judge_calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "cost_usd",
+    "generate_seconds",
+    "judge_seconds"
+]
+
+ALL_RESULTS_HEADER = ["strategy", "story_stub", "narrative"] + SCORE_KEYS + ["avg_score", "judge_comments"] + COST_KEYS
+AGGREGATE_HEADER = ["strategy"] + SCORE_KEYS + ["avg_score"] + COST_KEYS
@@ -0,0 +1,114 @@
+import json
+import os
+import threading
+import time
+
+def load_results(path: str) -> dict:
+    """
+    Reads a result store file into {key tuple: row}, last record winning.
+    Unreadable lines (e.g. a torn last line) are skipped with a warning.
+    """
+    rows = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+                key = tuple(record["key"])
+                row = record["row"]
+            except (json.JSONDecodeError, KeyError, TypeError):
+                print(f"[WARN] Ignoring unreadable line {line_no} in {path}")
+                continue
+            rows[key] = row
+    return rows
+
+class ResultStore:
+    """
+    Append-only JSON Lines store of finished evaluation results.
+
+    Each line is {"key": [...], "row": {...}}. Every append is flushed to
+    the OS immediately, so results survive a crash of the process; fsync
+    (which also survives a machine crash) is batched to once every
+    'fsync_every' records or 'fsync_interval' seconds, whichever comes
+    first. On open, existing records are loaded so a restarted run can skip
+    finished keys; for a repeated key the last record wins. A torn last line
+    from an interrupted write is ignored.
+    """
+
+    def __init__(self, path: str, fsync_every: int = 16, fsync_interval: float = 2.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._rows = {}
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            self._rows = load_results(path)
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() > 0 and not self._ends_with_newline():
+            # Terminate a torn last line so the next record starts cleanly
+            self._file.write("\n")
+            self._file.flush()
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, key):
+        return tuple(key) in self._rows
+
+    def get(self, key, default=None):
+        return self._rows.get(tuple(key), default)
+
+    def keys(self):
+        return list(self._rows)
+
+    def append(self, key, row: dict):
+        """
+        Records 'row' as the result for 'key' (a tuple of JSON-serializable
+        values). Thread-safe.
+        """
+        key = tuple(key)
+        line = json.dumps({"key": list(key), "row": row}, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._rows[key] = row
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_unlocked()
+
+    def _sync_unlocked(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            if self._unsynced:
+                self._sync_unlocked()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            if self._unsynced:
+                self._sync_unlocked()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
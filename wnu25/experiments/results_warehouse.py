@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+import argparse
+import glob
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+from result_columns import SCORE_KEYS, COST_KEYS
+from stats_util import T95
+
+METRICS = SCORE_KEYS + ["avg_score"] + COST_KEYS
+ROW_KEYS = ["run", "length", "strategy", "stub_id"]
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def _text_id(text: str) -> str:
+    return hashlib.blake2b(str(text).encode("utf-8"), digest_size=8).hexdigest()
+
+def _t_critical(dof: np.ndarray) -> np.ndarray:
+    # Vectorized stats_util.t95; no interval for a single sample
+    table = np.array([np.nan] + T95)
+    dof = np.asarray(dof, dtype=np.int64)
+    return np.where(dof > len(T95), 1.96, table[np.clip(dof, 0, len(T95))])
+
+#########################
+# Storage
+#########################
+
+def _table_path(warehouse_dir: str, name: str) -> str:
+    """
+    Parquet when pyarrow is installed, otherwise pandas pickle. Whichever
+    file already exists is used for reading.
+    """
+    parquet_path = os.path.join(warehouse_dir, f"{name}.parquet")
+    pickle_path = os.path.join(warehouse_dir, f"{name}.pkl")
+    if os.path.exists(parquet_path):
+        return parquet_path
+    if os.path.exists(pickle_path) or not _has_pyarrow():
+        return pickle_path
+    return parquet_path
+
+def _read_table(path: str, columns: list = None) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=columns)
+    df = pd.read_pickle(path)
+    return df[columns] if columns is not None else df
+
+def _write_table(df: pd.DataFrame, path: str):
+    tmp_path = path + ".tmp"
+    if path.endswith(".parquet"):
+        df.to_parquet(tmp_path, index=False, compression="zstd")
+    else:
+        df.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+def load_scores(warehouse_dir: str, columns: list = None) -> pd.DataFrame:
+    """
+    Loads the scores table (one row per judged narrative, no text columns).
+    """
+    return _read_table(_table_path(warehouse_dir, "scores"), columns)
+
+def load_narratives(warehouse_dir: str, columns: list = None) -> pd.DataFrame:
+    """
+    Loads the narratives table (story_stub, narrative, judge_comments),
+    which joins to the scores table on ROW_KEYS.
+    """
+    return _read_table(_table_path(warehouse_dir, "narratives"), columns)
+
+def rows_to_frames(rows: pd.DataFrame, run: str, length: int):
+    """
+    Splits all_results.csv-style rows into (scores, narratives) frames.
+    """
+    stub_ids = rows["story_stub"].map(_text_id)
+    scores = pd.DataFrame({
+        "run": run,
+        "length": int(length),
+        "strategy": rows["strategy"].astype(str),
+        "stub_id": stub_ids
+    })
+    for k in METRICS:
+        # Results written before the cost columns existed have no COST_KEYS
+        if k in rows:
+            scores[k] = pd.to_numeric(rows[k], errors="coerce").astype("float64")
+        else:
+            scores[k] = np.nan
+
+    narratives = scores[ROW_KEYS].copy()
+    for k in ("story_stub", "narrative", "judge_comments"):
+        narratives[k] = rows[k].astype(str) if k in rows else ""
+    return scores, narratives
+
+def ingest(warehouse_dir: str, scores: pd.DataFrame, narratives: pd.DataFrame):
+    """
+    Adds rows to the warehouse, replacing any existing rows of the same
+    (run, length) so re-importing a results directory is idempotent. The
+    given frames are not modified.
+    """
+    os.makedirs(warehouse_dir, exist_ok=True)
+    replaced = scores[["run", "length"]].drop_duplicates()
+    for name, new in (("scores", scores), ("narratives", narratives)):
+        path = _table_path(warehouse_dir, name)
+        if os.path.exists(path):
+            old = _read_table(path)
+            stale = old.merge(replaced, on=["run", "length"], how="left", indicator=True)["_merge"].eq("both").to_numpy()
+            new = pd.concat([old[~stale], new], ignore_index=True)
+        else:
+            new = new.copy()
+        new["strategy"] = new["strategy"].astype("category")
+        _write_table(new, path)
+
+def import_results_dir(warehouse_dir: str, results_dir: str, run: str = None) -> int:
+    """
+    Imports every '<results_dir>/<length>/all_results.csv' as run 'run'
+    (default: the directory name). Returns the number of rows imported.
+    """
+    if run is None:
+        run = os.path.basename(os.path.normpath(results_dir))
+    all_scores = []
+    all_narratives = []
+    for csv_path in sorted(glob.glob(os.path.join(results_dir, "*", "all_results.csv"))):
+        length_name = os.path.basename(os.path.dirname(csv_path))
+        if not length_name.isdigit():
+            continue
+        rows = pd.read_csv(csv_path, dtype={"strategy": str, "story_stub": str, "narrative": str, "judge_comments": str}, keep_default_na=False)
+        scores, narratives = rows_to_frames(rows, run, int(length_name))
+        all_scores.append(scores)
+        all_narratives.append(narratives)
+
+    if not all_scores:
+        print(f"[WARN] No <length>/all_results.csv files found in {results_dir}")
+        return 0
+    scores = pd.concat(all_scores, ignore_index=True)
+    ingest(warehouse_dir, scores, pd.concat(all_narratives, ignore_index=True))
+    print(f"[INFO] Imported {len(scores)} rows from {results_dir} as run '{run}'")
+    return len(scores)
+
+#########################
+# Aggregation
+#########################
+
+def aggregate(scores: pd.DataFrame, by: list = ("run", "length", "strategy")) -> pd.DataFrame:
+    """
+    aggregate_scores.csv-style table: mean of every score per group, with
+    avg_score as the mean of the 7 category means, plus the number of
+    narratives and a 95% confidence interval for avg_score. Cost columns
+    are averaged over the rows that have them.
+    """
+    by = list(by)
+    grouped = scores.groupby(by, observed=True, sort=True)
+    result = grouped[SCORE_KEYS].mean()
+    result["avg_score"] = result[SCORE_KEYS].mean(axis=1)
+    cost_keys = [k for k in COST_KEYS if k in scores]
+    result[cost_keys] = grouped[cost_keys].mean()
+    n = grouped["avg_score"].count()
+    std = grouped["avg_score"].std(ddof=1)
+    half_width = _t_critical(n.to_numpy() - 1) * std.to_numpy() / np.sqrt(n.to_numpy())
+    result["n"] = n
+    result["avg_score_std"] = std
+    result["avg_score_ci_low"] = result["avg_score"] - half_width
+    result["avg_score_ci_high"] = result["avg_score"] + half_width
+    return result.reset_index()
+
+def compare_to_reference(scores: pd.DataFrame, reference_strategy: str) -> pd.DataFrame:
+    """
+    Paired comparison of every strategy against 'reference_strategy' on
+    the stubs both were run on, within each (run, length). Returns the mean
+    avg_score difference (strategy - reference) with a 95% CI and win rate.
+    """
+    keys = ["run", "length", "stub_id"]
+    ref = scores.loc[scores["strategy"] == reference_strategy, keys + ["avg_score"]]
+    ref = ref.groupby(keys, observed=True, as_index=False)["avg_score"].mean()
+    others = scores.loc[scores["strategy"] != reference_strategy, keys + ["strategy", "avg_score"]]
+    paired = others.merge(ref, on=keys, suffixes=("", "_ref"))
+    paired["diff"] = paired["avg_score"] - paired["avg_score_ref"]
+    paired["win"] = (paired["diff"] > 0).astype("float64")
+
+    grouped = paired.groupby(["run", "length", "strategy"], observed=True, sort=True)
+    result = grouped["diff"].agg(["mean", "std", "count"])
+    half_width = _t_critical(result["count"].to_numpy() - 1) * result["std"].to_numpy() / np.sqrt(result["count"].to_numpy())
+    result = pd.DataFrame({
+        "reference": reference_strategy,
+        "n_pairs": result["count"],
+        "mean_diff": result["mean"],
+        "diff_ci_low": result["mean"] - half_width,
+        "diff_ci_high": result["mean"] + half_width,
+        "win_rate": grouped["win"].mean()
+    })
+    return result.reset_index()
+
+def cross_run_table(scores: pd.DataFrame, metric: str = "avg_score") -> pd.DataFrame:
+    """
+    One row per (length, strategy), one column per run: mean 'metric'.
+    """
+    return scores.pivot_table(index=["length", "strategy"], columns="run", values=metric, aggfunc="mean", observed=True)
+
+#########################
+# CLI
+#########################
+
+def _output(df: pd.DataFrame, out_path: str, index: bool = False):
+    if out_path:
+        df.to_csv(out_path, index=index)
+        print(f"[INFO] Wrote {len(df)} rows to {out_path}")
+    else:
+        with pd.option_context("display.max_rows", None, "display.max_columns", None, "display.width", 200):
+            print(df.to_string(index=index))
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Columnar store and aggregation of evaluation results")
+    parser.add_argument("--warehouse", default="warehouse",
+                        help="Directory holding the scores/narratives tables")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_import = sub.add_parser("import", help="Import <dir>/<length>/all_results.csv files")
+    p_import.add_argument("results_dirs", nargs="+",
+                          help="Results directories (run name = directory name)")
+
+    p_agg = sub.add_parser("aggregate", help="Per-group mean scores with 95%% CI")
+    p_agg.add_argument("--by", default="run,length,strategy",
+                       help="Comma-separated grouping columns")
+    p_agg.add_argument("--out", default=None,
+                       help="CSV file to write (default: print)")
+
+    p_cmp = sub.add_parser("compare", help="Paired difference vs. a reference strategy")
+    p_cmp.add_argument("--reference", required=True,
+                       help="Reference strategy label, e.g. 'baseline-multibranch (N=1)'")
+    p_cmp.add_argument("--out", default=None,
+                       help="CSV file to write (default: print)")
+
+    p_runs = sub.add_parser("runs", help="Mean avg_score per (length, strategy) across runs")
+    p_runs.add_argument("--metric", default="avg_score",
+                        help="Score column to compare")
+    p_runs.add_argument("--out", default=None,
+                        help="CSV file to write (default: print)")
+
+    return parser.parse_args()
+
+def main():
+    args = parse_arguments()
+
+    if args.command == "import":
+        if not _has_pyarrow():
+            print("[WARN] pyarrow is not installed; storing tables as pandas pickles instead of Parquet.")
+        for results_dir in args.results_dirs:
+            import_results_dir(args.warehouse, results_dir)
+        return
+
+    scores = load_scores(args.warehouse)
+    if args.command == "aggregate":
+        _output(aggregate(scores, by=[c.strip() for c in args.by.split(",") if c.strip()]), args.out)
+    elif args.command == "compare":
+        strategies = set(scores["strategy"].astype(str))
+        if args.reference not in strategies:
+            print(f"[ERROR] No strategy '{args.reference}' in {args.warehouse}. Strategies: {', '.join(sorted(strategies))}")
+            return
+        _output(compare_to_reference(scores, args.reference), args.out)
+    elif args.command == "runs":
+        _output(cross_run_table(scores, args.metric), args.out, index=True)
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,29 @@
 import os
 import csv
+import glob
+import hashlib
+import json
 import time
 import random
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import functools
+from concurrent.futures import Future, ThreadPoolExecutor
 from eventgraph import EventGraph
-from judge import judge_narrative
+from judge import judge_narrative, judge_narrative_ensemble, JudgeCache, JudgeEnsemble, JUDGE_PROMPT_VERSION
+from llm_util import UsageMeter
+from task_scheduler import TaskScheduler
+from result_store import ResultStore, load_results
+from result_columns import SCORE_KEYS, COST_KEYS, ALL_RESULTS_HEADER, AGGREGATE_HEADER
+
+# Models of every strategy run; part of the run config (see run_config)
+GENERATE_MODEL = "gpt-4o"
+SCORING_MODEL = "gpt-4o"
+SCORING_TEMPERATURE = 0.3
+JUDGE_MODEL = "o1"
+
+# Rough relative durations used to prioritise tasks in run_evaluation_parallel
+# (1 unit ~ one gpt-4o round trip)
+GENERATE_CALL_COST = 1.0
+JUDGE_CALL_COST = 10.0
 
 def get_top_n_paths(eg, root_id, n):
     """
@@ -17,13 +36,13 @@ def get_top_n_paths(eg, root_id, n):
         # No children => only one path (the root itself).
         single_path = [root_id]
         path_score = eg.compute_path_score(single_path)
-        text = "\n".join("- " + eg.G.nodes[nid]["text"] for nid in single_path)
+        text = "\n".join("- " + eg.get_text(nid) for nid in single_path)
         return [(single_path, text, path_score)]
 
     scored_paths = []
     for path in all_paths:
         path_score = eg.compute_path_score(path)
-        path_text = "\n".join("- " + eg.G.nodes[nid]["text"] for nid in path)
+        path_text = "\n".join("- " + eg.get_text(nid) for nid in path)
         scored_paths.append((path, path_text, path_score))
 
     scored_paths.sort(key=lambda x: x[2], reverse=True)
@@ -33,7 +52,8 @@ def generate_multibranch_chain(
     eg: EventGraph,
     stub_node_id: int,
     narrative_length: int,
-    branching_factor: int = 1
+    branching_factor: int = 1,
+    executor: ThreadPoolExecutor = None
 ):
     """
     "Multi-branch baseline" approach:
@@ -44,6 +64,12 @@ def generate_multibranch_chain(
       - Return the final linear chain from root to the final node
 
     If branching_factor=1, this is effectively the old baseline (always one child).
+
+    The children of a step are independent, so with an 'executor' (one
+    bounded pool shared by all chains) they are generated concurrently and
+    attached in call order: a step costs one round trip instead of
+    'branching_factor'. run_evaluation_parallel schedules the same steps as
+    tasks instead (see add_multibranch_tasks).
     """
     current_node = stub_node_id
 
@@ -56,8 +82,7 @@ def generate_multibranch_chain(
 
         # Expand the current node 'branching_factor' times
         new_children_ids = []
-        for _ in range(branching_factor):
-            ev = eg.generate_next_event(from_node=current_node)
+        for ev in eg.generate_next_events(current_node, branching_factor, executor=executor):
             child_id = eg.add_event_node(ev["text"])
             eg.G.add_edge(current_node, child_id)
             new_children_ids.append(child_id)
@@ -68,146 +93,363 @@ def generate_multibranch_chain(
 
     return eg.gather_chain_in_chronological_order(current_node)
 
-def process_single_stub_length(
-    stub_idx: int,
+def multibranch_label(branching_factor: int) -> str:
+    return f"baseline-multibranch (N={branching_factor})"
+
+def mcts_label(cfg: dict) -> str:
+    return f"mcts (max_children={cfg['max_children']}, iterations={cfg['iterations']}, scoring_depth={cfg['scoring_depth']})"
+
+def add_multibranch_tasks(
+    scheduler: TaskScheduler,
+    key_prefix: tuple,
+    make_graph,
+    stub_text: str,
+    narrative_length: int,
+    branching_factor: int = 1,
+    choose=random.choice,
+    cost: float = GENERATE_CALL_COST
+):
+    """
+    generate_multibranch_chain as scheduler tasks, so that its LLM calls
+    share the scheduler's workers instead of a pool of their own: a
+    "start" task creates the graph ('make_graph()') and the stub node, then
+    every step adds one task per child (one LLM call each, run
+    concurrently) and a task that attaches the children in call order and
+    continues from 'choose(child_ids)'.
+
+    Returns the key of the last task. Its result is a dict with "eg",
+    "node" (the last node of the chain) and "start" (time.monotonic() when
+    the chain was started).
+    """
+    def start():
+        eg = make_graph()
+        node = eg.add_event_node(text=stub_text)
+        return {"eg": eg, "node": node, "context": eg.next_event_context(node), "start": time.monotonic()}
+
+    def branch(state):
+        return state["eg"].generate_from_context(state["context"])
+
+    def attach(state, *events):
+        eg = state["eg"]
+        child_ids = []
+        for ev in events:
+            child_id = eg.add_event_node(ev["text"])
+            eg.G.add_edge(state["node"], child_id)
+            child_ids.append(child_id)
+        node = choose(child_ids)
+        return {"eg": eg, "node": node, "context": eg.next_event_context(node), "start": state["start"]}
+
+    last_key = scheduler.add_task(key_prefix + ("start",), start, cost=0.0)
+    # A chain of narrative_length nodes takes narrative_length - 1 steps
+    for step in range(narrative_length - 1):
+        branch_keys = [
+            scheduler.add_task(key_prefix + (f"branch[{step}][{i}]",), branch, deps=[last_key], cost=cost)
+            for i in range(branching_factor)
+        ]
+        last_key = scheduler.add_task(key_prefix + (f"step[{step}]",), attach, deps=[last_key] + branch_keys, cost=0.0)
+    return last_key
+
+def strategy_graph(temperature_generate_next: float) -> EventGraph:
+    """
+    EventGraph with the models and temperatures every strategy run uses.
+    """
+    return EventGraph(
+        model_generate_next=GENERATE_MODEL,
+        temperature_generate_next=temperature_generate_next,
+        model_scoring=SCORING_MODEL,
+        temperature_scoring=SCORING_TEMPERATURE,
+        logging_level=None
+    )
+
+def multibranch_result(state: dict) -> dict:
+    """
+    Final stage of a multi-branch strategy scheduled with
+    add_multibranch_tasks. Returns {"narratives": [narrative_text],
+    "usage", "seconds"}, as run_mcts_strategy.
+    """
+    eg = state["eg"]
+    chain_ids = eg.gather_chain_in_chronological_order(state["node"])
+    return {
+        "narratives": ["\n".join("- " + eg.get_text(nid) for nid in chain_ids)],
+        "usage": eg.usage.snapshot(),
+        "seconds": time.monotonic() - state["start"]
+    }
+
+def run_mcts_strategy(
     stub_text: str,
     length: int,
     temperature_generate_next: float,
-    multibranch_factors: list,
-    mcts_configs: list,
+    cfg: dict,
     min_num_chains: int
-):
+) -> dict:
     """
-    Runs the entire evaluation for a single stub & narrative length:
-      1) For each 'branching_factor' in multibranch_factors, run the multi-branch baseline strategy
-      2) For each MCTS config, run MCTS
-    Returns a list of row_results dicts, one row per (strategy).
-    """
-    row_results = []
-    print(f"\n[INFO] (Thread) Stub {stub_idx} - length {length} - truncated text: {stub_text[:60]}...")
-
-    #########################
-    # 1) Multi-branch Baseline(s)
-    #########################
-    for bf in multibranch_factors:
-        # Build an event graph for this approach
-        eg_mb = EventGraph(
-            model_generate_next="gpt-4o",
-            temperature_generate_next=temperature_generate_next,
-            model_scoring="gpt-4o",
-            temperature_scoring=0.3,
-            logging_level=None
-        )
-        root_id = eg_mb.add_event_node(text=stub_text)
-
-        # Generate a chain with the multi-branch approach
-        chain_ids = generate_multibranch_chain(
-            eg=eg_mb,
-            stub_node_id=root_id,
-            narrative_length=length,
-            branching_factor=bf
-        )
-        # Build the narrative text
-        narrative_text = "\n".join("- " + eg_mb.G.nodes[nid]["text"] for nid in chain_ids)
-
-        # Judge it
-        judge_result = judge_narrative(narrative_text=narrative_text, model="o1")
-        scores = judge_result["judgement"]
-        avg_score = sum(scores.values()) / len(scores)
-
-        strategy_label = f"baseline-multibranch (N={bf})"
-        row_results.append({
-            "strategy": strategy_label,
-            "story_stub": stub_text,
-            "narrative": narrative_text,
-            "overall_quality": scores["overall_quality"],
-            "identifying_major_flaws": scores["identifying_major_flaws"],
-            "character_behavior": scores["character_behavior"],
-            "common_sense_adherence": scores["common_sense_adherence"],
-            "consistency": scores["consistency"],
-            "relatedness": scores["relatedness"],
-            "causal_temporal_relationship": scores["causal_temporal_relationship"],
-            "avg_score": avg_score,
-            "judge_comments": judge_result["narrative_comments"]
-        })
-        print(f"[INFO] (Thread) baseline-multibranch (N={bf}) done. Avg score: {avg_score:.2f}")
-
-    #########################
-    # 2) MCTS
-    #########################
-    for cfg_idx, cfg in enumerate(mcts_configs, start=1):
-        iters = cfg["iterations"]
-        max_children = cfg["max_children"]
-        scoring_depth = cfg["scoring_depth"]
-        strategy_label = f"mcts (max_children={max_children}, iterations={iters}, scoring_depth={scoring_depth})"
-
-        print(f"[INFO] (Thread) Running MCTS config {cfg_idx}/{len(mcts_configs)}: {cfg}")
-        eg_mcts = EventGraph(
-            model_generate_next="gpt-4o",
-            temperature_generate_next=temperature_generate_next,
-            model_scoring="gpt-4o",
-            temperature_scoring=0.3,
-            logging_level=None
-        )
-        mcts_root_id = eg_mcts.add_event_node(text=stub_text)
-
-        eg_mcts.run_mcts(
-            root_id=mcts_root_id,
-            max_children=max_children,
-            scoring_prompt="",
-            iterations=iters,
-            scoring_depth=scoring_depth,
-            desired_chain_length=length,
-            min_num_chains=min_num_chains
-        )
-        print("[INFO] (Thread) MCTS run complete. Gathering top paths...")
-
-        top_paths = get_top_n_paths(eg_mcts, mcts_root_id, min_num_chains)
-        judge_scores_list = []
-        judge_comments_list = []
-
-        print("[INFO] (Thread) Scoring each of the top paths with judge...")
-        for (path, path_text, path_score) in top_paths:
-            path_judge = judge_narrative(narrative_text=path_text, model="o1")
-            judge_scores_list.append(path_judge["judgement"])
-            judge_comments_list.append(path_judge["narrative_comments"])
-
-        if len(judge_scores_list) > 0:
-            sum_scores = {
-                "overall_quality": 0,
-                "identifying_major_flaws": 0,
-                "character_behavior": 0,
-                "common_sense_adherence": 0,
-                "consistency": 0,
-                "relatedness": 0,
-                "causal_temporal_relationship": 0
-            }
-            for scores_dict in judge_scores_list:
-                for k in sum_scores:
-                    sum_scores[k] += scores_dict[k]
-            for k in sum_scores:
-                sum_scores[k] /= len(judge_scores_list)
-
-            final_comments = judge_comments_list[0]
-            mcts_avg_score = sum(sum_scores.values()) / len(sum_scores)
-
-            row_results.append({
-                "strategy": strategy_label,
-                "story_stub": stub_text,
-                "narrative": top_paths[0][1],
-                "overall_quality": sum_scores["overall_quality"],
-                "identifying_major_flaws": sum_scores["identifying_major_flaws"],
-                "character_behavior": sum_scores["character_behavior"],
-                "common_sense_adherence": sum_scores["common_sense_adherence"],
-                "consistency": sum_scores["consistency"],
-                "relatedness": sum_scores["relatedness"],
-                "causal_temporal_relationship": sum_scores["causal_temporal_relationship"],
-                "avg_score": mcts_avg_score,
-                "judge_comments": final_comments
-            })
-            print(f"[INFO] (Thread) MCTS done. Avg of top {min_num_chains} paths: {mcts_avg_score:.2f}")
-
-    return row_results
+    Runs MCTS for the stub with one config.
+    Returns {"narratives": texts of the top 'min_num_chains' paths, best
+    first, "usage", "seconds"}.
+    """
+    start = time.monotonic()
+    eg_mcts = strategy_graph(temperature_generate_next)
+    mcts_root_id = eg_mcts.add_event_node(text=stub_text)
+
+    eg_mcts.run_mcts(
+        root_id=mcts_root_id,
+        max_children=cfg["max_children"],
+        scoring_prompt="",
+        iterations=cfg["iterations"],
+        scoring_depth=cfg["scoring_depth"],
+        desired_chain_length=length,
+        min_num_chains=min_num_chains
+    )
+    print("[INFO] (Thread) MCTS run complete. Gathering top paths...")
+
+    top_paths = get_top_n_paths(eg_mcts, mcts_root_id, min_num_chains)
+    return {
+        "narratives": [path_text for (path, path_text, path_score) in top_paths],
+        "usage": eg_mcts.usage.snapshot(),
+        "seconds": time.monotonic() - start
+    }
+
+def judge_one(index: int, generated: dict, cache: JudgeCache = None, ensemble: JudgeEnsemble = None):
+    """
+    Judges the index-th generated narrative with JUDGE_MODEL, or with
+    'ensemble' if given, through 'cache' if given. Returns {"result": judge
+    result, "usage", "seconds"}, or None if there is no such narrative (MCTS
+    may find fewer paths than requested).
+
+    If an identical narrative is already being judged by another task,
+    returns a Future of that dict instead, so the scheduler frees this
+    worker rather than blocking it until the other call is done.
+    """
+    if index >= len(generated["narratives"]):
+        return None
+    narrative_text = generated["narratives"][index]
+    meter = UsageMeter()
+    start = time.monotonic()
+    if cache is not None:
+        pending = cache.submit(narrative_text, model=JUDGE_MODEL, meter=meter, ensemble=ensemble)
+        if not pending.done():
+            judged = Future()
+
+            def finish(future):
+                try:
+                    judged.set_result({"result": future.result(), "usage": meter.snapshot(), "seconds": time.monotonic() - start})
+                except Exception as e:
+                    judged.set_exception(e)
+
+            pending.add_done_callback(finish)
+            return judged
+        result = pending.result()
+    elif ensemble is not None:
+        result = judge_narrative_ensemble(narrative_text, ensemble, meter=meter)
+    else:
+        result = judge_narrative(narrative_text=narrative_text, model=JUDGE_MODEL, meter=meter)
+    return {"result": result, "usage": meter.snapshot(), "seconds": time.monotonic() - start}
+
+def strategy_costs(generated: dict, judged: list) -> dict:
+    """
+    COST_KEYS columns for one strategy run from its generation and judge
+    usage snapshots.
+    """
+    gen_usage = generated["usage"]
+    score_calls = gen_usage["by_kind"].get("score", {}).get("calls", 0)
+    costs = {
+        "generate_calls": gen_usage["calls"] - score_calls,
+        "score_calls": score_calls,
+        "judge_calls": sum(j["usage"]["calls"] for j in judged),
+        "prompt_tokens": gen_usage["prompt_tokens"] + sum(j["usage"]["prompt_tokens"] for j in judged),
+        "completion_tokens": gen_usage["completion_tokens"] + sum(j["usage"]["completion_tokens"] for j in judged),
+        "cost_usd": gen_usage["cost_usd"] + sum(j["usage"]["cost_usd"] for j in judged),
+        "generate_seconds": generated["seconds"],
+        "judge_seconds": sum(j["seconds"] for j in judged)
+    }
+    return costs
+
+def combine_judgements(strategy_label: str, stub_text: str, generated: dict, judged: list):
+    """
+    Averages the judge scores of one strategy run and adds its costs. The
+    row keeps the first narrative and its comments.
+    Returns a row_results dict, or None if there is nothing to judge.
+    """
+    judged = [j for j in judged if j is not None]
+    if not judged:
+        return None
+    judge_scores_list = [j["result"]["judgement"] for j in judged]
+    judge_comments_list = [j["result"]["narrative_comments"] for j in judged]
+
+    avg_scores = {
+        k: sum(scores[k] for scores in judge_scores_list) / len(judge_scores_list)
+        for k in SCORE_KEYS
+    }
+    row = {
+        "strategy": strategy_label,
+        "story_stub": stub_text,
+        "narrative": generated["narratives"][0]
+    }
+    row.update(avg_scores)
+    row["avg_score"] = sum(avg_scores.values()) / len(avg_scores)
+    row["judge_comments"] = judge_comments_list[0]
+    row.update(strategy_costs(generated, judged))
+    return row
+
+def write_all_results_csv(path: str, rows: list):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(ALL_RESULTS_HEADER)
+        for row in rows:
+            # Rows stored before the cost columns existed leave them empty
+            writer.writerow([row.get(k, "") for k in ALL_RESULTS_HEADER])
+
+def aggregate_rows_by_strategy(rows: list) -> list:
+    """
+    Averages each score per strategy, in order of first appearance.
+    avg_score is the mean of the 7 averaged categories. Cost columns are
+    averaged over the rows that have them (empty if none do).
+    """
+    from collections import defaultdict
+    strategy_groups = defaultdict(list)
+    for row in rows:
+        strategy_groups[row["strategy"]].append(row)
+
+    aggregate_rows = []
+    for strategy, group in strategy_groups.items():
+        n = len(group)
+        agg = {"strategy": strategy}
+        for k in SCORE_KEYS:
+            agg[k] = sum(r[k] for r in group) / n
+        # average of these 7
+        agg["avg_score"] = sum(agg[k] for k in SCORE_KEYS) / 7.0
+        costed = [r for r in group if all(k in r for k in COST_KEYS)]
+        for k in COST_KEYS:
+            agg[k] = sum(r[k] for r in costed) / len(costed) if costed else ""
+        aggregate_rows.append(agg)
+    return aggregate_rows
+
+def write_aggregate_scores_csv(path: str, rows: list):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(AGGREGATE_HEADER)
+        for row in aggregate_rows_by_strategy(rows):
+            writer.writerow([row[k] for k in AGGREGATE_HEADER])
+
+def iter_stubs(stubs_file: str):
+    """
+    Reads story stubs line by line from a plain-text file (one stub per
+    line) or, for '.jsonl' files, JSON Lines whose values are either
+    strings or objects with a "stub", "story_stub" or "text" field. Blank
+    entries are skipped, and so are repeats of an earlier stub: results are
+    keyed by stub text, so a repeat would only duplicate its rows.
+    """
+    is_jsonl = stubs_file.endswith(".jsonl")
+    seen = set()
+    with open(stubs_file, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if is_jsonl:
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    record = record.get("stub") or record.get("story_stub") or record.get("text") or ""
+                line = str(record).strip()
+                if not line:
+                    continue
+            digest = hashlib.blake2b(line.encode("utf-8"), digest_size=16).digest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            yield line
+
+def parse_shard(spec: str) -> tuple:
+    """
+    Parses "i/N" (0 <= i < N) into (i, N).
+    """
+    try:
+        shard_index, num_shards = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}', expected i/N such as 0/4")
+    if num_shards < 1 or not 0 <= shard_index < num_shards:
+        raise ValueError(f"Invalid shard '{spec}', expected 0 <= i < N")
+    return shard_index, num_shards
+
+def shard_of(key: tuple, num_shards: int) -> int:
+    """
+    Stable shard assignment of a result key, the same in every process.
+    """
+    digest = hashlib.blake2b(json.dumps(list(key), ensure_ascii=False).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") % num_shards
+
+def run_config(temperature_generate_next: float, min_num_chains: int, judge_ensemble: JudgeEnsemble = None) -> dict:
+    """
+    Every setting besides the stub, length and strategy label that changes
+    what a strategy run produces. The judge cache itself does not change
+    judgements, but the prompt version its entries are keyed by does.
+    """
+    return {
+        "temperature_generate_next": temperature_generate_next,
+        "min_num_chains": min_num_chains,
+        "generate_model": GENERATE_MODEL,
+        "scoring_model": SCORING_MODEL,
+        "scoring_temperature": SCORING_TEMPERATURE,
+        "judge": judge_ensemble.label if judge_ensemble is not None else JUDGE_MODEL,
+        "judge_prompt_version": JUDGE_PROMPT_VERSION
+    }
+
+def config_id(config: dict) -> str:
+    """
+    Short stable hash of a run_config.
+    """
+    encoded = json.dumps(config, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+def result_key(stub_text: str, length: int, strategy_label: str, config: str) -> tuple:
+    """
+    Key of one finished strategy run in the result store. 'config' is the
+    config_id of the run's settings, so results made with other settings
+    are never reused.
+    """
+    return (stub_text, length, strategy_label, config)
+
+def _add_generate(generate_fn, cost: float, scheduler: TaskScheduler, key_prefix: tuple):
+    return scheduler.add_task(key_prefix + ("generate",), generate_fn, cost=cost)
+
+def _add_multibranch_generate(stub_text: str, length: int, temperature_generate_next: float, branching_factor: int, scheduler: TaskScheduler, key_prefix: tuple):
+    last_key = add_multibranch_tasks(
+        scheduler,
+        key_prefix,
+        functools.partial(strategy_graph, temperature_generate_next),
+        stub_text,
+        length,
+        branching_factor
+    )
+    return scheduler.add_task(key_prefix + ("generate",), multibranch_result, deps=[last_key], cost=0.0)
+
+def _combine_and_store(store: ResultStore, key: tuple, strategy_label: str, stub_text: str, generated: dict, *judged):
+    row = combine_judgements(strategy_label, stub_text, generated, judged)
+    if row is not None:
+        store.append(key, row)
+    return row
+
+def _write_length_results(store, length_folder: str, length: int, planned_keys: list, *judge_results):
+    """
+    Final stage for one narrative length: writes all_results.csv and
+    aggregate_scores.csv from every result in the store for 'planned_keys',
+    in that order, whether it was computed in this run or an earlier one.
+    Keys without a stored result (failed strategies) are left out.
+    'store' is a ResultStore or a plain {key: row} dict.
+    """
+    rows = [store.get(key) for key in planned_keys if key in store]
+    missing = len(planned_keys) - len(rows)
+    if missing:
+        print(f"[WARN] {missing} result(s) missing for length {length}; re-run to retry them.")
+    print("[INFO] Writing all_results.csv for length =", length)
+    all_results_path = os.path.join(length_folder, "all_results.csv")
+    write_all_results_csv(all_results_path, rows)
+    print(f"[INFO] Finished writing {all_results_path}")
+
+    agg_results_path = os.path.join(length_folder, "aggregate_scores.csv")
+    write_aggregate_scores_csv(agg_results_path, rows)
+    print(f"[INFO] Finished writing {agg_results_path}")
+    return len(rows)
 
 def run_evaluation_parallel(
     stubs_file: str,
@@ -217,196 +459,215 @@ def run_evaluation_parallel(
     mcts_configs: list,
     min_num_chains: int,
     output_dir: str = "results",
-    max_workers: int = 4
+    max_workers: int = 4,
+    judge_workers: int = 8,
+    resume: bool = True,
+    shard: tuple = None,
+    judge_cache: bool = True,
+    judge_ensemble: JudgeEnsemble = None
 ):
     """
-    Parallel version of the experiment. 
-    We create tasks for each (stub, narrative_length) pair, run them in threads, 
-    gather the row-level results, and write CSVs. Logs total time at the end.
-
-    For each stub & length:
-      1) Run the multi-branch baseline approach for each factor in `multibranch_factors`.
-         (N=1 corresponds to the old single-branch baseline)
-      2) Run each MCTS configuration
-      3) Combine all results, write CSV
+    Parallel version of the experiment. Logs total time at the end.
+
+    Every (stub, length, strategy) is split into stages that form one task
+    graph run on a shared pool of 'max_workers' threads, with judge calls
+    on their own pool of 'judge_workers' threads:
+      generate (multi-branch baseline for each factor in `multibranch_factors`,
+      N=1 being the old single-branch baseline, with every LLM call of a
+      step as its own task (see add_multibranch_tasks), or one MCTS
+      configuration)
+        -> judge (one o1 task per narrative, all started as soon as the
+           narratives exist, so a strategy waits for its slowest judgement
+           rather than the sum of them)
+        -> combine (averages the judgements and appends the row to the result store)
+        -> aggregate (one per length: writes all_results.csv and aggregate_scores.csv)
+    Lengths are not processed one after another, and a slow judge call only
+    delays its own strategy. Ready tasks on the longest remaining path run first.
+
+    Every judged result is appended to '<output_dir>/results.jsonl' as soon
+    as it exists, and the CSVs are always built from that store. With
+    'resume' (the default), strategies already in the store are not run
+    again, so a crashed run continues where it stopped; resume=False
+    recomputes everything (newer results replace older ones).
+
+    'shard' = (i, N) runs only the (stub, length, strategy) units that
+    shard_of assigns to shard i of N, into its own store file
+    'results.shard-i-of-N.jsonl', and writes no CSVs. Run every shard (in
+    separate processes or on separate machines sharing 'output_dir'), then
+    merge_shard_results to write the CSVs. The whole task graph of a run is
+    built before it starts, so memory grows with the number of stubs;
+    shards keep each process small.
+
+    Results are keyed by stub, length, strategy and a hash of run_config
+    (temperature, min_num_chains, models, judge and judge prompt version):
+    results stored with different settings are ignored and recomputed.
+
+    With 'judge_cache' (the default), judgements are memoized in
+    '<output_dir>/judge_cache.jsonl' (per shard:
+    'judge_cache.shard-i-of-N.jsonl') by model, normalized narrative and
+    judge prompt version, so a narrative already judged in this or an
+    earlier run, e.g. a top path repeated across strategies or a
+    recomputed strategy that came out the same, costs no o1 call.
+
+    'judge_ensemble' replaces the single o1 judge with a JudgeEnsemble that
+    asks further judges only while the narrative's score is uncertain.
     """
 
     start_time = time.time()  # start timer
 
-    print(f"[INFO] Reading story stubs from file: {stubs_file}")
-    with open(stubs_file, "r", encoding="utf-8") as f:
-        stubs = [line.strip() for line in f if line.strip()]
+    if shard is not None:
+        shard_index, num_shards = shard
+        store_path = os.path.join(output_dir, f"results.shard-{shard_index}-of-{num_shards}.jsonl")
+        cache_path = os.path.join(output_dir, f"judge_cache.shard-{shard_index}-of-{num_shards}.jsonl")
+    else:
+        store_path = os.path.join(output_dir, "results.jsonl")
+        cache_path = os.path.join(output_dir, "judge_cache.jsonl")
 
-    print(f"[INFO] Loaded {len(stubs)} stubs.")
+    print(f"[INFO] Reading story stubs from file: {stubs_file}")
     print(f"[INFO] Narrative lengths to process: {narrative_lengths}")
     print(f"[INFO] Multi-branch factors: {multibranch_factors}")
     print(f"[INFO] MCTS configurations: {mcts_configs}")
     print(f"[INFO] min_num_chains = {min_num_chains}")
     print(f"[INFO] Results will be saved to: {output_dir}")
-    print(f"[INFO] max_workers = {max_workers}")
-
-    for length in narrative_lengths:
-        print(f"\n[INFO] === Processing narrative length: {length} (parallel) ===")
-        length_folder = os.path.join(output_dir, str(length))
-        os.makedirs(length_folder, exist_ok=True)
-
-        row_results_for_length = []
-
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        futures = []
-        # 1) Submit parallel tasks for each stub
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            for stub_idx, stub_text in enumerate(stubs, start=1):
-                fut = executor.submit(
-                    process_single_stub_length,
-                    stub_idx,
-                    stub_text,
-                    length,
-                    temperature_generate_next,
-                    multibranch_factors,
-                    mcts_configs,
+    print(f"[INFO] max_workers = {max_workers}, judge_workers = {judge_workers}")
+    if judge_ensemble is not None:
+        print(f"[INFO] Judging with {judge_ensemble.label}")
+    if shard is not None:
+        print(f"[INFO] Running shard {shard_index}/{num_shards}")
+
+    config = config_id(run_config(temperature_generate_next, min_num_chains, judge_ensemble))
+    store = ResultStore(store_path)
+    print(f"[INFO] Result store {store_path} holds {len(store)} results (resume={resume}).")
+    stale = sum(1 for key in store.keys() if key[-1] != config)
+    if stale:
+        print(f"[INFO] {stale} stored result(s) were made with other settings (config {config} now) and will not be reused.")
+    cache = JudgeCache(cache_path) if judge_cache else None
+
+    scheduler = TaskScheduler(max_workers=max_workers, pools={"judge": judge_workers})
+    reused = 0
+    num_stubs = 0
+    combine_keys = {length: [] for length in narrative_lengths}
+    planned_keys = {length: [] for length in narrative_lengths}
+    for stub_idx, stub_text in enumerate(iter_stubs(stubs_file), start=1):
+        num_stubs += 1
+        for length in narrative_lengths:
+            # (label, function adding the generate stage and returning its key, narratives to judge)
+            strategies = []
+            for bf in multibranch_factors:
+                strategies.append((
+                    multibranch_label(bf),
+                    functools.partial(_add_multibranch_generate, stub_text, length, temperature_generate_next, bf),
+                    1
+                ))
+            for cfg in mcts_configs:
+                strategies.append((
+                    mcts_label(cfg),
+                    functools.partial(
+                        _add_generate,
+                        functools.partial(run_mcts_strategy, stub_text, length, temperature_generate_next, cfg, min_num_chains),
+                        GENERATE_CALL_COST * cfg["iterations"] * (1 + cfg["scoring_depth"])
+                    ),
                     min_num_chains
-                )
-                futures.append(fut)
+                ))
 
-            # 2) Collect results from each future
-            for fut in as_completed(futures):
-                try:
-                    stub_rows = fut.result()
-                    row_results_for_length.extend(stub_rows)
-                except Exception as e:
-                    print(f"[ERROR] A thread crashed: {repr(e)}")
-                    # Optionally record partial/failure row:
-                    row_results_for_length.append({
-                        "strategy": "baseline-multibranch (N=??)",
-                        "story_stub": "<Error occurred>",
-                        "narrative": "<No narrative>",
-                        # fill other fields as needed
-                        "avg_score": 0,
-                        "judge_comments": f"Error: {e}"
-                    })
+            for strategy_label, add_generate, n_judged in strategies:
+                key = result_key(stub_text, length, strategy_label, config)
+                if shard is not None and shard_of(key, num_shards) != shard_index:
                     continue
-
-        # Now we have row_results_for_length for all stubs at this length
-        # Write them to CSV
-        print("[INFO] Writing all_results.csv for length =", length)
-        all_results_path = os.path.join(length_folder, "all_results.csv")
-        with open(all_results_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            header = [
-                "strategy",
-                "story_stub",
-                "narrative",
-                "overall_quality",
-                "identifying_major_flaws",
-                "character_behavior",
-                "common_sense_adherence",
-                "consistency",
-                "relatedness",
-                "causal_temporal_relationship",
-                "avg_score",
-                "judge_comments",
-            ]
-            writer.writerow(header)
-            for row in row_results_for_length:
-                writer.writerow([
-                    row["strategy"],
-                    row["story_stub"],
-                    row["narrative"],
-                    row["overall_quality"],
-                    row["identifying_major_flaws"],
-                    row["character_behavior"],
-                    row["common_sense_adherence"],
-                    row["consistency"],
-                    row["relatedness"],
-                    row["causal_temporal_relationship"],
-                    row["avg_score"],
-                    row["judge_comments"]
-                ])
-        print(f"[INFO] Finished writing {all_results_path}")
-
-        # ----- Write aggregate_scores.csv -----
-        from collections import defaultdict
-        strategy_groups = defaultdict(list)
-        for row in row_results_for_length:
-            strategy_groups[row["strategy"]].append(row)
-
-        aggregate_rows = []
-        for strategy, rows in strategy_groups.items():
-            n = len(rows)
-            if n == 0:
-                continue
-            sum_overall_quality = sum(r["overall_quality"] for r in rows)
-            sum_identifying_major_flaws = sum(r["identifying_major_flaws"] for r in rows)
-            sum_character_behavior = sum(r["character_behavior"] for r in rows)
-            sum_common_sense_adherence = sum(r["common_sense_adherence"] for r in rows)
-            sum_consistency = sum(r["consistency"] for r in rows)
-            sum_relatedness = sum(r["relatedness"] for r in rows)
-            sum_causal = sum(r["causal_temporal_relationship"] for r in rows)
-
-            avg_overall_quality = sum_overall_quality / n
-            avg_identifying_major_flaws = sum_identifying_major_flaws / n
-            avg_character_behavior = sum_character_behavior / n
-            avg_common_sense_adherence = sum_common_sense_adherence / n
-            avg_consistency = sum_consistency / n
-            avg_relatedness = sum_relatedness / n
-            avg_causal = sum_causal / n
-
-            # average of these 7
-            overall_avg = (
-                avg_overall_quality
-                + avg_identifying_major_flaws
-                + avg_character_behavior
-                + avg_common_sense_adherence
-                + avg_consistency
-                + avg_relatedness
-                + avg_causal
-            ) / 7.0
-
-            aggregate_rows.append({
-                "strategy": strategy,
-                "overall_quality": avg_overall_quality,
-                "identifying_major_flaws": avg_identifying_major_flaws,
-                "character_behavior": avg_character_behavior,
-                "common_sense_adherence": avg_common_sense_adherence,
-                "consistency": avg_consistency,
-                "relatedness": avg_relatedness,
-                "causal_temporal_relationship": avg_causal,
-                "avg_score": overall_avg
-            })
-
-        agg_results_path = os.path.join(length_folder, "aggregate_scores.csv")
-        with open(agg_results_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.writer(f)
-            header = [
-                "strategy",
-                "overall_quality",
-                "identifying_major_flaws",
-                "character_behavior",
-                "common_sense_adherence",
-                "consistency",
-                "relatedness",
-                "causal_temporal_relationship",
-                "avg_score"
-            ]
-            writer.writerow(header)
-            for row in aggregate_rows:
-                writer.writerow([
-                    row["strategy"],
-                    row["overall_quality"],
-                    row["identifying_major_flaws"],
-                    row["character_behavior"],
-                    row["common_sense_adherence"],
-                    row["consistency"],
-                    row["relatedness"],
-                    row["causal_temporal_relationship"],
-                    row["avg_score"],
-                ])
-        print(f"[INFO] Finished writing {agg_results_path}")
+                planned_keys[length].append(key)
+                if resume and key in store:
+                    reused += 1
+                    continue
+                generate_key = add_generate(scheduler, (stub_idx, length, strategy_label))
+                judge_keys = [
+                    scheduler.add_task(
+                        (stub_idx, length, strategy_label, f"judge[{i}]"),
+                        functools.partial(judge_one, i, cache=cache, ensemble=judge_ensemble),
+                        deps=[generate_key],
+                        cost=JUDGE_CALL_COST,
+                        pool="judge"
+                    )
+                    for i in range(n_judged)
+                ]
+                combine_keys[length].append(scheduler.add_task(
+                    (stub_idx, length, strategy_label, "combine"),
+                    functools.partial(_combine_and_store, store, key, strategy_label, stub_text),
+                    deps=[generate_key] + judge_keys,
+                    cost=0.0
+                ))
+
+    print(f"[INFO] Loaded {num_stubs} stubs.")
+
+    # A shard only produces its part of the result store; merge_shard_results writes the CSVs
+    if shard is None:
+        for length in narrative_lengths:
+            length_folder = os.path.join(output_dir, str(length))
+            os.makedirs(length_folder, exist_ok=True)
+            scheduler.add_task(
+                ("*", length, "*", "aggregate"),
+                functools.partial(_write_length_results, store, length_folder, length, planned_keys[length]),
+                deps=combine_keys[length],
+                cost=0.0,
+                allow_failed_deps=True
+            )
+
+    print(f"[INFO] Reusing {reused} stored results. Running {len(scheduler)} tasks on {max_workers} + {judge_workers} (judge) workers...")
+    try:
+        scheduler.run()
+    finally:
+        store.close()
+        if cache is not None:
+            cache.close()
+    for key in scheduler.skipped:
+        print(f"[WARN] Skipped {key} because a task it depends on failed.")
+    print(
+        f"[INFO] Tasks: {scheduler.stats['succeeded']} succeeded, {scheduler.stats['failed']} failed, "
+        f"{scheduler.stats['skipped']} skipped. Worker utilization: {scheduler.stats['worker_utilization']:.0%}"
+    )
+    if cache is not None:
+        print(f"[INFO] Judge cache: {cache.summary()}")
 
     elapsed = time.time() - start_time
     print(f"[INFO] All evaluations are complete. Total time elapsed: {elapsed:.2f} seconds.")
 
+def merge_shard_results(
+    stubs_file: str,
+    narrative_lengths: list,
+    temperature_generate_next: float,
+    multibranch_factors: list,
+    mcts_configs: list,
+    min_num_chains: int,
+    output_dir: str = "results",
+    judge_ensemble: JudgeEnsemble = None
+):
+    """
+    Merges every result store in 'output_dir' (the shard stores and any
+    single-process results.jsonl) and writes all_results.csv and
+    aggregate_scores.csv per length. Rows are ordered by stub, then
+    strategy, exactly as a single-process run with the same settings
+    writes them, so the output does not depend on how the work was split.
+    The settings must be those the shards ran with; results made with
+    other settings are left out.
+    """
+    store_paths = sorted(glob.glob(os.path.join(output_dir, "results*.jsonl")))
+    merged = {}
+    for path in store_paths:
+        merged.update(load_results(path))
+    print(f"[INFO] Merged {len(merged)} results from {len(store_paths)} store file(s) in {output_dir}")
+
+    config = config_id(run_config(temperature_generate_next, min_num_chains, judge_ensemble))
+    labels = [multibranch_label(bf) for bf in multibranch_factors] + [mcts_label(cfg) for cfg in mcts_configs]
+    planned_keys = {length: [] for length in narrative_lengths}
+    for stub_text in iter_stubs(stubs_file):
+        for length in narrative_lengths:
+            for strategy_label in labels:
+                planned_keys[length].append(result_key(stub_text, length, strategy_label, config))
+
+    for length in narrative_lengths:
+        length_folder = os.path.join(output_dir, str(length))
+        os.makedirs(length_folder, exist_ok=True)
+        _write_length_results(merged, length_folder, length, planned_keys[length])
+
 
 if __name__ == "__main__":
     # Choose which type of evaluation to run
@@ -415,21 +676,21 @@ if __name__ == "__main__":
     # Default evaluation type
     evaluation_type = "standard"
     
-    # Check for command line args
-    if len(sys.argv) > 1:
-        evaluation_type = sys.argv[1]
+    # Check for command line args:
+    #   python run_evaluation.py [standard|merge|lexical_diversity] [--shard i/N]
+    args = sys.argv[1:]
+    shard = None
+    if "--shard" in args:
+        pos = args.index("--shard")
+        shard = parse_shard(args[pos + 1])
+        del args[pos:pos + 2]
+    if args:
+        evaluation_type = args[0]
     
     if evaluation_type == "lexical_diversity":
-        # Import necessary functions
-        from download_nltk_resources import download_nltk_resources
+        # Import necessary functions (NLTK data is optional; see download_nltk_resources.py)
         from lexical_diversity_evaluation import run_lexical_diversity_evaluation
         
-        # Make sure NLTK resources are available before running the evaluation
-        print("[INFO] Checking NLTK resources...")
-        if not download_nltk_resources():
-            print("[ERROR] Failed to verify all required NLTK resources. The evaluation may fail.")
-            print("[INFO] Attempting to continue anyway...")
-        
         # Example usage for lexical diversity evaluation
         run_lexical_diversity_evaluation(
             stub_file="stubs.txt",
@@ -455,14 +716,33 @@ if __name__ == "__main__":
         #     {"iterations": 60, "max_children": 3, "scoring_depth": 1},
         #     {"iterations": 100, "max_children": 6, "scoring_depth": 3},
         # ]
-
-        run_evaluation_parallel(
-            stubs_file="stubs.txt",
-            narrative_lengths=[10],
-            temperature_generate_next=1.3,
-            multibranch_factors=[3, 6],
-            mcts_configs=mcts_configs,
-            min_num_chains=2,
-            output_dir="results_multibranch",
-            max_workers=10
-        )
+        stubs_file = "stubs.txt"
+        narrative_lengths = [10]
+        temperature_generate_next = 1.3
+        multibranch_factors = [3, 6]
+        min_num_chains = 2
+        output_dir = "results_multibranch"
+
+        if evaluation_type == "merge":
+            # Combine the result stores of all shards into the CSVs
+            merge_shard_results(
+                stubs_file=stubs_file,
+                narrative_lengths=narrative_lengths,
+                temperature_generate_next=temperature_generate_next,
+                multibranch_factors=multibranch_factors,
+                mcts_configs=mcts_configs,
+                min_num_chains=min_num_chains,
+                output_dir=output_dir
+            )
+        else:
+            run_evaluation_parallel(
+                stubs_file=stubs_file,
+                narrative_lengths=narrative_lengths,
+                temperature_generate_next=temperature_generate_next,
+                multibranch_factors=multibranch_factors,
+                mcts_configs=mcts_configs,
+                min_num_chains=min_num_chains,
+                output_dir=output_dir,
+                max_workers=10,
+                shard=shard
+            )
@@ -3,14 +3,7 @@
 import argparse
 import sys
 import os
-from download_nltk_resources import download_nltk_resources
-from lexical_diversity_evaluation import run_lexical_diversity_evaluation
-
-# Make sure NLTK resources are available before running the evaluation
-print("[INFO] Checking NLTK resources...")
-if not download_nltk_resources():
-    print("[ERROR] Failed to verify all required NLTK resources. The evaluation may fail.")
-    print("[INFO] Attempting to continue anyway...")
+from lexical_diversity_evaluation import ensure_nltk_resources, run_lexical_diversity_evaluation
 
 def parse_arguments():
     parser = argparse.ArgumentParser(description="Run lexical diversity evaluation")
@@ -48,11 +41,17 @@ def parse_arguments():
     parser.add_argument("--max-workers", type=int, default=4,
                         help="Maximum number of parallel workers to use")
     
+    parser.add_argument("--download-nltk", action="store_true",
+                        help="Download missing NLTK tokenizer data first (otherwise a built-in tokenizer is used)")
+    
     return parser.parse_args()
 
 def main():
     args = parse_arguments()
     
+    if args.download_nltk:
+        ensure_nltk_resources(download=True)
+    
     mcts_config = {
         "max_children": args.mcts_children,
         "iterations": args.mcts_iterations
@@ -0,0 +1,181 @@
+import heapq
+import itertools
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+class _Task:
+    __slots__ = ("key", "fn", "deps", "cost", "allow_failed_deps", "pool", "dependents", "waiting", "rank", "order")
+
+    def __init__(self, key, fn, deps, cost, allow_failed_deps, pool, order):
+        self.key = key
+        self.fn = fn
+        self.deps = list(deps)
+        self.cost = cost
+        self.allow_failed_deps = allow_failed_deps
+        self.pool = pool
+        self.dependents = []
+        self.waiting = len(self.deps)
+        self.rank = None
+        self.order = order
+
+class TaskScheduler:
+    """
+    Runs a DAG of tasks on one shared thread pool.
+
+    A task runs as soon as all of its dependencies have finished and a
+    worker is free; it is called with the dependency results as positional
+    arguments, in the order the dependencies were listed. When more tasks
+    are ready than there are free workers, the one with the longest
+    remaining critical path (its own 'cost' plus the costliest chain of
+    dependents) goes first, so long generate -> judge chains start early
+    instead of queueing behind short ones.
+
+    If a task raises, its error is recorded and every task depending on
+    it (directly or not) is skipped, except tasks added with
+    allow_failed_deps=True, which still run and receive None in place of
+    the missing result. Unrelated tasks keep running.
+
+    A task may return a concurrent.futures.Future instead of a value, e.g.
+    to wait for a call another task already has in flight. Its worker is
+    freed at once, and the task finishes with the Future's result (or
+    fails with its exception) when that resolves.
+
+    'pools' ({name: workers}) adds named pools next to the default one of
+    'max_workers' threads. Tasks added with pool=name only run there, so
+    e.g. slow judge calls neither wait behind nor hold up the workers
+    generating narratives.
+    """
+
+    def __init__(self, max_workers: int = 4, pools: dict = None):
+        self.max_workers = max_workers
+        self.pool_sizes = {None: max_workers}
+        self.pool_sizes.update(pools or {})
+        for pool, size in self.pool_sizes.items():
+            if size < 1:
+                raise ValueError(f"Pool {pool!r} needs at least one worker, got {size}")
+        self._tasks = {}
+        self._counter = itertools.count()
+        self.results = {}
+        self.errors = {}
+        self.skipped = []
+        self.stats = {}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def add_task(self, key, fn, deps=(), cost: float = 1.0, allow_failed_deps: bool = False, pool: str = None):
+        """
+        Registers 'fn' under 'key' (any hashable). 'deps' are keys of tasks
+        added earlier. 'cost' is a relative duration estimate used only for
+        prioritisation. 'pool' names the pool to run on (None: the default
+        pool). Returns 'key'.
+        """
+        if key in self._tasks:
+            raise ValueError(f"Duplicate task key: {key!r}")
+        if pool not in self.pool_sizes:
+            raise ValueError(f"Task {key!r} uses unknown pool {pool!r}")
+        for dep in deps:
+            if dep not in self._tasks:
+                raise ValueError(f"Task {key!r} depends on unknown task {dep!r}")
+        task = _Task(key, fn, deps, cost, allow_failed_deps, pool, next(self._counter))
+        for dep in task.deps:
+            self._tasks[dep].dependents.append(task)
+        self._tasks[key] = task
+        return key
+
+    def _compute_ranks(self):
+        # Dependencies are always added first, so reverse insertion order is
+        # a reverse topological order
+        for task in reversed(list(self._tasks.values())):
+            downstream = max((t.rank for t in task.dependents), default=0.0)
+            task.rank = task.cost + downstream
+
+    def _release(self, task: _Task, ready: dict):
+        task.waiting -= 1
+        if task.waiting == 0:
+            heapq.heappush(ready[task.pool], (-task.rank, task.order, task))
+
+    def _skip_dependents(self, task: _Task, ready: dict):
+        stack = list(task.dependents)
+        while stack:
+            t = stack.pop()
+            if t.waiting <= 0:
+                continue
+            if t.allow_failed_deps:
+                self._release(t, ready)
+                continue
+            # Mark as never runnable
+            t.waiting = -1
+            self.skipped.append(t.key)
+            stack.extend(t.dependents)
+
+    def run(self) -> dict:
+        """
+        Runs every registered task. Returns {key: result} for the tasks
+        that succeeded; failures are in self.errors ({key: repr(exc)}),
+        skipped tasks in self.skipped and pool statistics in self.stats.
+        """
+        self._compute_ranks()
+        ready = {pool: [] for pool in self.pool_sizes}
+        for task in self._tasks.values():
+            if task.waiting == 0:
+                heapq.heappush(ready[task.pool], (-task.rank, task.order, task))
+
+        start = time.monotonic()
+        busy_seconds = 0.0
+        # future -> (task, True if it holds a worker of task.pool)
+        running = {}
+        in_use = {pool: 0 for pool in self.pool_sizes}
+        executors = {pool: ThreadPoolExecutor(max_workers=size) for pool, size in self.pool_sizes.items()}
+        try:
+            while running or any(ready.values()):
+                for pool, size in self.pool_sizes.items():
+                    while ready[pool] and in_use[pool] < size:
+                        _, _, task = heapq.heappop(ready[pool])
+                        args = [self.results.get(dep) for dep in task.deps]
+                        running[executors[pool].submit(self._timed_call, task.fn, args)] = (task, True)
+                        in_use[pool] += 1
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    task, pooled = running.pop(future)
+                    try:
+                        if pooled:
+                            in_use[task.pool] -= 1
+                            result, seconds = future.result()
+                            busy_seconds += seconds
+                        else:
+                            result = future.result()
+                    except Exception as e:
+                        self.errors[task.key] = repr(e)
+                        print(f"[ERROR] Task {task.key} failed: {repr(e)}")
+                        self._skip_dependents(task, ready)
+                        continue
+                    if isinstance(result, Future):
+                        # Deferred: finishes when 'result' resolves, without a worker
+                        running[result] = (task, False)
+                        continue
+                    self.results[task.key] = result
+                    for t in task.dependents:
+                        if t.waiting > 0:
+                            self._release(t, ready)
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+
+        wall_seconds = time.monotonic() - start
+        self.stats = {
+            "tasks": len(self._tasks),
+            "succeeded": len(self.results),
+            "failed": len(self.errors),
+            "skipped": len(self.skipped),
+            "wall_seconds": wall_seconds,
+            "worker_utilization": busy_seconds / (wall_seconds * sum(self.pool_sizes.values())) if wall_seconds > 0 else 0.0
+        }
+        return self.results
+
+    @staticmethod
+    def _timed_call(fn, args):
+        t0 = time.monotonic()
+        result = fn(*args)
+        return result, time.monotonic() - t0
@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+EXPERIMENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, EXPERIMENTS_DIR)
+sys.path.insert(0, os.path.join(EXPERIMENTS_DIR, "benchmarks"))
+
+import llm_util
+from fake_llm import FakeLLM
+
+@pytest.fixture
+def fake_llm():
+    """
+    Routes every LLM call through a deterministic FakeLLM for the test.
+    """
+    llm = FakeLLM(seed=0)
+    previous = llm_util.set_llm_backend(llm)
+    try:
+        yield llm
+    finally:
+        llm_util.set_llm_backend(previous)
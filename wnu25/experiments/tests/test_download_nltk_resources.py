@@ -0,0 +1,23 @@
+import nltk
+
+import download_nltk_resources
+
+def _installed(monkeypatch, tmp_path, paths):
+    def find(path):
+        if path not in paths:
+            raise LookupError(path)
+        return path
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(nltk.data, "find", find)
+    monkeypatch.setattr(nltk, "download", lambda *args, **kwargs: False)
+
+def test_missing_optional_resources_do_not_fail(monkeypatch, tmp_path):
+    _installed(monkeypatch, tmp_path, set(download_nltk_resources.REQUIRED_RESOURCES.values()))
+
+    assert download_nltk_resources.download_nltk_resources(download_all=True)
+
+def test_missing_tokenizer_data_fails(monkeypatch, tmp_path):
+    _installed(monkeypatch, tmp_path, set(download_nltk_resources.OPTIONAL_RESOURCES.values()))
+
+    assert not download_nltk_resources.download_nltk_resources()
@@ -0,0 +1,124 @@
+import csv
+
+from eventgraph import EventGraph
+
+def _graph():
+    return EventGraph(logging_level=None)
+
+def test_single_node_tree_has_no_paths(tmp_path):
+    eg = _graph()
+    root_id = eg.add_event_node(text="A lone stub.")
+
+    assert list(eg.iter_scored_paths(root_id)) == []
+    assert eg.get_all_root_to_leaf_paths(root_id) == []
+    assert eg._count_paths_of_length(root_id, 1) == 0
+
+    csv_path = tmp_path / "paths.csv"
+    eg.export_mcts_paths_as_csv(root_id, str(csv_path))
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [["Rank", "Path Score", "Path (Node IDs)", "Path (Event Text)"]]
+
+def test_paths_are_ordered_by_leaf():
+    eg = _graph()
+    root_id = eg.add_event_node(text="Stub.")
+    a = eg.add_event_node(text="A.")
+    b = eg.add_event_node(text="B.")
+    c = eg.add_event_node(text="C.")
+    eg.G.add_edge(root_id, a)
+    eg.G.add_edge(root_id, b)
+    eg.G.add_edge(a, c)
+
+    assert eg.get_all_root_to_leaf_paths(root_id) == [[root_id, b], [root_id, a, c]]
+    assert eg._count_paths_of_length(root_id, 3) == 1
+
+def test_speculative_buffers_stay_bounded(fake_llm):
+    eg = EventGraph(model_generate_next="gpt-4o", model_scoring="gpt-4o", logging_level=None)
+    root_id = eg.add_event_node(text="A lighthouse keeper finds a message in a bottle.")
+    max_children = 2
+    width = 2
+    cap = EventGraph.SPECULATIVE_BUFFER_PER_WORKER * width
+    sizes = []
+
+    def check(event):
+        buffered = eg._speculative_children
+        sizes.append(len(buffered))
+        for node_id in buffered:
+            # Nothing stays buffered on a fully expanded node
+            assert len(eg.get_children(node_id)) < max_children
+
+    eg.run_mcts(
+        root_id=root_id,
+        max_children=max_children,
+        scoring_prompt="",
+        iterations=150,
+        scoring_depth=1,
+        rollout_depth=0,
+        speculation_width=width,
+        on_iteration=check
+    )
+
+    assert len(sizes) == 150
+    assert max(sizes) <= cap
+    assert eg.speculation_stats["used"] > 0
+    assert len(eg._speculative_children) <= cap
+
+def test_best_path_after_a_budget_stop_reaches_the_frontier(fake_llm):
+    eg = EventGraph(model_generate_next="gpt-4o", model_scoring="gpt-4o", logging_level=None)
+    root_id = eg.add_event_node(text="A lighthouse keeper finds a message in a bottle.")
+    summary = eg.run_mcts(
+        root_id=root_id,
+        max_children=2,
+        scoring_prompt="",
+        iterations=50,
+        scoring_depth=1,
+        rollout_depth=0,
+        max_tokens=300
+    )
+
+    path, bullet_str = eg.get_best_path(root_id)
+    assert summary["stop_reason"] == "tokens"
+    assert len(path) > 1
+    assert eg.get_children(path[-1]) == []
+    assert bullet_str.count("\n- ") == len(path) - 1
+
+def _chain(eg, length):
+    node_ids = [eg.add_event_node(text="Stub.")]
+    for i in range(1, length):
+        node_ids.append(eg.add_event_node(text=f"Event {i}."))
+        eg.G.add_edge(node_ids[-2], node_ids[-1])
+    return node_ids
+
+def test_chain_summaries_are_cached_per_node(fake_llm):
+    eg = EventGraph(model_generate_next="gpt-4o", model_scoring="gpt-4o", logging_level=None, context_window=2)
+    node_ids = _chain(eg, 5)
+
+    chain_texts, _ = eg.next_event_context(node_ids[-1])
+    assert fake_llm.calls == 3
+    assert chain_texts[0].startswith("(Summary of earlier events)")
+    assert chain_texts[1:] == ["Event 3.", "Event 4."]
+    assert all(eg.G.nodes[n].get("chain_summary_id") is not None for n in node_ids[:3])
+
+    # Reused as is, and only extended by the events that left the window
+    assert eg.next_event_context(node_ids[-1]) == (chain_texts, [])
+    assert fake_llm.calls == 3
+    leaf_id = eg.add_event_node(text="Event 5.")
+    eg.G.add_edge(node_ids[-1], leaf_id)
+    eg.next_event_context(leaf_id)
+    assert fake_llm.calls == 4
+
+def test_context_stats_count_only_prompts_of_attached_children(fake_llm):
+    eg = EventGraph(model_generate_next="gpt-4o", model_scoring="gpt-4o", logging_level=None, context_window=3)
+    root_id = eg.add_event_node(text="A lighthouse keeper finds a message in a bottle.")
+    eg.run_mcts(
+        root_id=root_id,
+        max_children=2,
+        scoring_prompt="",
+        iterations=40,
+        scoring_depth=1,
+        rollout_depth=0,
+        speculation_width=2
+    )
+
+    # Every node but the root was attached by an expansion, speculative or not
+    assert eg.speculation_stats["launched"] > eg.speculation_stats["used"] > 0
+    assert eg.context_stats["prompts"] == eg.G.number_of_nodes() - 1
@@ -0,0 +1,65 @@
+import llm_util
+from eventgraph import EventGraph
+from fake_llm import FakeLLM
+from forest import MCTSForest
+
+def _add_trees(forest, count, **settings):
+    graphs = []
+    for k in range(count):
+        eg = EventGraph(model_generate_next="gpt-4o", model_scoring="gpt-4o", logging_level=None)
+        root_id = eg.add_event_node(text=f"Stub number {k} of the forest.")
+        settings.setdefault("iterations", 3)
+        forest.add_tree(eg, root_id, max_children=2, rollout_depth=0, **settings)
+        graphs.append((eg, root_id))
+    return graphs
+
+def test_iterations_are_dispatched_round_robin(fake_llm):
+    order = []
+    forest = MCTSForest(max_concurrent_requests=1, max_in_flight_per_tree=1, on_iteration=lambda index, event: order.append(index))
+    _add_trees(forest, 3)
+    summaries = forest.run()
+
+    assert order == [0, 1, 2] * 3
+    assert [s["iterations_completed"] for s in summaries] == [3, 3, 3]
+
+def test_requests_of_all_trees_share_the_pool(fake_llm):
+    forest = MCTSForest(max_concurrent_requests=4, max_in_flight_per_tree=2)
+    graphs = _add_trees(forest, 3, iterations=5)
+    summaries = forest.run()
+
+    assert all(s["iterations_completed"] == 5 and not s["errors"] for s in summaries)
+    assert forest.stats["requests"] == fake_llm.calls
+    assert 1 < forest.stats["peak_in_flight"] <= 4
+    assert all(eg.get_children(root_id) for eg, root_id in graphs)
+
+def test_early_stop_is_per_tree(fake_llm):
+    forest = MCTSForest(max_concurrent_requests=2, max_in_flight_per_tree=1)
+    _add_trees(forest, 1, iterations=6, desired_chain_length=2, min_num_chains=1)
+    _add_trees(forest, 1, iterations=6)
+    stopped, full = forest.run()
+
+    assert stopped["stop_reason"] == "early_stop"
+    assert stopped["iterations_completed"] == 1
+    assert full["stop_reason"] == "iterations"
+    assert full["iterations_completed"] == 6
+
+def test_a_failing_tree_does_not_stall_the_others():
+    fake = FakeLLM(seed=0)
+
+    def backend(prompt, **kwargs):
+        if "Stub number 0" in prompt:
+            raise RuntimeError("broken tree")
+        return fake(prompt, **kwargs)
+
+    previous = llm_util.set_llm_backend(backend)
+    try:
+        forest = MCTSForest(max_concurrent_requests=2, max_in_flight_per_tree=2)
+        _add_trees(forest, 3, iterations=4)
+        broken, *others = forest.run()
+    finally:
+        llm_util.set_llm_backend(previous)
+
+    assert broken["iterations_completed"] == 0
+    assert broken["errors"] and all("broken tree" in e for e in broken["errors"])
+    assert [s["iterations_completed"] for s in others] == [4, 4]
+    assert not any(s["errors"] for s in others)
@@ -0,0 +1,68 @@
+import functools
+import threading
+
+import pytest
+
+import llm_util
+from fake_llm import FakeLLM
+from judge import JudgeCache, JudgeEnsemble
+from run_evaluation import judge_one
+from task_scheduler import TaskScheduler
+
+NARRATIVE = "- A knight rides out.\n- The dragon is asleep."
+
+def test_cache_hits_and_normalization(fake_llm):
+    cache = JudgeCache()
+    first = cache.judge(NARRATIVE, model="o1")
+    again = cache.judge("- A knight   rides out.\n\n- The dragon is asleep.  ", model="o1")
+
+    assert again == first
+    assert fake_llm.calls == 1
+    assert cache.stats == {"hits": 1, "deduplicated": 0, "judged": 1, "llm_calls": 1}
+
+def test_ensemble_calls_are_counted(fake_llm):
+    cache = JudgeCache()
+    cache.judge(NARRATIVE, ensemble=JudgeEnsemble(min_judges=3, max_judges=3))
+
+    assert cache.stats["judged"] == 1
+    assert cache.stats["llm_calls"] == 3 == fake_llm.calls
+
+def test_ensemble_stops_after_min_judges_when_they_agree(fake_llm):
+    result, ok = JudgeEnsemble(tolerance=100).judge(NARRATIVE)
+
+    assert ok
+    assert result["ensemble"]["judgements"] == 3
+    assert result["ensemble"]["converged"]
+
+@pytest.mark.parametrize("min_judges, max_judges", [(0, 3), (4, 3), (1, 0)])
+def test_ensemble_rejects_invalid_judge_counts(min_judges, max_judges):
+    with pytest.raises(ValueError):
+        JudgeEnsemble(min_judges=min_judges, max_judges=max_judges)
+
+def test_duplicates_do_not_hold_workers():
+    release = threading.Event()
+    fake = FakeLLM()
+
+    def backend(prompt, model="gpt-4o", **kwargs):
+        # The first judge call only returns once the probe task has run
+        assert release.wait(5), "a worker stayed blocked on a duplicate narrative"
+        return fake(prompt, model=model, **kwargs)
+
+    previous = llm_util.set_llm_backend(backend)
+    try:
+        cache = JudgeCache()
+        scheduler = TaskScheduler(max_workers=2)
+        generated = {"narratives": [NARRATIVE]}
+        for i in range(4):
+            scheduler.add_task(("judge", i), functools.partial(judge_one, 0, generated, cache), cost=2.0)
+        scheduler.add_task("probe", release.set, cost=1.0)
+        results = scheduler.run()
+    finally:
+        llm_util.set_llm_backend(previous)
+
+    assert not scheduler.errors
+    judged = [results[("judge", i)]["result"] for i in range(4)]
+    assert all(result == judged[0] for result in judged)
+    assert cache.stats == {"hits": 0, "deduplicated": 3, "judged": 1, "llm_calls": 1}
+    # Only the task that made the call is charged for it
+    assert sum(results[("judge", i)]["usage"]["calls"] for i in range(4)) == 1
@@ -0,0 +1,55 @@
+import pytest
+
+import llm_util
+from eventgraph import EventGraph
+from fake_llm import FakeLLM
+from local_scorer import REJECT_SCORES, prescreen_event
+
+PARENT = "The queen opened the secret letter and fled the castle at night."
+
+@pytest.mark.parametrize("text, reason", [
+    ("", "empty"),
+    ("The king fled.", "too_short"),
+    ("The kn#ght ∆∆∆ ≈≈≈ ¥¥¥ §§§ ### fled the castle at night", "gibberish"),
+    ("the storm the storm the storm the storm the storm the storm", "repetitive"),
+    ("The queen opened the secret letter and fled the castle at night!", "near_copy")
+])
+def test_prescreen_rejects(text, reason):
+    assert prescreen_event(text, [PARENT]) == (REJECT_SCORES[reason], reason)
+
+def test_prescreen_passes_a_plausible_event():
+    assert prescreen_event("The thief followed the river to the burned village by the tower.", [PARENT]) == (None, None)
+
+def _run(prefilter_scoring: bool) -> tuple:
+    fake = FakeLLM(seed=0)
+    calls = {"generate": 0, "score": 0}
+
+    def backend(prompt, **kwargs):
+        # Every generated event is too short to be worth scoring
+        if "Only output **one integer**" in prompt:
+            calls["score"] += 1
+            return fake(prompt, **kwargs)
+        calls["generate"] += 1
+        return "He left.", {"prompt_tokens": len(prompt) // 4, "completion_tokens": 2, "total_tokens": len(prompt) // 4 + 2}
+
+    previous = llm_util.set_llm_backend(backend)
+    try:
+        eg = EventGraph(model_generate_next="gpt-4o", model_scoring="gpt-4o", logging_level=None, prefilter_scoring=prefilter_scoring)
+        root_id = eg.add_event_node(text="A lighthouse keeper finds a message in a bottle.")
+        summary = eg.run_mcts(root_id=root_id, max_children=2, scoring_prompt="", iterations=4, scoring_depth=1, rollout_depth=1)
+    finally:
+        llm_util.set_llm_backend(previous)
+    return eg, summary, calls
+
+def test_prefilter_skips_rollouts_and_scoring_and_reports_saved_calls():
+    eg, summary, calls = _run(prefilter_scoring=True)
+
+    # One expansion per iteration; the rollout and the scoring call are saved
+    assert calls == {"generate": 4, "score": 0}
+    assert summary["llm_calls_saved"] == 8
+    assert eg.prefilter_stats["rejected"] == 4
+    assert eg.prefilter_stats["reasons"] == {"too_short": 4}
+
+    _, unfiltered, unfiltered_calls = _run(prefilter_scoring=False)
+    assert unfiltered["llm_calls_saved"] == 0
+    assert unfiltered_calls == {"generate": 8, "score": 4}
@@ -0,0 +1,29 @@
+import itertools
+import random
+
+import pytest
+
+import narrative_similarity
+from narrative_similarity import cross_narrative_similarity
+from tokenization import regex_word_tokenize
+
+def _jaccard_overlap(texts: list, n: int) -> float:
+    sets = []
+    for text in texts:
+        tokens = regex_word_tokenize(text)
+        sets.append({tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1)})
+    scores = [len(a & b) / len(a | b) if a | b else 0.0 for a, b in itertools.combinations(sets, 2)]
+    return sum(scores) / len(scores)
+
+@pytest.mark.parametrize("dense_min_texts", [32, 3])
+def test_pairwise_overlap_matches_brute_force(monkeypatch, dense_min_texts):
+    monkeypatch.setattr(narrative_similarity, "_DENSE_MIN_TEXTS", dense_min_texts)
+    monkeypatch.setattr(narrative_similarity, "_JACCARD_BLOCK_ROWS", 7)
+    rng = random.Random(0)
+    words = ["the", "a", "knight", "dragon", "castle", "rides", "sleeps", "and", "of", "gold"]
+    texts = [" ".join(rng.choice(words) for _ in range(rng.randint(0, 12))) for _ in range(40)]
+
+    overlap = cross_narrative_similarity({"group": texts}, max_n=3, processes=0, tokenizer="regex")["group"]["pairwise_overlap"]
+
+    for n in range(1, 4):
+        assert overlap[n - 1] == pytest.approx(_jaccard_overlap(texts, n), abs=1e-12)
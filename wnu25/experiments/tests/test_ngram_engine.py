@@ -0,0 +1,62 @@
+import random
+
+import numpy as np
+import pytest
+
+from lexical_diversity_evaluation import compute_ngram_diversity
+from ngram_engine import StreamingDistinctN, distinct_n, distinct_n_with_combined
+
+CORPUS = [
+    "The keeper climbs the stairs. The keeper lights the lamp, and the lamp burns all night.",
+    "She didn't know it's the last ship... A well-known captain waves from the deck!",
+    "Café owners can't stop the storm; the storm stops the café.",
+    "Short.",
+    "",
+    "The keeper climbs the stairs. The keeper lights the lamp, and the lamp burns all night."
+]
+
+def test_distinct_n_matches_compute_ngram_diversity():
+    per_text, combined = distinct_n_with_combined(CORPUS, max_n=4)
+
+    expected = np.array([[compute_ngram_diversity(text, n) for n in range(1, 5)] for text in CORPUS])
+    np.testing.assert_allclose(per_text, expected, rtol=0, atol=1e-12)
+    np.testing.assert_allclose(distinct_n(CORPUS, max_n=4), expected, rtol=0, atol=1e-12)
+    for n in range(1, 5):
+        assert combined[n - 1] == pytest.approx(compute_ngram_diversity(" ".join(CORPUS), n), abs=1e-12)
+
+def _random_texts(count: int, length: int, vocab_size: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    words = [f"w{i}" for i in range(vocab_size)]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(0, length))) for _ in range(count)]
+
+def test_streaming_exact_matches_batch():
+    texts = CORPUS + _random_texts(300, 15, 40)
+    # Small batches and compactions so both happen many times
+    stream = StreamingDistinctN(max_n=4, batch_tokens=50, compact_every=64)
+    stream.add_many(texts)
+
+    _, combined = distinct_n_with_combined(texts, max_n=4, tokenizer="regex")
+    np.testing.assert_allclose(stream.distinct_n(), combined, rtol=0, atol=1e-12)
+
+def test_streaming_counts_ngrams_across_batches():
+    texts = ["a b", "", "a", "b a", "b"]
+    # "a b a b a b": bigrams ab, ba, ab, ba, ab; trigrams aba, bab, aba, bab
+    for batch_tokens in (1, 2, 1 << 16):
+        stream = StreamingDistinctN(max_n=3, batch_tokens=batch_tokens)
+        stream.add_many(texts)
+
+        assert stream.distinct_counts() == [2, 2, 2]
+        assert stream.ngrams == [6, 5, 4]
+
+def test_streaming_hll_error_is_bounded():
+    texts = _random_texts(10000, 40, 5000)
+    exact = StreamingDistinctN(max_n=4)
+    sketch = StreamingDistinctN(max_n=4, mode="hll", precision=14)
+    for text in texts:
+        exact.add(text)
+        sketch.add(text)
+
+    # Three standard errors of HyperLogLog, 1.04 / sqrt(2**precision)
+    bound = 3 * 1.04 / np.sqrt(2 ** 14)
+    for estimate, count in zip(sketch.distinct_counts(), exact.distinct_counts()):
+        assert abs(estimate - count) / count <= bound
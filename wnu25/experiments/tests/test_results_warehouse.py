@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import results_warehouse
+from result_columns import SCORE_KEYS
+from results_warehouse import aggregate, compare_to_reference, ingest, load_narratives, load_scores, rows_to_frames
+from stats_util import t95
+
+def _rows(scores: dict) -> pd.DataFrame:
+    """
+    all_results.csv-style rows; 'scores' maps (strategy, stub) to the score
+    every category gets.
+    """
+    records = []
+    for (strategy, stub), score in scores.items():
+        record = {"strategy": strategy, "story_stub": stub, "narrative": f"- {stub}", "judge_comments": "ok"}
+        record.update({k: score for k in SCORE_KEYS})
+        record["avg_score"] = score
+        records.append(record)
+    return pd.DataFrame(records)
+
+SCORES = {
+    ("mcts", "stub A"): 8.0,
+    ("mcts", "stub B"): 6.0,
+    ("mcts", "stub C"): 7.0,
+    ("baseline", "stub A"): 5.0,
+    ("baseline", "stub B"): 6.5,
+    ("baseline", "stub C"): 4.0
+}
+
+@pytest.mark.parametrize("pyarrow", [True, False])
+def test_ingest_replaces_the_same_run_and_keeps_inputs(monkeypatch, tmp_path, pyarrow):
+    monkeypatch.setattr(results_warehouse, "_has_pyarrow", lambda: pyarrow)
+    scores, narratives = rows_to_frames(_rows(SCORES), "run-1", 3)
+    dtypes = scores.dtypes.copy()
+
+    ingest(str(tmp_path), scores, narratives)
+    ingest(str(tmp_path), scores, narratives)
+    other, other_narratives = rows_to_frames(_rows(SCORES), "run-2", 3)
+    ingest(str(tmp_path), other, other_narratives)
+
+    assert scores.dtypes.equals(dtypes)
+    stored = load_scores(str(tmp_path))
+    assert len(stored) == 12
+    assert sorted(stored["run"].unique()) == ["run-1", "run-2"]
+    joined = stored.merge(load_narratives(str(tmp_path)), on=results_warehouse.ROW_KEYS)
+    assert len(joined) == 12
+    assert set(joined["narrative"]) == {"- stub A", "- stub B", "- stub C"}
+    suffix = ".parquet" if pyarrow else ".pkl"
+    assert (tmp_path / f"scores{suffix}").exists()
+
+def test_aggregate_means_and_confidence_interval():
+    scores, _ = rows_to_frames(_rows(SCORES), "run-1", 3)
+    result = aggregate(scores).set_index("strategy")
+
+    mcts = result.loc["mcts"]
+    assert mcts["n"] == 3
+    assert mcts["avg_score"] == pytest.approx(7.0)
+    assert mcts["avg_score_std"] == pytest.approx(1.0)
+    half_width = t95(2) * 1.0 / np.sqrt(3)
+    assert mcts["avg_score_ci_low"] == pytest.approx(7.0 - half_width)
+    assert mcts["avg_score_ci_high"] == pytest.approx(7.0 + half_width)
+    assert result.loc["baseline", "avg_score"] == pytest.approx(15.5 / 3)
+
+def test_compare_pairs_stubs_with_the_reference():
+    scores, _ = rows_to_frames(_rows(SCORES), "run-1", 3)
+    # A stub only one strategy was run on is not paired
+    extra, _ = rows_to_frames(_rows({("mcts", "stub D"): 1.0}), "run-1", 3)
+    result = compare_to_reference(pd.concat([scores, extra], ignore_index=True), "baseline")
+
+    assert list(result["strategy"]) == ["mcts"]
+    row = result.iloc[0]
+    # Differences 3.0, -0.5 and 3.0
+    assert row["n_pairs"] == 3
+    assert row["mean_diff"] == pytest.approx(5.5 / 3)
+    assert row["win_rate"] == pytest.approx(2 / 3)
+    half_width = t95(2) * np.std([3.0, -0.5, 3.0], ddof=1) / np.sqrt(3)
+    assert row["diff_ci_low"] == pytest.approx(5.5 / 3 - half_width)
@@ -0,0 +1,125 @@
+import csv
+import functools
+
+import llm_util
+from fake_llm import FakeLLM, SimulatedAPI
+from run_evaluation import add_multibranch_tasks, merge_shard_results, multibranch_result, strategy_graph, run_evaluation_parallel
+from task_scheduler import TaskScheduler
+
+def _run(tmp_path, temperature: float):
+    stubs_file = tmp_path / "stubs.txt"
+    stubs_file.write_text("A lighthouse keeper finds a message in a bottle.\n", encoding="utf-8")
+    run_evaluation_parallel(
+        stubs_file=str(stubs_file),
+        narrative_lengths=[3],
+        temperature_generate_next=temperature,
+        multibranch_factors=[2],
+        mcts_configs=[],
+        min_num_chains=1,
+        output_dir=str(tmp_path / "results"),
+        max_workers=2,
+        judge_cache=False
+    )
+    with open(tmp_path / "results" / "3" / "all_results.csv", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+def test_resume_reuses_results_with_the_same_settings(tmp_path, fake_llm):
+    first = _run(tmp_path, temperature=1.0)
+    calls = fake_llm.calls
+    second = _run(tmp_path, temperature=1.0)
+
+    assert fake_llm.calls == calls
+    assert second == first
+
+def test_resume_recomputes_when_a_setting_changes(tmp_path, fake_llm):
+    _run(tmp_path, temperature=1.0)
+    calls = fake_llm.calls
+    rows = _run(tmp_path, temperature=0.5)
+
+    # Two generation steps of two children each, then one judge call
+    assert fake_llm.calls - calls == 5
+    assert len(rows) == 1
+
+def test_multibranch_tasks_share_the_scheduler_workers():
+    api = SimulatedAPI(latency={"default": (0.01, 0.0)})
+    previous = llm_util.set_llm_backend(api)
+    try:
+        scheduler = TaskScheduler(max_workers=2)
+        last_key = add_multibranch_tasks(
+            scheduler,
+            ("chain",),
+            functools.partial(strategy_graph, 1.0),
+            "A lighthouse keeper finds a message in a bottle.",
+            narrative_length=4,
+            branching_factor=3
+        )
+        scheduler.add_task(("chain", "generate"), multibranch_result, deps=[last_key])
+        results = scheduler.run()
+    finally:
+        llm_util.set_llm_backend(previous)
+
+    generated = results[("chain", "generate")]
+    assert not scheduler.errors
+    assert generated["narratives"][0].count("\n- ") == 3
+    assert generated["usage"]["calls"] == 9
+    # Siblings ran concurrently, but never more than the scheduler's workers
+    assert api.stats()["peak_in_flight"] == 2
+
+STUBS = [
+    "A lighthouse keeper finds a message in a bottle.",
+    "Two rival bakers share one oven.",
+    "A lighthouse keeper finds a message in a bottle.",
+    "The last train leaves without its driver.",
+    "A cartographer maps a city that moves at night."
+]
+
+def _evaluate(output_dir, stubs_file, **kwargs):
+    # A fresh FakeLLM per process, as separate machines would have. Every
+    # prompt is then asked once per process (one length, one branch), so
+    # answers do not depend on which process asks
+    previous = llm_util.set_llm_backend(FakeLLM(seed=0))
+    try:
+        run_evaluation_parallel(
+            stubs_file=str(stubs_file),
+            narrative_lengths=[3],
+            temperature_generate_next=1.0,
+            multibranch_factors=[1],
+            mcts_configs=[],
+            min_num_chains=1,
+            output_dir=str(output_dir),
+            max_workers=2,
+            **kwargs
+        )
+    finally:
+        llm_util.set_llm_backend(previous)
+
+def _rows(output_dir, length):
+    with open(output_dir / str(length) / "all_results.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    # Wall-clock columns differ between any two runs
+    for row in rows:
+        del row["generate_seconds"], row["judge_seconds"]
+    return rows
+
+def test_sharded_run_and_merge_match_a_single_run(tmp_path):
+    stubs_file = tmp_path / "stubs.txt"
+    stubs_file.write_text("\n".join(STUBS) + "\n", encoding="utf-8")
+
+    _evaluate(tmp_path / "single", stubs_file)
+    for shard_index in range(3):
+        _evaluate(tmp_path / "sharded", stubs_file, shard=(shard_index, 3))
+    merge_shard_results(
+        stubs_file=str(stubs_file),
+        narrative_lengths=[3],
+        temperature_generate_next=1.0,
+        multibranch_factors=[1],
+        mcts_configs=[],
+        min_num_chains=1,
+        output_dir=str(tmp_path / "sharded")
+    )
+
+    single = _rows(tmp_path / "single", 3)
+    # The repeated stub is run once
+    assert [row["story_stub"] for row in single] == [STUBS[0], STUBS[1], STUBS[3], STUBS[4]]
+    assert _rows(tmp_path / "sharded", 3) == single
+    assert len(list((tmp_path / "sharded").glob("results.shard-*-of-3.jsonl"))) == 3
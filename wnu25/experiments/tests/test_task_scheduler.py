@@ -0,0 +1,51 @@
+import threading
+
+import pytest
+
+from task_scheduler import TaskScheduler
+
+def test_dependency_results_are_passed_in_order():
+    scheduler = TaskScheduler(max_workers=2)
+    scheduler.add_task("a", lambda: 1)
+    scheduler.add_task("b", lambda: 2)
+    scheduler.add_task("sum", lambda a, b: (a, b), deps=["a", "b"])
+    assert scheduler.run()["sum"] == (1, 2)
+
+def test_judge_pool_runs_beside_a_busy_default_pool():
+    scheduler = TaskScheduler(max_workers=1, pools={"judge": 3})
+    release = threading.Event()
+    barrier = threading.Barrier(3, timeout=5)
+
+    # After "generate", holds the only default worker until every judge
+    # task is running
+    scheduler.add_task("generate", lambda: "story", cost=100.0)
+    scheduler.add_task("slow generate", lambda: release.wait(5), cost=1.0)
+
+    def judge(story):
+        barrier.wait()
+        release.set()
+        return story.upper()
+
+    for i in range(3):
+        scheduler.add_task(("judge", i), judge, deps=["generate"], pool="judge")
+    results = scheduler.run()
+
+    assert not scheduler.errors
+    assert results["slow generate"] is True
+    assert [results[("judge", i)] for i in range(3)] == ["STORY"] * 3
+
+def test_failed_task_skips_dependents():
+    scheduler = TaskScheduler(max_workers=1, pools={"judge": 1})
+    scheduler.add_task("generate", lambda: 1 / 0)
+    scheduler.add_task("judge", lambda x: x, deps=["generate"], pool="judge")
+    scheduler.add_task("aggregate", lambda x: "done", deps=["judge"], allow_failed_deps=True)
+    results = scheduler.run()
+
+    assert "generate" in scheduler.errors
+    assert scheduler.skipped == ["judge"]
+    assert results["aggregate"] == "done"
+
+def test_unknown_pool_is_rejected():
+    scheduler = TaskScheduler(max_workers=1)
+    with pytest.raises(ValueError):
+        scheduler.add_task("a", lambda: 1, pool="judge")
@@ -0,0 +1,61 @@
+import text_store
+from eventgraph import EventGraph
+from text_store import TextStore
+
+LONG_TEXT = "The keeper climbs the stairs of the lighthouse and lights the lamp again. " * 8
+
+def test_intern_deduplicates():
+    store = TextStore()
+    first = store.intern("A knight rides out.")
+    second = store.intern("The dragon is asleep.")
+
+    assert store.intern("A knight rides out.") == first
+    assert second != first
+    assert len(store) == 2
+    assert store.get_many([second, first]) == ["The dragon is asleep.", "A knight rides out."]
+
+def test_fingerprint_collisions_keep_texts_apart(monkeypatch):
+    monkeypatch.setattr(text_store, "_text_key", lambda text: 0)
+    store = TextStore()
+    ids = [store.intern(text) for text in ("one", "two", "three", "two")]
+
+    assert ids[1] == ids[3]
+    assert len(set(ids)) == 3
+    assert store.get_many(ids) == ["one", "two", "three", "two"]
+
+def test_compression_round_trips():
+    store = TextStore()
+    long_id = store.intern(LONG_TEXT)
+    short_id = store.intern("Short.")
+
+    assert store.compress([long_id, short_id]) > 0
+    assert store.memory_stats()["compressed_texts"] >= 1
+    # Compressed entries are skipped
+    assert store.compress([long_id, short_id]) == 0
+    assert store.get(long_id) == LONG_TEXT
+    assert store.get(short_id) == "Short."
+    assert store.intern(LONG_TEXT) == long_id
+
+def test_cold_nodes_keep_their_text(fake_llm):
+    eg = EventGraph(model_generate_next="gpt-4o", model_scoring="gpt-4o", logging_level=None)
+    root_id = eg.add_event_node(text=LONG_TEXT)
+    eg.run_mcts(root_id=root_id, max_children=2, scoring_prompt="", iterations=8, scoring_depth=1, rollout_depth=0)
+    texts = {n: eg.get_text(n) for n in eg.G.nodes}
+    guesses = {n: eg.get_prev_guesses_forward(n) for n in eg.G.nodes}
+
+    # Everything counts as cold, the long stub included
+    assert eg.compress_cold_nodes(max_visits=10 ** 6) > 0
+    assert eg.text_store.memory_stats()["compressed_texts"] >= 1
+    assert {n: eg.get_text(n) for n in eg.G.nodes} == texts
+    assert {n: eg.get_prev_guesses_forward(n) for n in eg.G.nodes} == guesses
+
+def test_graphs_share_one_store():
+    store = TextStore()
+    graphs = [EventGraph(logging_level=None, text_store=store) for _ in range(3)]
+    roots = [eg.add_event_node(text="A shared stub.") for eg in graphs]
+    child = graphs[1].add_event_node(text="Only in the second tree.")
+
+    assert len({eg.G.nodes[root_id]["text_id"] for eg, root_id in zip(graphs, roots)}) == 1
+    assert len(store) == 2
+    assert graphs[1].get_text(child) == "Only in the second tree."
+    assert all(eg.get_text(root_id) == "A shared stub." for eg, root_id in zip(graphs, roots))
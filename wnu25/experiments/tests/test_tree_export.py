@@ -0,0 +1,94 @@
+import gzip
+import json
+
+import networkx as nx
+import pytest
+
+from eventgraph import EventGraph
+
+def _tree():
+    """
+    root -> a (mean 8) -> d -> e
+         -> b (mean 3)
+         -> c (mean 6)
+    """
+    eg = EventGraph(logging_level=None)
+    ids = {}
+    for name, text, visits, total in [
+        ("root", "The stub.", 4, 24.0),
+        ("a", 'Tom & "Jerry" <meet>.', 2, 16.0),
+        ("b", "B happens.", 1, 3.0),
+        ("c", "C happens.", 1, 6.0),
+        ("d", "D happens.", 1, 5.0),
+        ("e", "E happens, at   the very   end.", 0, 0.0)
+    ]:
+        ids[name] = eg.add_event_node(text=text)
+        eg.G.nodes[ids[name]]["mcts_visits"] = visits
+        eg.G.nodes[ids[name]]["mcts_total_score"] = total
+    for parent, child in [("root", "a"), ("root", "b"), ("root", "c"), ("a", "d"), ("d", "e")]:
+        eg.G.add_edge(ids[parent], ids[child])
+    return eg, ids
+
+def _read_jsonl(path):
+    opener = gzip.open if str(path).endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+@pytest.mark.parametrize("name", ["tree.graphml", "tree.graphml.gz"])
+def test_graphml_parses_back(tmp_path, name):
+    eg, ids = _tree()
+    path = str(tmp_path / name)
+
+    assert eg.export_tree(ids["root"], path, max_label_chars=None) == 6
+    parsed = nx.read_graphml(path)
+    assert set(parsed.edges) == {(f"n{u}", f"n{v}") for u, v in eg.G.edges}
+    a = parsed.nodes[f"n{ids['a']}"]
+    assert a["label"] == 'Tom & "Jerry" <meet>.'
+    assert a["visits"] == 2
+    assert a["mean_score"] == pytest.approx(8.0)
+    assert parsed.nodes[f"n{ids['e']}"]["depth"] == 3
+
+@pytest.mark.parametrize("name", ["tree.jsonl", "tree.jsonl.gz"])
+def test_jsonl_parses_back(tmp_path, name):
+    eg, ids = _tree()
+    path = str(tmp_path / name)
+
+    eg.export_tree(ids["root"], path, max_label_chars=12)
+    rows = _read_jsonl(path)
+    # Depth first, children in insertion order
+    assert [row["id"] for row in rows] == [ids[n] for n in ("root", "a", "d", "e", "b", "c")]
+    assert {row["id"]: row["parent"] for row in rows} == {
+        ids["root"]: None, ids["a"]: ids["root"], ids["b"]: ids["root"],
+        ids["c"]: ids["root"], ids["d"]: ids["a"], ids["e"]: ids["d"]
+    }
+    # Whitespace collapsed, then truncated
+    assert rows[3]["label"] == "E happens..."
+    assert rows[0]["mean_score"] == 6.0
+
+def test_dot_escapes_labels(tmp_path):
+    eg, ids = _tree()
+    path = tmp_path / "tree.dot"
+
+    eg.export_tree(ids["root"], str(path))
+    dot = path.read_text(encoding="utf-8")
+    assert dot.startswith("digraph EventGraph {")
+    assert dot.count(" -> ") == 5
+    assert 'label="Tom & \\"Jerry\\" <meet>.\\n(v=2, s=8.00)"' in dot
+
+def test_depth_and_top_k_prune(tmp_path):
+    eg, ids = _tree()
+    path = str(tmp_path / "tree.jsonl")
+
+    assert eg.export_tree(ids["root"], path, max_depth=1) == 4
+    assert {row["id"] for row in _read_jsonl(path)} == {ids[n] for n in ("root", "a", "b", "c")}
+
+    # The two best children by mean score are a and c
+    assert eg.export_tree(ids["root"], path, top_k=2) == 5
+    assert [row["id"] for row in _read_jsonl(path)] == [ids[n] for n in ("root", "a", "d", "e", "c")]
+
+    assert eg.export_tree(ids["root"], path, max_depth=2, top_k=1) == 3
+
+def test_unknown_extension_is_rejected(tmp_path):
+    eg, ids = _tree()
+    with pytest.raises(ValueError):
+        eg.export_tree(ids["root"], str(tmp_path / "tree.txt"))
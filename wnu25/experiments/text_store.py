@@ -0,0 +1,108 @@
+import hashlib
+import sys
+import threading
+import zlib
+
+def _text_key(text: str) -> int:
+    """
+    64-bit fingerprint used to find an already-interned text.
+    """
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+class TextStore:
+    """
+    Append-only, interned storage for event texts.
+
+    Each distinct text is stored once and referred to by an integer id, so
+    nodes, prevGuessesForward lists and any number of EventGraphs sharing
+    the store hold small ints instead of copies of the same string.
+    Entries can be zlib-compressed once they go cold; get() decompresses
+    transparently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # id -> str, or zlib-compressed bytes for cold entries
+        self._texts = []
+        # fingerprint -> id (collisions fall back to _collisions)
+        self._index = {}
+        self._collisions = {}
+        self._compressed_ids = set()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def intern(self, text: str) -> int:
+        """
+        Returns the id of 'text', adding it to the store if it is new.
+        """
+        key = _text_key(text)
+        with self._lock:
+            text_id = self._index.get(key)
+            if text_id is None:
+                text_id = self._append(text)
+                self._index[key] = text_id
+                return text_id
+            if self._get_unlocked(text_id) == text:
+                return text_id
+            # Fingerprint collision between different texts
+            text_id = self._collisions.get(text)
+            if text_id is None:
+                text_id = self._append(text)
+                self._collisions[text] = text_id
+            return text_id
+
+    def _append(self, text: str) -> int:
+        self._texts.append(text)
+        return len(self._texts) - 1
+
+    def _get_unlocked(self, text_id: int) -> str:
+        entry = self._texts[text_id]
+        if isinstance(entry, bytes):
+            return zlib.decompress(entry).decode("utf-8")
+        return entry
+
+    def get(self, text_id: int) -> str:
+        return self._get_unlocked(text_id)
+
+    def get_many(self, text_ids) -> list:
+        return [self._get_unlocked(text_id) for text_id in text_ids]
+
+    def compress(self, text_ids) -> int:
+        """
+        Compresses the given entries in place, keeping only those that
+        actually shrink. Returns the number of bytes saved (approximate).
+        """
+        saved = 0
+        with self._lock:
+            for text_id in text_ids:
+                entry = self._texts[text_id]
+                if isinstance(entry, bytes):
+                    continue
+                packed = zlib.compress(entry.encode("utf-8"), 6)
+                before = sys.getsizeof(entry)
+                after = sys.getsizeof(packed)
+                if after < before:
+                    self._texts[text_id] = packed
+                    self._compressed_ids.add(text_id)
+                    saved += before - after
+        return saved
+
+    def memory_stats(self) -> dict:
+        """
+        Approximate memory held by the store, in bytes.
+        """
+        with self._lock:
+            text_bytes = sum(sys.getsizeof(entry) for entry in self._texts)
+            index_bytes = (
+                sys.getsizeof(self._texts)
+                + sys.getsizeof(self._index)
+                + sys.getsizeof(self._collisions)
+            )
+            return {
+                "texts": len(self._texts),
+                "compressed_texts": len(self._compressed_ids),
+                "text_bytes": text_bytes,
+                "index_bytes": index_bytes,
+                "total_bytes": text_bytes + index_bytes
+            }
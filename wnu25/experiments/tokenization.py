@@ -0,0 +1,90 @@
+import re
+import threading
+
+# NLTK data that nltk.word_tokenize needs (NLTK 3.9 loads Punkt from punkt_tab)
+NLTK_TOKENIZER_RESOURCES = {
+    "punkt_tab": "tokenizers/punkt_tab/english/"
+}
+
+# None until the first check; see ensure_nltk_resources
+_nltk_available = None
+_nltk_lock = threading.Lock()
+
+def _missing_nltk_resources(nltk) -> list:
+    missing = []
+    for name, path in NLTK_TOKENIZER_RESOURCES.items():
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(name)
+    return missing
+
+def ensure_nltk_resources(download: bool = False) -> bool:
+    """
+    Checks whether NLTK and its tokenizer data are installed. The check
+    only looks at local files, and its result is cached for the process.
+    Missing data is downloaded only with download=True, so nothing touches
+    the network unless asked to.
+
+    Returns True if nltk.word_tokenize can be used. Otherwise tokenize()
+    falls back to regex_word_tokenize.
+    """
+    global _nltk_available
+    with _nltk_lock:
+        if _nltk_available or (_nltk_available is not None and not download):
+            return _nltk_available
+        try:
+            import nltk
+        except ImportError:
+            print("[WARN] NLTK is not installed; using the built-in regex tokenizer.")
+            _nltk_available = False
+            return False
+
+        missing = _missing_nltk_resources(nltk)
+        if missing and download:
+            print(f"[INFO] Downloading missing NLTK resources: {', '.join(missing)}")
+            for name in missing:
+                nltk.download(name, quiet=True)
+            missing = _missing_nltk_resources(nltk)
+        if missing:
+            print(
+                f"[WARN] NLTK resources not found: {', '.join(missing)}; using the built-in regex tokenizer. "
+                "Run 'python download_nltk_resources.py' to install them."
+            )
+        _nltk_available = not missing
+        return _nltk_available
+
+# Approximates the Penn Treebank rules of nltk.word_tokenize: contractions
+# split off ("do", "n't"; "it", "'s"), hyphenated words kept whole,
+# punctuation as separate tokens
+_WORD_RE = re.compile(r"\w+(?=n't\b)|n't\b|'(?:s|m|d|ll|re|ve)\b|\.\.\.|\w+(?:-\w+)*|[^\w\s]")
+
+def regex_word_tokenize(text: str) -> list:
+    """
+    Dependency-free word tokenizer used when the NLTK data is unavailable.
+    """
+    return _WORD_RE.findall(text)
+
+def tokenize(text: str) -> list:
+    """
+    nltk.word_tokenize if its data is installed, else regex_word_tokenize.
+    """
+    available = _nltk_available if _nltk_available is not None else ensure_nltk_resources()
+    if available:
+        import nltk
+        return nltk.word_tokenize(text)
+    return regex_word_tokenize(text)
+
+def extract_raw_text(narrative):
+    # Split by lines and remove the bullet points/dashes
+    lines = narrative.split('\n')
+    cleaned_lines = [line[2:].strip() if line.startswith('- ') else line.strip() 
+                    for line in lines if line.strip()]
+    
+    # Join back into a single text
+    raw_text = ' '.join(cleaned_lines)
+    
+    # Filter out non-ASCII characters
+    ascii_text = ''.join(char for char in raw_text if ord(char) < 128)
+    
+    return ascii_text
@@ -0,0 +1,151 @@
+import gzip
+import json
+from xml.sax.saxutils import escape as xml_escape
+
+# File extension -> export format
+EXPORT_FORMATS = {
+    ".dot": "dot",
+    ".gv": "dot",
+    ".graphml": "graphml",
+    ".jsonl": "jsonl",
+}
+
+def _infer_format(path: str) -> str:
+    name = path[:-3] if path.endswith(".gz") else path
+    for ext, fmt in EXPORT_FORMATS.items():
+        if name.endswith(ext):
+            return fmt
+    raise ValueError(f"Cannot infer export format from '{path}'. Use one of {sorted(EXPORT_FORMATS)} or pass fmt.")
+
+def _truncate(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)] + "..."
+
+def _node_stats(node_data: dict):
+    visits = node_data.get("mcts_visits", 0)
+    total = node_data.get("mcts_total_score", 0.0)
+    return visits, (total / visits) if visits > 0 else 0.0
+
+def iter_tree(eg, root_id: int, max_depth: int = None, top_k: int = None):
+    """
+    Depth-first walk of the tree under 'root_id' without recursion.
+    Yields (node_id, parent_id, depth, visits, mean_score).
+
+    'max_depth' stops descending below that depth (root is depth 0).
+    'top_k' keeps only the k children with the best (mean score, visits)
+    under each node.
+    """
+    succ = eg.G.succ
+    nodes = eg.G.nodes
+    stack = [(root_id, None, 0)]
+    while stack:
+        node_id, parent_id, depth = stack.pop()
+        visits, mean_score = _node_stats(nodes[node_id])
+        yield node_id, parent_id, depth, visits, mean_score
+
+        if max_depth is not None and depth >= max_depth:
+            continue
+        children = list(succ[node_id])
+        if top_k is not None and len(children) > top_k:
+            children.sort(key=lambda c: _node_stats(nodes[c]), reverse=True)
+            children = children[:top_k]
+        # Reverse so children are visited in their original order
+        for c in reversed(children):
+            stack.append((c, node_id, depth + 1))
+
+def _dot_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+def _write_dot(f, eg, rows, max_label_chars):
+    f.write("digraph EventGraph {\n")
+    f.write("  rankdir=LR;\n")
+    f.write("  node [shape=box, fontsize=8];\n")
+    for node_id, parent_id, depth, visits, mean_score in rows:
+        label = _dot_escape(_truncate(eg.get_text(node_id), max_label_chars))
+        f.write(f'  n{node_id} [label="{label}\\n(v={visits}, s={mean_score:.2f})"];\n')
+        if parent_id is not None:
+            f.write(f"  n{parent_id} -> n{node_id};\n")
+    f.write("}\n")
+
+def _write_graphml(f, eg, rows, max_label_chars):
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    f.write('<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n')
+    f.write('  <key id="label" for="node" attr.name="label" attr.type="string"/>\n')
+    f.write('  <key id="depth" for="node" attr.name="depth" attr.type="int"/>\n')
+    f.write('  <key id="visits" for="node" attr.name="visits" attr.type="int"/>\n')
+    f.write('  <key id="mean_score" for="node" attr.name="mean_score" attr.type="double"/>\n')
+    f.write('  <graph id="EventGraph" edgedefault="directed">\n')
+    for node_id, parent_id, depth, visits, mean_score in rows:
+        label = xml_escape(_truncate(eg.get_text(node_id), max_label_chars))
+        f.write(
+            f'    <node id="n{node_id}"><data key="label">{label}</data>'
+            f'<data key="depth">{depth}</data><data key="visits">{visits}</data>'
+            f'<data key="mean_score">{mean_score:.4f}</data></node>\n'
+        )
+        if parent_id is not None:
+            f.write(f'    <edge source="n{parent_id}" target="n{node_id}"/>\n')
+    f.write("  </graph>\n")
+    f.write("</graphml>\n")
+
+def _write_jsonl(f, eg, rows, max_label_chars):
+    for node_id, parent_id, depth, visits, mean_score in rows:
+        f.write(json.dumps({
+            "id": node_id,
+            "parent": parent_id,
+            "depth": depth,
+            "visits": visits,
+            "mean_score": round(mean_score, 4),
+            "label": _truncate(eg.get_text(node_id), max_label_chars)
+        }, ensure_ascii=False))
+        f.write("\n")
+
+_WRITERS = {
+    "dot": _write_dot,
+    "graphml": _write_graphml,
+    "jsonl": _write_jsonl,
+}
+
+def export_tree(
+    eg,
+    root_id: int,
+    path: str,
+    fmt: str = None,
+    max_label_chars: int = 60,
+    max_depth: int = None,
+    top_k: int = None
+) -> int:
+    """
+    Streams the tree under 'root_id' to 'path' as DOT, GraphML or JSON Lines
+    without building a layout or loading a plotting stack.
+
+    'fmt' is inferred from the extension if omitted; a trailing ".gz"
+    gzip-compresses the output. Labels are whitespace-collapsed and
+    truncated to 'max_label_chars' (None keeps the full text).
+    'max_depth' and 'top_k' prune the tree as in iter_tree.
+
+    Returns the number of nodes written.
+    """
+    if fmt is None:
+        fmt = _infer_format(path)
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}'. Use one of {sorted(_WRITERS)}.")
+
+    count = 0
+
+    def counted_rows():
+        nonlocal count
+        for row in iter_tree(eg, root_id, max_depth=max_depth, top_k=top_k):
+            count += 1
+            yield row
+
+    if path.endswith(".gz"):
+        f = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+    else:
+        f = open(path, "w", encoding="utf-8", buffering=1 << 20)
+    with f:
+        _WRITERS[fmt](f, eg, counted_rows(), max_label_chars)
+
+    eg.logger.info("Exported %d nodes to %s (%s)", count, path, fmt)
+    return count